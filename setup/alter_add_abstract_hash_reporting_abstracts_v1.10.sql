@@ -0,0 +1,58 @@
+-- =============================================================================
+-- Migration: reporting_abstracts.abstractHash (v1.10)
+-- =============================================================================
+-- update/auditAbstracts.py used to pull the full text of the longest
+-- AUDIT_MAX_CANDIDATES rows out of reporting_abstracts, fetch the same PMIDs
+-- from DynamoDB and compare strings in Python, so only a capped slice of the
+-- table could ever be audited. It now audits every row: the MariaDB side is
+-- a stored digest, the DynamoDB side is hashed as it is read, and full text
+-- is pulled from MariaDB only for PMIDs whose digests disagree.
+--
+-- WHAT'S CHANGED:
+--   1. reporting_abstracts.abstractHash: SHA-1 hex digest of the abstract
+--      after CRLF -> LF and whitespace trim (pubmed_article.abstract_hash).
+--      Written by update/abstractImport.py in the same INSERT as the row.
+--
+-- BACKFILL:
+--   Existing rows are left NULL here. The normalization strips all Python
+--   whitespace, which TRIM() cannot reproduce, so the digest is computed in
+--   Python rather than with SHA1() in SQL:
+--     python3 update/auditAbstracts.py --backfill-hashes
+--   Until then the audit treats NULL-hash rows as mismatches and compares
+--   their full text, which is correct but as slow as the old path.
+--
+-- Safe to run on prod and dev. Idempotent (information_schema guard). Run
+-- BEFORE deploying the updated abstractImport.py, whose INSERT names the
+-- new column.
+-- =============================================================================
+
+SET @db = DATABASE();
+
+-- -----------------------------------------------------------------------------
+-- reporting_abstracts.abstractHash
+-- -----------------------------------------------------------------------------
+
+SET @has_col = (
+    SELECT COUNT(*) FROM information_schema.columns
+    WHERE table_schema = @db
+      AND table_name = 'reporting_abstracts'
+      AND column_name = 'abstractHash'
+);
+
+SET @sql = IF(
+    @has_col > 0,
+    'SELECT ''reporting_abstracts.abstractHash already exists; no-op.''',
+    'ALTER TABLE reporting_abstracts
+       ADD COLUMN abstractHash char(40) DEFAULT NULL AFTER abstractVarchar'
+);
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- -----------------------------------------------------------------------------
+-- Verification
+-- -----------------------------------------------------------------------------
+
+SELECT column_name, column_type, is_nullable
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+  AND table_name = 'reporting_abstracts'
+ORDER BY ordinal_position;
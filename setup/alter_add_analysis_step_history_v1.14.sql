@@ -0,0 +1,50 @@
+-- =============================================================================
+-- Migration: populateAnalysisSummaryTables_v2 per-step timing history (v1.14)
+-- =============================================================================
+-- log_progress writes RUNNING/INFO/DONE rows to analysis_job_log, but
+-- run_nightly_indexing.sh deletes rows older than a day, so there was no way
+-- to tell which step of the procedure got slower over time. The nightly
+-- driver (update/nightly_indexing.py) now folds each job's log rows into one
+-- row per step and keeps them here, then compares each step with its
+-- trailing median and logs a [REGRESSION] warning for steps that grew past
+-- the threshold (`python3 nightly_indexing.py --report` prints the same
+-- comparison on demand).
+--
+-- WHAT'S CHANGED:
+--   1. analysis_step_history: one row per step per indexing job.
+--        job_id          analysis_job_log.job_id (job_YYYYMMDD_HHMMSS)
+--        step            log_progress step name, e.g. 'Step 1: Author'
+--        started_at      the step's first analysis_job_log row
+--        seconds         first row to DONE row (or to the next step's first row)
+--        rows_affected   sum of rows_affected logged by the step
+--        status          DONE, or the step's last status (ERROR sticks)
+--
+-- Not pruned: a few dozen rows per night.
+--
+-- Safe to run on prod and dev. Idempotent (CREATE TABLE IF NOT EXISTS).
+-- nightly_indexing.py tolerates the table being absent (logs and carries
+-- on), so the order relative to deployment does not matter.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS `analysis_step_history` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `job_id` varchar(50) NOT NULL,
+  `step` varchar(100) NOT NULL,
+  `started_at` datetime NOT NULL,
+  `seconds` float NOT NULL,
+  `rows_affected` bigint(20) NOT NULL DEFAULT 0,
+  `status` varchar(20) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_job_step` (`job_id`, `step`),
+  KEY `idx_step_started_at` (`step`, `started_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- -----------------------------------------------------------------------------
+-- Verification
+-- -----------------------------------------------------------------------------
+
+SELECT column_name, column_type, is_nullable
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+  AND table_name = 'analysis_step_history'
+ORDER BY ordinal_position;
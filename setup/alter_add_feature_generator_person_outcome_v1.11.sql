@@ -0,0 +1,40 @@
+-- =============================================================================
+-- Migration: Feature Generator per-person history (v1.11)
+-- =============================================================================
+-- update/executeFeatureGenerator.py used to dispatch people in whatever order
+-- reporting_ad_hoc_feature_generator_execution returned them, so a handful of
+-- prolific people reached late in the run formed a long tail after everyone
+-- else had finished. It now schedules overdue people first and, within that,
+-- the slowest first, then stops dispatching at a time budget. Both need to
+-- know how each person's last run went.
+--
+-- WHAT'S CHANGED:
+--   1. feature_generator_person_outcome: one row per person ever sent to
+--      Feature Generator -- last attempt, last success, and a moving average
+--      of successful response times. Upserted in bulk at the end of each run.
+--
+-- Safe to run on prod and dev. Idempotent (CREATE TABLE IF NOT EXISTS). Run
+-- BEFORE deploying the updated executeFeatureGenerator.py, which reads and
+-- writes this table.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS `feature_generator_person_outcome` (
+  `personIdentifier` varchar(128) NOT NULL,
+  `lastAttemptAt` datetime DEFAULT NULL,
+  `lastStatus` varchar(16) DEFAULT NULL,
+  `lastLatencySeconds` float DEFAULT NULL,
+  `lastSuccessAt` datetime DEFAULT NULL,
+  `avgLatencySeconds` float DEFAULT NULL,
+  PRIMARY KEY (`personIdentifier`),
+  KEY `lastSuccessAt` (`lastSuccessAt`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- -----------------------------------------------------------------------------
+-- Verification
+-- -----------------------------------------------------------------------------
+
+SELECT column_name, column_type, is_nullable
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+  AND table_name = 'feature_generator_person_outcome'
+ORDER BY ordinal_position;
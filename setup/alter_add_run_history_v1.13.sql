@@ -0,0 +1,52 @@
+-- =============================================================================
+-- Migration: nightly pipeline run history (v1.13)
+-- =============================================================================
+-- update/run_all.py used to log only free text per stage ("SCRIPT COMPLETED
+-- ... in 123.4s") and the RSS of its own process, which said nothing about a
+-- child script's peak memory or where its time went. It now keeps one
+-- structured record per stage and writes it here (and to a telemetry JSON
+-- uploaded next to the log in S3), so regressions and capacity trends can be
+-- queried instead of grepped.
+--
+-- WHAT'S CHANGED:
+--   1. run_history: one row per stage per nightly run.
+--        run_id          UTC start of the run_all.py invocation (YYYYMMDDTHHMMSSZ)
+--        status          ok / failed / timeout / error
+--        peak_rss_mb     the child's own peak RSS (wait4 rusage)
+--        cpu_*_seconds   the child's CPU time
+--        metrics         JSON reported by the stage via update/pipeline_metrics.py:
+--                        rows_loaded per table, api_calls per service,
+--                        bytes_transferred, dynamodb_rcu, ...
+--
+-- Safe to run on prod and dev. Idempotent (CREATE TABLE IF NOT EXISTS).
+-- run_all.py tolerates the table being absent (logs and carries on), so the
+-- order relative to deployment does not matter.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS `run_history` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `run_id` varchar(32) NOT NULL,
+  `stage` varchar(64) NOT NULL,
+  `status` varchar(16) NOT NULL,
+  `exit_code` int(11) DEFAULT NULL,
+  `started_at` datetime NOT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  `wall_seconds` float DEFAULT NULL,
+  `peak_rss_mb` float DEFAULT NULL,
+  `cpu_user_seconds` float DEFAULT NULL,
+  `cpu_system_seconds` float DEFAULT NULL,
+  `metrics` longtext DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_run_id` (`run_id`),
+  KEY `idx_stage_started_at` (`stage`, `started_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- -----------------------------------------------------------------------------
+-- Verification
+-- -----------------------------------------------------------------------------
+
+SELECT column_name, column_type, is_nullable
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+  AND table_name = 'run_history'
+ORDER BY ordinal_position;
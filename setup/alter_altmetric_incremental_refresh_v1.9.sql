@@ -0,0 +1,85 @@
+-- =============================================================================
+-- Migration: incremental Altmetric refresh (v1.9)
+-- =============================================================================
+-- update/retrieveAltmetric.py used to TRUNCATE `altmetric` and re-fetch every
+-- DOI accepted in the last two years, one API call per DOI, every run. It now
+-- refreshes incrementally: a bounded number of DOIs per run, picked by how
+-- long ago we last asked Altmetric about them and how fast their score is
+-- moving, upserted into a staging copy of `altmetric` that is swapped in
+-- atomically at the end.
+--
+-- WHAT'S CHANGED:
+--   1. altmetric.y (doi): KEY -> UNIQUE KEY, so the refresh can upsert with
+--      INSERT ... ON DUPLICATE KEY UPDATE keyed on doi.
+--   2. altmetric_fetch_log: one row per DOI we have asked Altmetric about,
+--      including DOIs Altmetric has no record for (HTTP 404). Without it, a
+--      DOI with no Altmetric attention would look "never fetched" and be
+--      re-requested at top priority every run.
+--
+-- `altmetric` is a rebuildable cache of the Altmetric API, so duplicate doi
+-- rows left by the old truncate-reload path are deleted (keeping the newest
+-- id) rather than aborting the migration.
+--
+-- Safe to run on prod and dev. Idempotent (information_schema guard; CREATE
+-- TABLE IF NOT EXISTS). Run BEFORE deploying the updated retrieveAltmetric.py,
+-- otherwise the upsert degrades to plain inserts and creates duplicates.
+-- =============================================================================
+
+SET @db = DATABASE();
+
+-- -----------------------------------------------------------------------------
+-- altmetric: drop duplicate doi rows (keep the most recently inserted)
+-- -----------------------------------------------------------------------------
+
+DELETE older
+FROM altmetric older
+JOIN altmetric newer
+  ON newer.doi = older.doi
+ AND newer.id > older.id;
+
+-- -----------------------------------------------------------------------------
+-- altmetric.y: KEY -> UNIQUE KEY
+-- -----------------------------------------------------------------------------
+
+SET @already_unique = (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = @db
+      AND table_name = 'altmetric'
+      AND index_name = 'y'
+      AND non_unique = 0
+);
+
+SET @sql = IF(
+    @already_unique > 0,
+    'SELECT ''altmetric.y is already UNIQUE; no-op.''',
+    'ALTER TABLE altmetric
+       DROP INDEX y,
+       ADD UNIQUE KEY y (doi) USING BTREE'
+);
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- -----------------------------------------------------------------------------
+-- altmetric_fetch_log — when each DOI was last requested from Altmetric
+-- -----------------------------------------------------------------------------
+-- Written by retrieveAltmetric.py after a successful table swap. `found` is 0
+-- when Altmetric returned no record for the DOI. Not part of the swap: it is
+-- small, append/upsert only, and describes API calls rather than API data.
+-- -----------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS `altmetric_fetch_log` (
+  `doi` varchar(128) NOT NULL,
+  `found` tinyint(1) NOT NULL DEFAULT 0,
+  `last_fetched_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`doi`),
+  KEY `last_fetched_at` (`last_fetched_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- -----------------------------------------------------------------------------
+-- Verification
+-- -----------------------------------------------------------------------------
+
+SELECT table_name, index_name, non_unique, column_name, index_type
+FROM information_schema.statistics
+WHERE table_schema = DATABASE()
+  AND table_name IN ('altmetric', 'altmetric_fetch_log')
+ORDER BY table_name, index_name;
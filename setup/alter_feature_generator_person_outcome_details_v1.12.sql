@@ -0,0 +1,83 @@
+-- =============================================================================
+-- Migration: Feature Generator outcome details (v1.12)
+-- =============================================================================
+-- feature_generator_person_outcome (v1.11) held only what scheduling needed.
+-- update/executeFeatureGenerator.py now records each person's full outcome
+-- as the run goes (in bulk, every OUTCOME_FLUSH_SIZE results) so that:
+--   - a restarted nightly can run with --resume and skip everyone already
+--     refreshed today instead of redoing hours of ReCiter calls;
+--   - failures are visible in the database, not only in the run log.
+--
+-- WHAT'S CHANGED (feature_generator_person_outcome):
+--   + lastHttpStatus            HTTP status of the last attempt (NULL = no response)
+--   + lastBytesReceived         response size of the last attempt
+--   + lastAttempts              attempts made in the last run (5xx/network retries)
+--   + lastRetrievalFlag         ALL_PUBLICATIONS / ONLY_NEWLY_ADDED_PUBLICATIONS
+--   + lastError                 first 500 chars of the error, NULL on success
+--   + lastSuccessRetrievalFlag  retrieval flag of the last success; --resume
+--                               only treats an ALL_PUBLICATIONS day as done
+--                               for a person whose success today was one
+--
+-- Safe to run on prod and dev. Idempotent (information_schema guard per
+-- column). Run BEFORE deploying the updated executeFeatureGenerator.py.
+-- =============================================================================
+
+SET @db = DATABASE();
+
+SET @sql = (SELECT IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = @db AND table_name = 'feature_generator_person_outcome'
+       AND column_name = 'lastHttpStatus') = 0,
+    'ALTER TABLE feature_generator_person_outcome ADD COLUMN `lastHttpStatus` smallint DEFAULT NULL AFTER `lastStatus`',
+    'SELECT ''feature_generator_person_outcome.lastHttpStatus already exists'''));
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = (SELECT IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = @db AND table_name = 'feature_generator_person_outcome'
+       AND column_name = 'lastBytesReceived') = 0,
+    'ALTER TABLE feature_generator_person_outcome ADD COLUMN `lastBytesReceived` bigint DEFAULT NULL AFTER `lastLatencySeconds`',
+    'SELECT ''feature_generator_person_outcome.lastBytesReceived already exists'''));
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = (SELECT IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = @db AND table_name = 'feature_generator_person_outcome'
+       AND column_name = 'lastAttempts') = 0,
+    'ALTER TABLE feature_generator_person_outcome ADD COLUMN `lastAttempts` tinyint DEFAULT NULL AFTER `lastBytesReceived`',
+    'SELECT ''feature_generator_person_outcome.lastAttempts already exists'''));
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = (SELECT IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = @db AND table_name = 'feature_generator_person_outcome'
+       AND column_name = 'lastRetrievalFlag') = 0,
+    'ALTER TABLE feature_generator_person_outcome ADD COLUMN `lastRetrievalFlag` varchar(32) DEFAULT NULL AFTER `lastAttempts`',
+    'SELECT ''feature_generator_person_outcome.lastRetrievalFlag already exists'''));
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = (SELECT IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = @db AND table_name = 'feature_generator_person_outcome'
+       AND column_name = 'lastError') = 0,
+    'ALTER TABLE feature_generator_person_outcome ADD COLUMN `lastError` varchar(500) DEFAULT NULL AFTER `lastRetrievalFlag`',
+    'SELECT ''feature_generator_person_outcome.lastError already exists'''));
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = (SELECT IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = @db AND table_name = 'feature_generator_person_outcome'
+       AND column_name = 'lastSuccessRetrievalFlag') = 0,
+    'ALTER TABLE feature_generator_person_outcome ADD COLUMN `lastSuccessRetrievalFlag` varchar(32) DEFAULT NULL AFTER `lastSuccessAt`',
+    'SELECT ''feature_generator_person_outcome.lastSuccessRetrievalFlag already exists'''));
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- -----------------------------------------------------------------------------
+-- Verification
+-- -----------------------------------------------------------------------------
+
+SELECT column_name, column_type, is_nullable
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+  AND table_name = 'feature_generator_person_outcome'
+ORDER BY ordinal_position;
@@ -241,7 +241,7 @@ CREATE TABLE IF NOT EXISTS `altmetric` (
   `readers-mendeley` int(11) DEFAULT NULL,
   `createTimestamp` timestamp NULL DEFAULT current_timestamp(),
   PRIMARY KEY (`id`),
-  KEY `y` (`doi`) USING BTREE,
+  UNIQUE KEY `y` (`doi`) USING BTREE,
   KEY `x` (`pmid`) USING BTREE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -849,6 +849,7 @@ CREATE TABLE IF NOT EXISTS `reporting_abstracts` (
   `pmid` int(11) DEFAULT NULL,
   `abstract` blob DEFAULT NULL,
   `abstractVarchar` varchar(15000) DEFAULT NULL,
+  `abstractHash` char(40) DEFAULT NULL,
   PRIMARY KEY (`id`),
   UNIQUE KEY `idx_pmid` (`pmid`) USING BTREE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
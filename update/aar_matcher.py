@@ -38,7 +38,7 @@ Usage:
   python aar_matcher.py --surname Worgall --given Stefan --pmid 42220538 \
       --affil "Department of Pediatrics, Weill Cornell Medicine, New York, NY"
 """
-import argparse, json, os, sys
+import argparse, os, sys
 
 import pandas as pd
 
@@ -75,6 +75,26 @@ class IdentityOnlyScorer:
             self._cache[cwid] = self._compute(cwid)
         return self._cache[cwid]
 
+    def prefetch(self, cwids, workers=16, log=None):
+        """Fill the cache for many CWIDs through the batch scorer: feedback inputs
+        first, then identity-only inputs for CWIDs that have none. Same results as
+        scores() per CWID, one model invocation per batch instead of per CWID."""
+        todo = [c for c in dict.fromkeys(cwids) if c not in self._cache]
+        no_feedback = []
+        for i, (status, cwid, rows) in enumerate(det.score_users(todo, workers=workers), 1):
+            if status == "ok":
+                self._cache[cwid] = {r["pmid"]: (r["io_score"], r["final_score"]) for r in rows}
+            elif status == "missing":
+                no_feedback.append(cwid)
+            else:
+                self._cache[cwid] = {}
+            if log and i % 500 == 0:
+                log(f"      scored {i}/{len(todo)} candidate CWIDs (feedback inputs)")
+        for status, cwid, payload in det.iter_scored(no_feedback, suffix=IDENTITY_ONLY_SUFFIX,
+                                                     pipelines=("io",), workers=workers):
+            self._cache[cwid] = _identity_only_scores(payload) if status == "ok" else {}
+        return len(todo)
+
     def score(self, cwid, pmid):
         v = self.scores(cwid).get(int(pmid))       # io (ranking)
         return v[0] if v else None
@@ -92,29 +112,19 @@ class IdentityOnlyScorer:
         return {}                                  # error / empty / cold-storage
 
     def _identity_only_input(self, cwid):
-        try:
-            obj = det._s3.get_object(Bucket=det.BUCKET, Key=cwid + IDENTITY_ONLY_SUFFIX)
-            arts = json.loads(obj["Body"].read())
-        except det._s3.exceptions.NoSuchKey:
-            return {}
-        except Exception:                          # noqa: BLE001  (cold-storage etc.)
-            return {}
-        if not isinstance(arts, list) or not arts:
-            return {}
-        df = pd.DataFrame(arts)
-        pmid_key = next((k for k in det.PMID_KEYS if k in df.columns), None)
-        if pmid_key is None:
-            return {}
-        try:
-            io = det._score(df, det.IO_MODEL, det.IO_SCALER, det.IO_CALIB,
-                            det.IDENTITY_ONLY_BASE_FEATURES,
-                            det.compute_derived_features_identity_only,
-                            det.IDENTITY_ONLY_FEATURES) * 100.0
-        except Exception:                          # noqa: BLE001
-            return {}
-        pmids = pd.to_numeric(df[pmid_key], errors="coerce")
-        # feedback-less: production final == identity-only score (their pipeline)
-        return {int(p): (float(s), float(s)) for p, s in zip(pmids, io) if pd.notna(p)}
+        # missing / cold-storage / malformed / scoring error -> {}
+        status, _, payload = next(det.iter_scored(
+            [cwid], suffix=IDENTITY_ONLY_SUFFIX, pipelines=("io",), workers=1))
+        return _identity_only_scores(payload) if status == "ok" else {}
+
+
+def _identity_only_scores(payload):
+    """{pmid: (io, final)} from an iter_scored identity-only payload."""
+    df, pmid_key, cal = payload
+    io = cal["io"] * 100.0
+    pmids = pd.to_numeric(df[pmid_key], errors="coerce")
+    # feedback-less: production final == identity-only score (their pipeline)
+    return {int(p): (float(s), float(s)) for p, s in zip(pmids, io) if pd.notna(p)}
 
 
 # ---- public entry point ----------------------------------------------------
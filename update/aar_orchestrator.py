@@ -30,6 +30,8 @@ State (v1 = versioned files; git is the audit trail):
   analysis/adversarial_attribution_review/state/ledger.csv         (canonical, in place)
   analysis/adversarial_attribution_review/state/processed_log.csv  (canonical, in place)
   analysis/adversarial_attribution_review/exports/<run_date>/      (curator-facing views)
+  score_cache.json.gz (--score-cache; with --s3-state kept next to the state in S3,
+  not archived) — scored S3 inputs by ETag, so unchanged CWIDs are not re-scored
 
 Env: PUBMED_API_KEY (universe), DB_* (reciterdb gate+matcher), S3 + pinned models (ranking).
 
@@ -39,7 +41,6 @@ Usage:
   python aar_orchestrator.py --mode recurring      # monthly rolling slice
 """
 import argparse, json, os, sys
-from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
 
 import boto3
@@ -51,6 +52,7 @@ import aar_universe as uni
 import aar_gate as gate
 import aar_matcher as matcher
 import aar_db
+import adversarial_attribution_review as det
 
 REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DEFAULT_STATE = os.path.join(REPO, "analysis", "adversarial_attribution_review", "state")
@@ -65,11 +67,13 @@ _s3 = boto3.client("s3", region_name="us-east-1")
 S3_STATE_BUCKET = os.environ.get("AAR_S3_BUCKET") or os.environ.get("S3_BUCKET")
 S3_STATE_PREFIX = os.environ.get("AAR_S3_PREFIX", "aar-state")
 _STATE_FILES = ("ledger.csv", "processed_log.csv")
+# scoring cache (det.SCORE_CACHE): synced like state, but not archived per run
+SCORE_CACHE_FILE = "score_cache.json.gz"
 
 def _s3_pull_state(local_dir):
-    """Download ledger/processed_log from S3 into local_dir (missing key = first run)."""
+    """Download ledger/processed_log (+ score cache) from S3 into local_dir (missing key = first run)."""
     os.makedirs(local_dir, exist_ok=True)
-    for f in _STATE_FILES:
+    for f in _STATE_FILES + (SCORE_CACHE_FILE,):
         try:
             _s3.download_file(S3_STATE_BUCKET, f"{S3_STATE_PREFIX}/{f}",
                               os.path.join(local_dir, f))
@@ -85,6 +89,9 @@ def _s3_push_state(local_dir, run_date):
         if os.path.exists(p):
             _s3.upload_file(p, S3_STATE_BUCKET, f"{S3_STATE_PREFIX}/{f}")
             _s3.upload_file(p, S3_STATE_BUCKET, f"{S3_STATE_PREFIX}/archive/{run_date}/{f}")
+    p = os.path.join(local_dir, SCORE_CACHE_FILE)
+    if os.path.exists(p):
+        _s3.upload_file(p, S3_STATE_BUCKET, f"{S3_STATE_PREFIX}/{SCORE_CACHE_FILE}")
 
 LEDGER_COLS = [
     "pmid", "author_key", "author_position", "author_position_label", "wcm_author",
@@ -271,20 +278,9 @@ def run(date_from, date_to, state_dir, export_dir, run_date, workers=16, max_rec
     log(f"      {len(authorships)} WCM authorships; {len(cwid_pool)} distinct candidate CWIDs")
 
     # --- 4. identity-only ranking: PARALLEL pre-warm over distinct CWIDs ------
-    log(f"[4/6] Pre-warming identity-only scores ({workers} workers) ...")
-    warmed = [0]
-    pool = sorted(c for c in cwid_pool if c not in io._cache)  # skip already-warm (tiling)
-
-    def _warm(c):
-        io.scores(c)
-        warmed[0] += 1
-        if warmed[0] % 500 == 0:
-            log(f"      scored {warmed[0]}/{len(pool)} candidate CWIDs")
-
-    if pool:
-        with ThreadPoolExecutor(max_workers=workers) as ex:
-            list(ex.map(_warm, pool))
-    log(f"      identity-only cache warm: {len(pool)} CWIDs")
+    log(f"[4/6] Pre-warming identity-only scores ({workers} download workers, batched scoring) ...")
+    warmed = io.prefetch(sorted(cwid_pool), workers=workers, log=log)  # skips already-warm (tiling)
+    log(f"      identity-only cache warm: {warmed} CWIDs")
 
     # production-final gate (cache hits now; no further S3): an article already SUGGESTED
     # to a WCM person at the storage threshold sits in that curator's pending queue, so it
@@ -371,7 +367,7 @@ def run(date_from, date_to, state_dir, export_dir, run_date, workers=16, max_rec
     store.save()
     summary = _export(store, export_dir, run_date, date_from, date_to, u,
                       len(new_pmids), len(attributed), len(orphan_pmids),
-                      len(suggested_pmids), len(authorships), len(pool),
+                      len(suggested_pmids), len(authorships), warmed,
                       len(new_rows), resolved)
     log(f"[6/6] State -> {store.ledger_path}")
     log(f"      Export -> {os.path.join(export_dir, run_date)}")
@@ -556,6 +552,10 @@ def main():
     ap.add_argument("--s3-state", action="store_true",
                     help="pull/push ledger+processed_log from S3 (in-cluster CronJob); "
                          "state-dir/export-dir become ephemeral temp dirs")
+    ap.add_argument("--score-cache", default=None,
+                    help="scoring cache file; users whose S3 input is unchanged since it was "
+                         f"cached are not re-scored (default with --s3-state: {SCORE_CACHE_FILE} "
+                         "synced alongside the state)")
     args = ap.parse_args()
 
     if args.s3_state:
@@ -565,6 +565,10 @@ def main():
         args.state_dir = tempfile.mkdtemp(prefix="aar-state-")
         args.export_dir = tempfile.mkdtemp(prefix="aar-export-")
         _s3_pull_state(args.state_dir)
+        args.score_cache = args.score_cache or os.path.join(args.state_dir, SCORE_CACHE_FILE)
+    if args.score_cache:
+        print(f"Score cache: {det.load_score_cache(args.score_cache)} entries loaded "
+              f"from {args.score_cache}", flush=True)
 
     if args.mode:
         d_from, d_to = (uni._fmt(x) for x in uni.window_for_mode(args.mode))
@@ -582,6 +586,8 @@ def main():
         run(d_from, d_to, args.state_dir, args.export_dir, args.run_date,
             workers=args.workers, max_records=args.max, write_db=not args.no_db)
 
+    if args.score_cache:
+        det.save_score_cache(args.score_cache)
     if args.s3_state:
         _s3_push_state(args.state_dir, args.run_date)
 
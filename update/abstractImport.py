@@ -1,6 +1,5 @@
 # abstractImport.py
 
-import boto3
 import logging
 import pymysql.cursors
 import pymysql.err
@@ -8,8 +7,12 @@ import random
 import sys
 import time
 import os
+import queue
+import threading
 import concurrent.futures
 
+from pubmed_article import ABSTRACT_PATH, CHUNK_SIZE, abstract_hash, batch_get_articles, get_abstract
+
 # ------------------------------------------------------------------------------
 # Logging
 # ------------------------------------------------------------------------------
@@ -35,13 +38,14 @@ DB_NAME = os.getenv("DB_NAME")
 # ------------------------------------------------------------------------------
 # Settings
 # ------------------------------------------------------------------------------
-# DynamoDB fetch
-CHUNK_SIZE = 100              # Max keys per batch_get_item call (DynamoDB hard limit)
+# DynamoDB fetch (chunk size and unprocessed-key retries live in pubmed_article)
 MAX_WORKERS = 5               # Threads for parallel fetching
-MAX_UNPROCESSED_RETRIES = 8   # Backoff retries for keys DynamoDB reports as unprocessed
 
 # Insert
 INSERT_BATCH_SIZE = 200       # Rows per executemany batch (kept well under max_allowed_packet)
+ABSTRACT_VARCHAR_LENGTH = 15000  # reporting_abstracts.abstractVarchar width
+WRITE_QUEUE_CHUNKS = 2 * MAX_WORKERS  # Fetched chunks buffered ahead of the writer
+PROGRESS_LOG_INTERVAL = 100   # Log writer progress every N chunks
 
 # Loop safety
 MAX_CYCLES = 25               # Hard cap on fetch/insert cycles; a healthy run needs 1-2
@@ -94,83 +98,28 @@ def fetch_missing_pmids(mysql_conn):
         return [row["pmid"] for row in cursor.fetchall()]
 
 
-# ------------------------------------------------------------------------------
-# Extract Abstract Text
-# ------------------------------------------------------------------------------
-def get_abstract(item):
-    """
-    Extracts the abstract text from a DynamoDB item representing a PubMed
-    article. Handles labeled abstract segments. Returns "" when no abstract
-    is present.
-    """
-    medline_citation = item.get("pubmedarticle", {}).get("medlinecitation")
-    if not medline_citation:
-        return ""
-
-    article = medline_citation.get("article")
-    if not article:
-        return ""
-
-    publication_abstract = article.get("publicationAbstract")
-    if not publication_abstract:
-        return ""
-
-    abstract_texts = []
-    for abstract_part in publication_abstract.get("abstractTexts", []):
-        label = abstract_part.get("abstractTextLabel")
-        text = abstract_part.get("abstractText")
-        if text:
-            label_text = f"{label}: " if label else ""
-            abstract_texts.append(label_text + text)
-
-    return " ".join(abstract_texts) if abstract_texts else ""
-
-
 # ------------------------------------------------------------------------------
 # Fetch Abstracts from DynamoDB
 # ------------------------------------------------------------------------------
 def fetch_abstracts_for_chunk(chunk_pmids):
     """
-    Fetches one chunk of PMIDs from DynamoDB via batch_get_item. Any keys that
-    DynamoDB reports as unprocessed (throttling) are retried with exponential
-    backoff so they are not silently lost. Returns (pmid, abstract) pairs.
+    Fetches one chunk of PMIDs from DynamoDB, projecting only the abstract
+    (see pubmed_article.batch_get_articles). Returns (pmid, abstract) pairs.
     """
-    client = boto3.resource("dynamodb").meta.client
-
-    request_keys = [{"pmid": pmid} for pmid in chunk_pmids]
     results = []
-    attempt = 0
-
-    while request_keys:
-        response = client.batch_get_item(
-            RequestItems={"PubMedArticle": {"Keys": request_keys}}
-        )
-
-        for item in response["Responses"].get("PubMedArticle", []):
-            pmid = item.get("pmid")
-            if pmid is not None:
-                results.append((pmid, get_abstract(item)))
-
-        request_keys = (
-            response.get("UnprocessedKeys", {})
-            .get("PubMedArticle", {})
-            .get("Keys", [])
-        )
-        if request_keys:
-            attempt += 1
-            if attempt > MAX_UNPROCESSED_RETRIES:
-                logger.warning(
-                    f"{len(request_keys)} key(s) still unprocessed after "
-                    f"{MAX_UNPROCESSED_RETRIES} retries; skipping this chunk's remainder."
-                )
-                break
-            time.sleep(min(0.1 * (2 ** attempt), 5.0))
-
+    for item in batch_get_articles(chunk_pmids, [ABSTRACT_PATH]):
+        pmid = item.get("pmid")
+        if pmid is not None:
+            results.append((pmid, get_abstract(item)))
     return results
 
 
 def fetch_all_abstracts(pmids):
-    """Fetches abstracts for all given PMIDs from DynamoDB in parallel."""
+    """
+    Fetches abstracts for all given PMIDs from DynamoDB in parallel and
+    returns them as one list. Only used for the bounded --dry-run sample;
+    the nightly path streams through import_abstracts() instead.
+    """
     chunks = [pmids[i:i + CHUNK_SIZE] for i in range(0, len(pmids), CHUNK_SIZE)]
     logger.info(f"Created {len(chunks)} chunk(s). Each chunk up to {CHUNK_SIZE} PMIDs.")
 
@@ -196,29 +145,100 @@ def insert_abstracts(mysql_conn, results, target_table="reporting_abstracts"):
     double quotes, tabs, newlines or backslashes are stored verbatim. The
     previous CSV + LOAD DATA INFILE path could not parse such content and
     silently dropped the affected rows.
+
+    abstractVarchar is written in the same INSERT. Slicing the decoded text
+    to ABSTRACT_VARCHAR_LENGTH characters matches the CAST(abstract AS
+    CHAR(15000)) that a follow-up table-wide UPDATE used to perform.
+
+    abstractHash (see pubmed_article.abstract_hash) is computed here too, so
+    auditAbstracts.py can verify the whole table against DynamoDB by
+    comparing digests instead of pulling every abstract back out of MariaDB.
     """
     if not results:
-        logger.info("No abstracts to insert.")
         return 0
 
-    insert_sql = f"INSERT INTO {target_table} (pmid, abstract) VALUES (%s, %s)"
+    insert_sql = (
+        f"INSERT INTO {target_table} (pmid, abstract, abstractVarchar, abstractHash) "
+        f"VALUES (%s, %s, %s, %s)"
+    )
     inserted = 0
     with mysql_conn.cursor() as cursor:
         for i in range(0, len(results), INSERT_BATCH_SIZE):
-            batch = results[i:i + INSERT_BATCH_SIZE]
+            batch = [
+                (
+                    pmid,
+                    abstract,
+                    abstract[:ABSTRACT_VARCHAR_LENGTH] if abstract is not None else None,
+                    abstract_hash(abstract),
+                )
+                for pmid, abstract in results[i:i + INSERT_BATCH_SIZE]
+            ]
             cursor.executemany(insert_sql, batch)
             inserted += len(batch)
-        logger.info(f"{time.ctime()} -- Inserted {inserted} row(s) into {target_table}.")
-
-        cursor.execute(
-            f"UPDATE {target_table} "
-            f"SET abstractVarchar = CAST(abstract AS CHAR(15000)) "
-            f"WHERE abstractVarchar IS NULL"
-        )
-        logger.info(f"{time.ctime()} -- {target_table} updated with varchar equivalents.")
     return inserted
 
 
+def import_abstracts(mysql_conn, pmids, target_table="reporting_abstracts"):
+    """
+    Streams abstracts for the given PMIDs from DynamoDB into target_table.
+
+    Fetch threads hand each chunk's results to a single writer thread, which
+    owns mysql_conn, through a bounded queue. Rows are written as soon as a
+    chunk arrives and fetchers block when the writer falls behind, so memory
+    stays flat however large the backlog is. Returns the number of rows
+    inserted.
+    """
+    chunks = [pmids[i:i + CHUNK_SIZE] for i in range(0, len(pmids), CHUNK_SIZE)]
+    logger.info(f"Created {len(chunks)} chunk(s). Each chunk up to {CHUNK_SIZE} PMIDs.")
+
+    results_queue = queue.Queue(maxsize=WRITE_QUEUE_CHUNKS)
+    writer_state = {"inserted": 0, "chunks": 0, "error": None}
+
+    def writer():
+        while True:
+            results = results_queue.get()
+            if results is None:
+                return
+            # After a write error keep draining so fetchers never block on put().
+            if writer_state["error"] is not None:
+                continue
+            try:
+                writer_state["inserted"] += insert_abstracts(mysql_conn, results, target_table)
+            except Exception as e:
+                logger.exception(f"Error writing abstracts to {target_table}: {e}")
+                writer_state["error"] = e
+                continue
+            writer_state["chunks"] += 1
+            if writer_state["chunks"] % PROGRESS_LOG_INTERVAL == 0:
+                logger.info(
+                    f"Wrote {writer_state['chunks']}/{len(chunks)} chunk(s); "
+                    f"{writer_state['inserted']} row(s) inserted so far."
+                )
+
+    def fetch_and_enqueue(chunk):
+        results_queue.put(fetch_abstracts_for_chunk(chunk))
+
+    writer_thread = threading.Thread(target=writer, name="abstract-writer", daemon=True)
+    writer_thread.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(fetch_and_enqueue, c) for c in chunks]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception(f"Error fetching chunk: {e}")
+    finally:
+        results_queue.put(None)
+        writer_thread.join()
+
+    if writer_state["error"] is not None:
+        raise writer_state["error"]
+
+    logger.info(f"{time.ctime()} -- Inserted {writer_state['inserted']} row(s) into {target_table}.")
+    return writer_state["inserted"]
+
+
 # ------------------------------------------------------------------------------
 # Dry Run
 # ------------------------------------------------------------------------------
@@ -345,9 +365,7 @@ def main():
             break
         prev_missing = len(all_pmids)
 
-        all_results = fetch_all_abstracts(all_pmids)
-        logger.info(f"Fetched abstracts for {len(all_results)} PMID(s) from DynamoDB.")
-        insert_abstracts(mysql_conn, all_results)
+        import_abstracts(mysql_conn, all_pmids)
     else:
         logger.warning(
             f"Reached the {MAX_CYCLES}-cycle safety limit with abstracts still "
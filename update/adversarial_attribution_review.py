@@ -23,12 +23,13 @@ Usage:
     python adversarial_attribution_review.py --sample 1000 [--io-cutoff 90] [--seed 42]
     python adversarial_attribution_review.py --uids stw2006 meb7002   # validation mode
 """
-import argparse, io, json, os, random, sys, warnings, hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse, gzip, io, json, os, random, sys, warnings, hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 warnings.filterwarnings("ignore")
 import boto3
+import botocore
 import numpy as np
 import pandas as pd
 import joblib
@@ -52,6 +53,7 @@ BUCKET = "feedbackscoring"
 SUFFIX = "-feedbackIdentityScoringInput.json"
 SAFETY_NET_MULT = 33          # final = min(fb, io*33)
 STORAGE_THRESHOLD = 30        # reciter.minimumStorageThreshold
+SCORE_BATCH_USERS = 128       # users concatenated into one model invocation
 
 _s3 = boto3.client("s3", region_name="us-east-1")
 
@@ -76,6 +78,33 @@ def _file_sha(name):
 MODEL_HASHES = {n: _file_sha(n) for n in (
     "feedbackIdentityModel.joblib", "identityOnlyModel.joblib")}
 
+# Score-cache fingerprint: scores change if any model artifact, the feature code,
+# the name frequency table (or its absence) or this module's scoring code does.
+def _scoring_fingerprint():
+    h = hashlib.sha256()
+    for n in sorted(os.listdir(MODELS)):
+        if n.endswith(".joblib"):
+            h.update(f"{n}:{_file_sha(n)}".encode())
+    import preprocessing
+    freq_path = preprocessing._name_frequency_path()
+    for path in (preprocessing.__file__, __file__, freq_path):
+        if path is None:
+            h.update(b"name_frequency.json:missing")
+            continue
+        with open(path, "rb") as fh:
+            h.update(fh.read())
+    return h.hexdigest()[:16]
+
+SCORING_FINGERPRINT = _scoring_fingerprint()
+
+# name -> _score arguments after df
+PIPELINES = {
+    "io": (IO_MODEL, IO_SCALER, IO_CALIB, IDENTITY_ONLY_BASE_FEATURES,
+           compute_derived_features_identity_only, IDENTITY_ONLY_FEATURES),
+    "fb": (FB_MODEL, FB_SCALER, FB_CALIB, FEEDBACK_IDENTITY_BASE_FEATURES,
+           compute_derived_features_feedback_identity, FEEDBACK_IDENTITY_FEATURES),
+}
+
 # ---- scoring ---------------------------------------------------------------
 def _score(df, model, scaler, calib, base, deriver, feats):
     d = df.copy()
@@ -88,57 +117,220 @@ def _score(df, model, scaler, calib, base, deriver, feats):
     raw = model.predict_proba(X)[:, 1]
     return calib.predict(raw)
 
+def _score_batch(dfs, model, scaler, calib, base, deriver, feats):
+    """_score over many users' frames in one model invocation per column layout.
+
+    Every feature is row-wise, so stacking frames changes nothing per row — except
+    when a frame lacks an optional input column (the deriver then fills a default
+    that differs from what NaN would derive), hence one stack per column set.
+    Returns one calibrated array per input frame, in order."""
+    out = [None] * len(dfs)
+    layouts = {}
+    for i, df in enumerate(dfs):
+        layouts.setdefault(frozenset(df.columns), []).append(i)
+    for members in layouts.values():
+        stacked = pd.concat([dfs[i] for i in members], ignore_index=True)
+        cal = _score(stacked, model, scaler, calib, base, deriver, feats)
+        bounds = np.cumsum([0] + [len(dfs[i]) for i in members])
+        for j, i in enumerate(members):
+            out[i] = cal[bounds[j]:bounds[j + 1]]
+    return out
+
 PMID_KEYS = ("articleId", "id", "pmid", "pmidString")
 
-def score_user(uid):
-    """Download a user's feedback input, score both pipelines, return flagged rows.
+# ---- score cache -------------------------------------------------------------
+# Scored inputs keyed by (suffix, uid), valid for one S3 ETag and one
+# SCORING_FINGERPRINT. An unchanged input costs a conditional GET answered 304:
+# no download, parse, derive or inference. Only what the callers read back is
+# kept: the pmid column, _user_rows' pass-through columns and the calibrated
+# scores. Load/save with load_score_cache/save_score_cache (gzip JSON).
+CACHED_COLUMNS = ("userAssertion", "nameMatchFirstScore", "nameMatchLastScore",
+                  "targetAuthorInstitutionalAffiliationMatchTypeScore",
+                  "relationshipPositiveMatchScore")
+SCORE_CACHE = {}
+_cache_stats = {"hit": 0, "miss": 0}
+_cache_touched = set()   # keys hit or (re)scored since load; the rest are pruned on save
 
-    Fully defensive: never raises, so one malformed file can't abort the run."""
-    key = uid + SUFFIX
+def load_score_cache(path):
+    """Load a saved cache, dropping entries scored under another fingerprint."""
+    SCORE_CACHE.clear()
+    _cache_stats.update(hit=0, miss=0)
+    _cache_touched.clear()
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with gzip.open(path, "rt") as fh:
+            saved = json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"  score cache unreadable ({e}); starting cold", flush=True)
+        return 0
+    if saved.get("fingerprint") == SCORING_FINGERPRINT:
+        SCORE_CACHE.update(saved.get("entries", {}))
+    return len(SCORE_CACHE)
+
+def save_score_cache(path):
+    """Write the cache, dropping entries for inputs not looked up since load."""
+    for key in set(SCORE_CACHE) - _cache_touched:
+        del SCORE_CACHE[key]
+    with gzip.open(path, "wt") as fh:
+        json.dump({"fingerprint": SCORING_FINGERPRINT, "entries": SCORE_CACHE}, fh)
+    print(f"  score cache: {len(SCORE_CACHE)} entries saved "
+          f"({_cache_stats['hit']} hits, {_cache_stats['miss']} misses this run)", flush=True)
+
+def _cache_key(uid, suffix):
+    return f"{suffix}:{uid}"
+
+def _cache_put(uid, suffix, etag, df, pmid_key, cal):
+    if not etag:
+        return
+    cols = [pmid_key] + [c for c in CACHED_COLUMNS if c in df.columns and c != pmid_key]
+    _cache_touched.add(_cache_key(uid, suffix))
+    SCORE_CACHE[_cache_key(uid, suffix)] = {
+        "etag": etag, "pmid_key": pmid_key,
+        "columns": {c: df[c].tolist() for c in cols},
+        "cal": {p: [np.asarray(v).dtype.str, np.asarray(v).tolist()] for p, v in cal.items()},
+    }
+
+def _cached_payload(entry, pipelines):
+    # object dtype keeps None/NaN/int values exactly as the source frame had them
+    df = pd.DataFrame(entry["columns"], dtype=object)
+    # calibrators emit float32: restore the dtype so io*100 etc. round identically
+    return (df, entry["pmid_key"],
+            {p: np.asarray(entry["cal"][p][1], dtype=entry["cal"][p][0]) for p in pipelines})
+
+def fetch_input(uid, suffix=SUFFIX, pipelines=("io", "fb")):
+    """Download + parse one user's scoring input -> (status, uid, payload).
+
+    payload is (df, pmid_key, etag) when status == "ok"; (df, pmid_key, cal)
+    when "cached" (input unchanged since it was scored); else a list of error
+    strings. Never raises."""
+    entry = SCORE_CACHE.get(_cache_key(uid, suffix))
+    if entry is not None and not all(p in entry["cal"] for p in pipelines):
+        entry = None
     try:
-        obj = _s3.get_object(Bucket=BUCKET, Key=key)
+        if entry is not None:
+            obj = _s3.get_object(Bucket=BUCKET, Key=uid + suffix, IfNoneMatch=entry["etag"])
+        else:
+            obj = _s3.get_object(Bucket=BUCKET, Key=uid + suffix)
         articles = json.loads(obj["Body"].read())
     except _s3.exceptions.NoSuchKey:
         return ("missing", uid, [])
+    except botocore.exceptions.ClientError as e:
+        if entry is not None and e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+            _cache_touched.add(_cache_key(uid, suffix))
+            return ("cached", uid, _cached_payload(entry, pipelines))
+        return ("error", uid, [f"fetch:{e}"])
     except Exception as e:                       # noqa: BLE001
         return ("error", uid, [f"fetch:{e}"])
     try:
         if not isinstance(articles, list) or not articles:
             return ("empty", uid, [])
         df = pd.DataFrame(articles)
-        pmid_key = next((k for k in PMID_KEYS if k in df.columns), None)
-        if pmid_key is None:
-            return ("error", uid, [f"no pmid field; cols={list(df.columns)[:6]}"])
-        io_cal = _score(df, IO_MODEL, IO_SCALER, IO_CALIB,
-                        IDENTITY_ONLY_BASE_FEATURES, compute_derived_features_identity_only,
-                        IDENTITY_ONLY_FEATURES)
-        fb_cal = _score(df, FB_MODEL, FB_SCALER, FB_CALIB,
-                        FEEDBACK_IDENTITY_BASE_FEATURES, compute_derived_features_feedback_identity,
-                        FEEDBACK_IDENTITY_FEATURES)
-    except Exception as e:                        # noqa: BLE001
-        return ("error", uid, [f"score:{e}"])
+    except Exception as e:                       # noqa: BLE001
+        return ("error", uid, [f"parse:{e}"])
+    pmid_key = next((k for k in PMID_KEYS if k in df.columns), None)
+    if pmid_key is None:
+        return ("error", uid, [f"no pmid field; cols={list(df.columns)[:6]}"])
+    return ("ok", uid, (df, pmid_key, obj.get("ETag")))
+
+def _score_fetched(fetched, pipelines, suffix):
+    """Score a batch of ("ok", uid, (df, pmid_key, etag)) together and cache the
+    results. If the batch fails, re-score user by user so one malformed input
+    only errors itself."""
+    frames = [df for _, _, (df, _, _) in fetched]
+    try:
+        cals = {p: _score_batch(frames, *PIPELINES[p]) for p in pipelines}
+        per_user = [{p: cals[p][i] for p in pipelines} for i in range(len(fetched))]
+    except Exception:                             # noqa: BLE001
+        per_user = []
+        for df in frames:
+            try:
+                per_user.append({p: _score(df, *PIPELINES[p]) for p in pipelines})
+            except Exception as e:                # noqa: BLE001
+                per_user.append(e)
+    for (_, uid, (df, pmid_key, etag)), cal in zip(fetched, per_user):
+        if isinstance(cal, Exception):
+            yield ("error", uid, [f"score:{cal}"])
+        else:
+            _cache_put(uid, suffix, etag, df, pmid_key, cal)
+            yield ("ok", uid, (df, pmid_key, cal))
+
+def iter_scored(uids, suffix=SUFFIX, pipelines=("io", "fb"), workers=16,
+                batch_users=SCORE_BATCH_USERS):
+    """Download and score many users, batch_users at a time: inputs are fetched in
+    parallel (the next batch downloads while the current one is scored) and each
+    batch goes through derive -> scale -> predict -> calibrate once per pipeline.
+    Inputs whose S3 ETag matches SCORE_CACHE skip all of that.
+
+    Yields (status, uid, payload) in input order; for "ok" payload is
+    (df, pmid_key, {pipeline: calibrated array}) (df may be the cached subset of
+    columns), otherwise as fetch_input."""
+    uids = list(uids)
+    chunks = [uids[i:i + batch_users] for i in range(0, len(uids), batch_users)]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        submit = lambda chunk: [ex.submit(fetch_input, u, suffix, pipelines) for u in chunk]  # noqa: E731
+        pending = submit(chunks[0]) if chunks else []
+        for k in range(len(chunks)):
+            current = pending
+            pending = submit(chunks[k + 1]) if k + 1 < len(chunks) else []
+            fetched = [f.result() for f in current]
+            ok = [r for r in fetched if r[0] == "ok"]
+            _cache_stats["miss"] += len(ok)
+            scored = {r[1]: r for r in _score_fetched(ok, pipelines, suffix)}
+            for r in fetched:
+                if r[0] == "cached":
+                    _cache_stats["hit"] += 1
+                    yield ("ok", r[1], r[2])
+                else:
+                    yield scored[r[1]] if r[0] == "ok" else r
+
+def score_users(uids, workers=16, batch_users=SCORE_BATCH_USERS):
+    """Score many users' feedback inputs on both pipelines; yields score_user results."""
+    for status, uid, payload in iter_scored(uids, workers=workers, batch_users=batch_users):
+        if status != "ok":
+            yield (status, uid, payload)
+            continue
+        df, pmid_key, cal = payload
+        yield ("ok", uid, _user_rows(uid, df, pmid_key, cal["io"], cal["fb"]))
+
+def score_user(uid):
+    """Download a user's feedback input, score both pipelines, return flagged rows.
+
+    Fully defensive: never raises, so one malformed file can't abort the run."""
+    return next(score_users([uid], workers=1))
+
+def _user_rows(uid, df, pmid_key, io_cal, fb_cal):
     io_score = io_cal * 100.0
     final = np.minimum(fb_cal, io_cal * SAFETY_NET_MULT) * 100.0
-    df = df.assign(io_score=io_score, fb_score=fb_cal * 100.0, final_score=final)
+    fb_score = fb_cal * 100.0
+
+    # column-wise rather than iterrows(); same values as r.get(col, default) per row
+    def col(name, default):
+        return df[name].tolist() if name in df.columns else [default] * len(df)
+
     rows = []
-    for _, r in df.iterrows():
+    for pmid, assertion, io_s, fb_s, fin, nmf, nml, aff, rel in zip(
+            df[pmid_key].tolist(), col("userAssertion", None), io_score, fb_score, final,
+            col("nameMatchFirstScore", 0), col("nameMatchLastScore", 0),
+            col("targetAuthorInstitutionalAffiliationMatchTypeScore", 0),
+            col("relationshipPositiveMatchScore", 0)):
         try:
-            pmid = int(r[pmid_key])
+            pmid = int(pmid)
         except (ValueError, TypeError):
             continue
         rows.append({
             "uid": uid,
             "pmid": pmid,
-            "userAssertion": str(r.get("userAssertion")),
-            "io_score": round(float(r["io_score"]), 2),
-            "fb_score": round(float(r["fb_score"]), 2),
-            "final_score": round(float(r["final_score"]), 2),
-            "nameMatchFirst": float(r.get("nameMatchFirstScore", 0) or 0),
-            "nameMatchLast": float(r.get("nameMatchLastScore", 0) or 0),
-            "affilMatchType": float(r.get("targetAuthorInstitutionalAffiliationMatchTypeScore", 0) or 0),
-            "relPosMatch": float(r.get("relationshipPositiveMatchScore", 0) or 0),
+            "userAssertion": str(assertion),
+            "io_score": round(float(io_s), 2),
+            "fb_score": round(float(fb_s), 2),
+            "final_score": round(float(fin), 2),
+            "nameMatchFirst": float(nmf or 0),
+            "nameMatchLast": float(nml or 0),
+            "affilMatchType": float(aff or 0),
+            "relPosMatch": float(rel or 0),
         })
-    return ("ok", uid, rows)
+    return rows
 
 def is_flagged(row, io_cutoff):
     return (row["userAssertion"] == "PENDING"
@@ -165,7 +357,11 @@ def main():
     ap.add_argument("--seed", type=int, default=42)
     ap.add_argument("--workers", type=int, default=16)
     ap.add_argument("--outdir", default=None)
+    ap.add_argument("--score-cache", default=None,
+                    help="gzip JSON score cache to reuse and update (skips unchanged inputs)")
     args = ap.parse_args()
+    if args.score_cache:
+        print(f"  score cache: {load_score_cache(args.score_cache)} entries loaded", flush=True)
 
     if args.uids:
         targets = args.uids
@@ -180,17 +376,17 @@ def main():
 
     all_rows, stats = [], {"ok": 0, "missing": 0, "empty": 0, "error": 0}
     errors = []
-    with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        futs = {ex.submit(score_user, u): u for u in targets}
-        for i, fut in enumerate(as_completed(futs), 1):
-            status, uid, payload = fut.result()
-            stats[status] = stats.get(status, 0) + 1
-            if status == "ok":
-                all_rows.extend(payload)
-            elif status == "error":
-                errors.append((uid, payload))
-            if i % 100 == 0:
-                print(f"  scored {i}/{len(targets)} users ...", flush=True)
+    for i, (status, uid, payload) in enumerate(score_users(targets, workers=args.workers), 1):
+        stats[status] = stats.get(status, 0) + 1
+        if status == "ok":
+            all_rows.extend(payload)
+        elif status == "error":
+            errors.append((uid, payload))
+        if i % 100 == 0:
+            print(f"  scored {i}/{len(targets)} users ...", flush=True)
+
+    if args.score_cache:
+        save_score_cache(args.score_cache)
 
     flagged = [r for r in all_rows if is_flagged(r, args.io_cutoff)]
     users_scanned = stats["ok"]
@@ -1,57 +1,68 @@
 """
-auditAbstracts.py -- one-shot forensic audit of reporting_abstracts.
+auditAbstracts.py -- forensic audit of reporting_abstracts against DynamoDB.
 
-Pulls rows where LENGTH(abstract) >= AUDIT_LENGTH_THRESHOLD, fetches the
-DynamoDB ground truth for each PMID via the same path abstractImport.py
-uses, and classifies each row:
+Audits every row. reporting_abstracts.abstractHash (written at import time,
+see pubmed_article.abstract_hash) is streamed from MariaDB; each PMID's
+DynamoDB abstract is fetched through the same projected read abstractImport
+uses and hashed as it arrives. Rows whose digests agree are CLEAN without
+either text ever leaving its store. Only the mismatches -- plus rows with no
+stored hash yet -- have their full MariaDB text pulled and classified:
 
-  CLEAN              DB matches Dynamo (long but legitimate abstract).
+  CLEAN              DB matches Dynamo (digest match, or only trivial
+                     whitespace/quote differences).
   PREFIX_CORRUPTED   First ~150 chars of the Dynamo abstract appear near
                      the start of the DB blob and DB is substantially
                      longer than Dynamo -- the cross-paper concatenation
                      pattern produced by the old CSV / LOAD DATA path.
   DISJOINT           DB front does not match Dynamo front; needs manual
-                     review.
+                     review (also what a stale row looks like after PubMed
+                     revised the abstract).
   MISSING_IN_DYNAMO  DynamoDB has no PubMedArticle record for the PMID.
-  EMPTY_IN_DYNAMO    Record present but yields empty abstract.
+  EMPTY_IN_DYNAMO    Record present but yields empty abstract while the DB
+                     row has one (both empty is CLEAN).
 
 Outputs:
-  - audit_abstracts.csv     one row per PMID examined
+  - audit_abstracts.csv     one row per PMID whose digest did not match
   - audit_abstracts_dump.txt full text dump of the top N corrupted rows
   - per-verdict counters and worst-offender summary to stdout
 
-Read-only. Does not modify reporting_abstracts.
+Read-only, except with --backfill-hashes, which fills abstractHash for rows
+imported before setup/alter_add_abstract_hash_reporting_abstracts_v1.10.sql
+and touches no other column.
 
 Env:
   DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME
   AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_DEFAULT_REGION
-  AUDIT_LENGTH_THRESHOLD (default 4000)
-  AUDIT_MAX_CANDIDATES   (default 1000)
 """
 
+import argparse
 import concurrent.futures
 import csv
 import logging
 import os
 import sys
-import time
 
-import boto3
 import pymysql.cursors
 import pymysql.err
 
+from pubmed_article import (
+    ABSTRACT_PATH,
+    CHUNK_SIZE,
+    abstract_hash,
+    batch_get_articles,
+    get_abstract,
+)
+
 
 DB_USERNAME = os.getenv("DB_USERNAME")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 
-LENGTH_THRESHOLD = int(os.getenv("AUDIT_LENGTH_THRESHOLD", "4000"))
-MAX_CANDIDATES = int(os.getenv("AUDIT_MAX_CANDIDATES", "1000"))
-
-CHUNK_SIZE = 100
 MAX_WORKERS = 5
-MAX_UNPROCESSED_RETRIES = 8
+DB_TEXT_BATCH = 500           # PMIDs per full-text SELECT for mismatched rows
+BACKFILL_BATCH = 1000         # Rows per --backfill-hashes round trip
+PROGRESS_LOG_INTERVAL = 500   # Log DynamoDB progress every N chunks
 
 OUTPUT_CSV = "audit_abstracts.csv"
 DUMP_FILE = "audit_abstracts_dump.txt"
@@ -99,95 +110,126 @@ def connect_mysql():
         sys.exit(1)
 
 
-def fetch_candidates(conn, threshold, max_rows):
-    sql = """
-        SELECT pmid, LENGTH(abstract) AS db_len, abstract
-        FROM reporting_abstracts
-        WHERE LENGTH(abstract) >= %s
-        ORDER BY LENGTH(abstract) DESC
-        LIMIT %s
+def decode_abstract(abstract):
+    if isinstance(abstract, (bytes, bytearray)):
+        abstract = abstract.decode("utf-8", errors="replace")
+    return (abstract or "").replace("\r\n", "\n")
+
+
+def fetch_db_hashes(conn):
+    """
+    Returns {pmid: abstractHash} for every row in reporting_abstracts (None
+    where the hash has not been backfilled). Streamed with an unbuffered
+    cursor; the abstract BLOBs themselves are never read.
     """
+    hashes = {}
+    with conn.cursor(pymysql.cursors.SSCursor) as cur:
+        cur.execute(
+            "SELECT pmid, abstractHash FROM reporting_abstracts WHERE pmid IS NOT NULL"
+        )
+        for pmid, digest in cur:
+            hashes[pmid] = digest
+    return hashes
+
+
+def fetch_db_abstracts(conn, pmids):
+    """Full MariaDB text for the given PMIDs, as {pmid: abstract}."""
+    abstracts = {}
     with conn.cursor() as cur:
-        cur.execute(sql, (threshold, max_rows))
-        rows = cur.fetchall()
-    for r in rows:
-        if isinstance(r["abstract"], (bytes, bytearray)):
-            r["abstract"] = r["abstract"].decode("utf-8", errors="replace")
-        r["abstract"] = r["abstract"].replace("\r\n", "\n")
-    return rows
-
-
-def get_abstract(item):
-    """Same extraction logic as update/abstractImport.py:99."""
-    medline_citation = item.get("pubmedarticle", {}).get("medlinecitation")
-    if not medline_citation:
-        return ""
-    article = medline_citation.get("article")
-    if not article:
-        return ""
-    publication_abstract = article.get("publicationAbstract")
-    if not publication_abstract:
-        return ""
-    abstract_texts = []
-    for abstract_part in publication_abstract.get("abstractTexts", []):
-        label = abstract_part.get("abstractTextLabel")
-        text = abstract_part.get("abstractText")
-        if text:
-            label_text = f"{label}: " if label else ""
-            abstract_texts.append(label_text + text)
-    return " ".join(abstract_texts) if abstract_texts else ""
-
-
-def fetch_abstracts_from_dynamo(pmids):
-    client = boto3.resource("dynamodb").meta.client
-
-    def fetch_chunk(chunk):
-        request_keys = [{"pmid": p} for p in chunk]
-        results = {}
-        present = set()
-        attempt = 0
-        while request_keys:
-            response = client.batch_get_item(
-                RequestItems={"PubMedArticle": {"Keys": request_keys}}
-            )
-            for item in response["Responses"].get("PubMedArticle", []):
-                pmid = item.get("pmid")
-                if pmid is not None:
-                    present.add(pmid)
-                    results[pmid] = get_abstract(item)
-            request_keys = (
-                response.get("UnprocessedKeys", {})
-                .get("PubMedArticle", {})
-                .get("Keys", [])
+        for i in range(0, len(pmids), DB_TEXT_BATCH):
+            chunk = pmids[i:i + DB_TEXT_BATCH]
+            placeholders = ",".join(["%s"] * len(chunk))
+            cur.execute(
+                f"SELECT pmid, abstract FROM reporting_abstracts "
+                f"WHERE pmid IN ({placeholders})",
+                chunk,
             )
-            if request_keys:
-                attempt += 1
-                if attempt > MAX_UNPROCESSED_RETRIES:
-                    logger.warning(
-                        f"{len(request_keys)} keys still unprocessed after "
-                        f"{MAX_UNPROCESSED_RETRIES} retries; skipping remainder."
-                    )
-                    break
-                time.sleep(min(0.1 * (2 ** attempt), 5.0))
-        return results, present
+            for r in cur.fetchall():
+                abstracts[r["pmid"]] = decode_abstract(r["abstract"])
+    return abstracts
 
+
+def compare_with_dynamo(db_hashes):
+    """
+    Reads every PMID's abstract from DynamoDB and compares its digest with
+    the stored one. Only mismatches are kept in memory.
+
+    Returns (matched, mismatches) where matched is the number of PMIDs whose
+    digests agree and mismatches is {pmid: (dyn_present, dyn_abstract)}.
+    """
+    def compare_chunk(chunk):
+        dyn = {}
+        for item in batch_get_articles(chunk, [ABSTRACT_PATH]):
+            pmid = item.get("pmid")
+            if pmid is not None:
+                dyn[pmid] = get_abstract(item)
+        matched = 0
+        mismatches = {}
+        for pmid in chunk:
+            if pmid not in dyn:
+                mismatches[pmid] = (False, "")
+            elif db_hashes[pmid] == abstract_hash(dyn[pmid] or ""):
+                matched += 1
+            else:
+                mismatches[pmid] = (True, dyn[pmid])
+        return matched, mismatches
+
+    pmids = sorted(db_hashes)
     chunks = [pmids[i:i + CHUNK_SIZE] for i in range(0, len(pmids), CHUNK_SIZE)]
-    all_results = {}
-    found = set()
+    matched = 0
+    mismatches = {}
     with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-        futures = [ex.submit(fetch_chunk, c) for c in chunks]
-        for f in concurrent.futures.as_completed(futures):
-            res, present = f.result()
-            all_results.update(res)
-            found.update(present)
-    return all_results, found
+        futures = [ex.submit(compare_chunk, c) for c in chunks]
+        for done, f in enumerate(concurrent.futures.as_completed(futures), 1):
+            chunk_matched, chunk_mismatches = f.result()
+            matched += chunk_matched
+            mismatches.update(chunk_mismatches)
+            if done % PROGRESS_LOG_INTERVAL == 0:
+                logger.info(
+                    f"  ... compared {done}/{len(chunks)} chunks; "
+                    f"{matched:,} matched, {len(mismatches):,} mismatched"
+                )
+    return matched, mismatches
+
+
+def backfill_hashes(conn):
+    """
+    Computes abstractHash for rows that predate the column, walking the table
+    in pmid order so each round trip is an index range scan. Returns the
+    number of rows updated.
+    """
+    updated = 0
+    last_pmid = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute(
+                "SELECT pmid, abstract FROM reporting_abstracts "
+                "WHERE abstractHash IS NULL AND pmid > %s "
+                "ORDER BY pmid LIMIT %s",
+                (last_pmid, BACKFILL_BATCH),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return updated
+            last_pmid = rows[-1]["pmid"]
+            batch = [
+                (abstract_hash(r["abstract"]), r["pmid"])
+                for r in rows if r["abstract"] is not None
+            ]
+            cur.executemany(
+                "UPDATE reporting_abstracts SET abstractHash = %s WHERE pmid = %s",
+                batch,
+            )
+            updated += len(batch)
+            logger.info(f"  ... backfilled {updated:,} hashes (pmid <= {last_pmid})")
 
 
 def classify(db_abs, dyn_abs, dyn_present):
     if not dyn_present:
         return "MISSING_IN_DYNAMO"
     if not dyn_abs:
-        return "EMPTY_IN_DYNAMO"
+        # Articles without an abstract are stored as "" on both sides.
+        return "EMPTY_IN_DYNAMO" if db_abs.strip() else "CLEAN"
 
     db_norm = db_abs.strip()
     dyn_norm = dyn_abs.strip()
@@ -219,52 +261,56 @@ def safe_oneline(s, n):
 
 
 def main():
-    logger.info(
-        f"Audit: LENGTH(abstract) >= {LENGTH_THRESHOLD}; "
-        f"max candidates: {MAX_CANDIDATES}"
-    )
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backfill-hashes", action="store_true",
+                        help="Fill reporting_abstracts.abstractHash where NULL, then exit.")
+    args = parser.parse_args()
+
     conn = connect_mysql()
     try:
-        candidates = fetch_candidates(conn, LENGTH_THRESHOLD, MAX_CANDIDATES)
+        if args.backfill_hashes:
+            logger.info("Backfilling reporting_abstracts.abstractHash ...")
+            updated = backfill_hashes(conn)
+            logger.info(f"Backfilled {updated:,} row(s).")
+            return
+
+        db_hashes = fetch_db_hashes(conn)
+        unhashed = sum(1 for h in db_hashes.values() if h is None)
+        logger.info(f"Rows in reporting_abstracts: {len(db_hashes):,}")
+        if not db_hashes:
+            logger.info("Nothing to audit; exiting.")
+            return
+        if unhashed:
+            logger.warning(
+                f"{unhashed:,} row(s) have no abstractHash and will be compared "
+                "in full; run with --backfill-hashes to make later audits cheap."
+            )
+
+        matched, mismatches = compare_with_dynamo(db_hashes)
+        logger.info(
+            f"Digests matched for {matched:,} / {len(db_hashes):,} PMIDs; "
+            f"fetching full text for {len(mismatches):,} mismatch(es)."
+        )
+        db_abstracts = fetch_db_abstracts(conn, sorted(mismatches))
     finally:
         conn.close()
 
-    logger.info(f"Candidates from reporting_abstracts: {len(candidates)}")
-    if not candidates:
-        logger.info("Nothing above threshold; exiting.")
-        return
-
-    lens = sorted(c["db_len"] for c in candidates)
-    logger.info(
-        f"DB length distribution: min={lens[0]} "
-        f"p50={lens[len(lens) // 2]} p95={lens[int(len(lens) * 0.95)]} "
-        f"max={lens[-1]}"
-    )
-
-    pmids = [c["pmid"] for c in candidates]
-    dyn_abstracts, dyn_present = fetch_abstracts_from_dynamo(pmids)
-    logger.info(
-        f"DynamoDB returned records for {len(dyn_present)} / {len(pmids)} PMIDs"
-    )
-
     rows = []
     counters = {
-        "CLEAN": 0,
+        "CLEAN": matched,
         "PREFIX_CORRUPTED": 0,
         "DISJOINT": 0,
         "MISSING_IN_DYNAMO": 0,
         "EMPTY_IN_DYNAMO": 0,
     }
-    for c in candidates:
-        pmid = c["pmid"]
-        db_abs = c["abstract"]
-        present = pmid in dyn_present
-        dyn_abs = dyn_abstracts.get(pmid, "")
+    for pmid in sorted(mismatches):
+        present, dyn_abs = mismatches[pmid]
+        db_abs = db_abstracts.get(pmid, "")
         verdict = classify(db_abs, dyn_abs, present)
         counters[verdict] += 1
         rows.append({
             "pmid": pmid,
-            "db_len": c["db_len"],
+            "db_len": len(db_abs),
             "dyn_len": len(dyn_abs) if present else "",
             "verdict": verdict,
             "db_head": safe_oneline(db_abs, 80),
@@ -273,10 +319,12 @@ def main():
         })
 
     with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer = csv.DictWriter(f, fieldnames=[
+            "pmid", "db_len", "dyn_len", "verdict", "db_head", "db_tail", "dyn_head",
+        ])
         writer.writeheader()
         writer.writerows(rows)
-    logger.info(f"Per-row audit written to {OUTPUT_CSV}")
+    logger.info(f"Per-row audit of {len(rows):,} mismatch(es) written to {OUTPUT_CSV}")
 
     logger.info("Verdict counts:")
     for k in ("CLEAN", "PREFIX_CORRUPTED", "DISJOINT",
@@ -290,8 +338,8 @@ def main():
         with open(DUMP_FILE, "w", encoding="utf-8") as f:
             for r in suspect[:DUMP_TOP_N]:
                 pmid = r["pmid"]
-                db_abs = next(c["abstract"] for c in candidates if c["pmid"] == pmid)
-                dyn_abs = dyn_abstracts.get(pmid, "")
+                db_abs = db_abstracts.get(pmid, "")
+                dyn_abs = mismatches[pmid][1]
                 f.write("=" * 80 + "\n")
                 f.write(
                     f"pmid={pmid} verdict={r['verdict']} "
@@ -1,164 +1,183 @@
-import boto3
-import csv
+# conflictsImport.py
+
 import logging
 import pymysql.cursors
 import pymysql.err
 import sys
 import time
-import os  # Import the os module
-
-# Delete the existing conflicts.csv file if it exists
-if os.path.exists('conflicts.csv'):
-    os.remove('conflicts.csv')
-
-# Configure logging to output to stdout
-logging.basicConfig(stream=sys.stdout, level=logging.INFO, format='%(asctime)s - %(message)s')
-
-DB_USERNAME = os.getenv('DB_USERNAME')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-DB_HOST = os.getenv('DB_HOST')
-DB_NAME = os.getenv('DB_NAME')
-
-def connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME):
-    """Function to connect to MySQL database"""
+import os
+import concurrent.futures
+
+from pubmed_article import COI_STATEMENT_PATH, CHUNK_SIZE, batch_get_articles, get_coi_statement
+
+# ------------------------------------------------------------------------------
+# Logging
+# ------------------------------------------------------------------------------
+logging.basicConfig(
+    stream=sys.stdout,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Quiet botocore's per-call credential/endpoint chatter so pipeline logs stay readable.
+logging.getLogger("botocore").setLevel(logging.WARNING)
+logging.getLogger("boto3").setLevel(logging.WARNING)
+
+# ------------------------------------------------------------------------------
+# Environment Variables
+# ------------------------------------------------------------------------------
+DB_USERNAME = os.getenv("DB_USERNAME")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_NAME = os.getenv("DB_NAME")
+
+# ------------------------------------------------------------------------------
+# Settings
+# ------------------------------------------------------------------------------
+# Scope
+MIN_ARTICLE_YEAR = 2017       # COI statements are only imported for recent articles
+
+# DynamoDB fetch (chunk size and unprocessed-key retries live in pubmed_article)
+MAX_WORKERS = 5               # Threads for parallel fetching
+
+# Insert
+INSERT_BATCH_SIZE = 200       # Rows per executemany batch (kept well under max_allowed_packet)
+CONFLICTS_VARCHAR_LENGTH = 15000  # reporting_conflicts.conflictsVarchar width
+
+
+# ------------------------------------------------------------------------------
+# Database Connection
+# ------------------------------------------------------------------------------
+def connect_mysql_server(db_user, db_pass, db_host, db_name):
+    """Connect to the MariaDB database."""
     try:
-        mysql_db = pymysql.connect(user=DB_USERNAME,
-                                   password=DB_PASSWORD,
-                                   database=DB_NAME,
-                                   host=DB_HOST,
-                                   autocommit=True,
-                                   local_infile=True,
-                                   cursorclass=pymysql.cursors.DictCursor)  # Use DictCursor to fetch results as dictionaries
-        logging.info(f"Connected to database server: {DB_HOST}, database: {DB_NAME}, with user: {DB_USERNAME}")
+        mysql_db = pymysql.connect(
+            user=db_user,
+            password=db_pass,
+            database=db_name,
+            host=db_host,
+            autocommit=True,
+            charset="utf8mb4",
+            cursorclass=pymysql.cursors.DictCursor
+        )
+        logger.info(f"Connected to database server: {db_host}, database: {db_name}, user: {db_user}")
         return mysql_db
     except pymysql.err.MySQLError as err:
-        logging.error(f"{time.ctime()} -- Error connecting to the database: {err}")
-
-# Connect to MySQL
-mysql_conn = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
-
-# Query for PMIDs
-with mysql_conn.cursor() as mysql_cursor:
-    mysql_cursor.execute('''
-        SELECT distinct p.pmid AS pmid
-        FROM analysis_summary_article p
-        LEFT JOIN reporting_conflicts a ON a.pmid = p.pmid
-        WHERE a.pmid is null
-        and articleYear >= 2017
-        and p.pmid > 0
-        LIMIT 90
-    ''')
-    results = mysql_cursor.fetchall()
-    pmids = [result['pmid'] for result in results]  # Use dictionary key to access pmid
-
-
-
-# Connect to DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('PubMedArticle')
-
-# Use client for batch get 
-client = dynamodb.meta.client
-keys = [{'pmid': pmid} for pmid in pmids]
-
-# Check if keys is empty before making the call
-if not keys:
-    logging.warning("No PMIDs found to fetch from DynamoDB.")
-    exit()
-else:
-    response = client.batch_get_item(RequestItems={
-      'PubMedArticle': {
-          'Keys': keys
-      }
-    })
-    items = response['Responses']['PubMedArticle']
-
-
-response = client.batch_get_item(RequestItems={
-  'PubMedArticle': {
-      'Keys': keys
-  }
-})
-
-items = response['Responses']['PubMedArticle']
-
-
-def get_conflicts(item):
-    medline_citation = item.get('pubmedarticle', {}).get('medlinecitation')
-    if medline_citation:
-        return medline_citation.get('coiStatement', "")
-    return ""
-
-
-
-# Initial CSV setup
-with open('conflicts.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f, delimiter='\t')  # specify tab delimiter here
-    writer.writerow(['pmid', 'conflictStatement'])
-
-offset = 0 
-limit = 90
-
-while True:
-    logging.info(f'Processing offset: {offset}')  # Log the current offset
-
-    mysql_cursor = mysql_conn.cursor()
-    mysql_cursor.execute('''
-        SELECT distinct p.pmid AS pmid
+        logger.error(f"{time.ctime()} -- Error connecting to the database: {err}")
+        sys.exit(1)
+
+
+# ------------------------------------------------------------------------------
+# Fetch All Missing PMIDs
+# ------------------------------------------------------------------------------
+def fetch_missing_pmids(mysql_conn):
+    """
+    Returns every PMID from MIN_ARTICLE_YEAR onward that exists in
+    analysis_summary_article but has no matching row in reporting_conflicts.
+
+    One anti-join replaces the old LIMIT 90 OFFSET n loop, whose cost grew
+    with every page (and which skipped rows, since each page's inserts
+    shifted the offset of the remaining ones).
+    """
+    sql = """
+        SELECT DISTINCT p.pmid AS pmid
         FROM analysis_summary_article p
         LEFT JOIN reporting_conflicts a ON a.pmid = p.pmid
-        WHERE a.pmid is null
-        and articleYear >= 2017
-        and p.pmid > 0
-        LIMIT %s OFFSET %s
-    ''', (limit, offset))
-
-    results = mysql_cursor.fetchall()
-
+        WHERE a.pmid IS NULL
+          AND p.articleYear >= %s
+          AND p.pmid > 0
+    """
+    with mysql_conn.cursor() as cursor:
+        cursor.execute(sql, (MIN_ARTICLE_YEAR,))
+        return [row["pmid"] for row in cursor.fetchall()]
+
+
+# ------------------------------------------------------------------------------
+# Fetch COI Statements from DynamoDB
+# ------------------------------------------------------------------------------
+def fetch_conflicts_for_chunk(chunk_pmids):
+    """
+    Fetches one chunk of PMIDs from DynamoDB, projecting only the COI
+    statement (see pubmed_article.batch_get_articles). Returns
+    (pmid, coiStatement) pairs.
+    """
+    results = []
+    for item in batch_get_articles(chunk_pmids, [COI_STATEMENT_PATH]):
+        pmid = item.get("pmid")
+        if pmid is not None:
+            results.append((pmid, get_coi_statement(item)))
+    return results
+
+
+# ------------------------------------------------------------------------------
+# Insert COI Statements
+# ------------------------------------------------------------------------------
+def insert_conflicts(mysql_conn, results):
+    """
+    Inserts (pmid, coiStatement) pairs with a parameterized, batched INSERT,
+    writing conflictsVarchar in the same statement. Parameter binding stores
+    statements containing quotes, tabs, newlines or backslashes verbatim,
+    which the old conflicts.csv + LOAD DATA path could not.
+    """
     if not results:
-        logging.info('No more results, breaking out of loop')  # Log the end condition
-        break
-
-    pmids = [result['pmid'] for result in results]
-
-    logging.info(f'Fetching data for {len(pmids)} PMIDs from DynamoDB')  # Log the number of PMIDs
-
-    keys = [{'pmid': pmid} for pmid in pmids]
-    response = client.batch_get_item(RequestItems={'PubMedArticle': {'Keys': keys}})
-    items = response['Responses']['PubMedArticle']
+        return 0
 
-    for item in items:
-        conflictStatement = get_conflicts(item)
-        with open('conflicts.csv', 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, delimiter='\t')  # specify tab delimiter here
-            writer.writerow([item['pmid'], conflictStatement])
-
-    offset += limit
-
-
-def load_conflicts(mysql_cursor):
-    cwd = os.getcwd()
-    load_conflicts_query = (
-        "LOAD DATA LOCAL INFILE '" + cwd + "/conflicts.csv' INTO TABLE reporting_conflicts FIELDS TERMINATED BY '\t' ENCLOSED BY '\"' LINES TERMINATED BY '\r\n' IGNORE 1 LINES (pmid,conflictStatement);"
-    )
-    mysql_cursor.execute(load_conflicts_query)
-    print(time.ctime() + "--" + " conflicts.csv file loaded")
-
-    update_query = (
-      "UPDATE reporting_conflicts SET conflictsVarchar = CAST(conflictStatement AS CHAR(15000)) where conflictsVarchar is null;"
+    insert_sql = (
+        "INSERT INTO reporting_conflicts (pmid, conflictStatement, conflictsVarchar) "
+        "VALUES (%s, %s, %s)"
     )
-    
-    mysql_cursor.execute(update_query)
-    print(time.ctime() + " reporting_conflicts table updated with varchar equivalent")  
-
-
-if __name__ == '__main__':
-
-    # Create a MySQL connection to the Reciter database
-    reciter_db = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
-    with reciter_db.cursor() as reciter_db_cursor:
-        load_conflicts(reciter_db_cursor)
-
-    # Close DB connection
-    reciter_db.close()
-
+    inserted = 0
+    with mysql_conn.cursor() as cursor:
+        for i in range(0, len(results), INSERT_BATCH_SIZE):
+            batch = [
+                (pmid, statement, statement[:CONFLICTS_VARCHAR_LENGTH])
+                for pmid, statement in results[i:i + INSERT_BATCH_SIZE]
+            ]
+            cursor.executemany(insert_sql, batch)
+            inserted += len(batch)
+    return inserted
+
+
+def import_conflicts(mysql_conn, pmids):
+    """
+    Fetches COI statements for the given PMIDs in parallel and inserts each
+    chunk as soon as it completes. Returns the number of rows inserted.
+    """
+    chunks = [pmids[i:i + CHUNK_SIZE] for i in range(0, len(pmids), CHUNK_SIZE)]
+    logger.info(f"Created {len(chunks)} chunk(s). Each chunk up to {CHUNK_SIZE} PMIDs.")
+
+    inserted = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(fetch_conflicts_for_chunk, c) for c in chunks]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.exception(f"Error fetching chunk: {e}")
+                continue
+            inserted += insert_conflicts(mysql_conn, results)
+
+    logger.info(f"{time.ctime()} -- Inserted {inserted} row(s) into reporting_conflicts.")
+    return inserted
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+def main():
+    mysql_conn = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
+
+    pmids = fetch_missing_pmids(mysql_conn)
+    if not pmids:
+        logger.info("No missing COI statements. We are done.")
+    else:
+        logger.info(f"Found {len(pmids)} PMID(s) needing COI statements.")
+        import_conflicts(mysql_conn, pmids)
+
+    mysql_conn.close()
+    logger.info("Conflicts import complete.")
+
+
+if __name__ == "__main__":
+    main()
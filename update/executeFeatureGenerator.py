@@ -1,5 +1,7 @@
 # executeFeatureGenerator.py
 
+import argparse
+import asyncio
 import json
 import os
 import time
@@ -10,11 +12,13 @@ import psutil
 import boto3			 
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-from threading import Lock, Thread
+from threading import Thread
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import sys
 
+import pipeline_metrics
+
 
 ## This script is a lightweight way for using person ID's from ReCiterDB to run Feature Generator (which suggests new 
 ## publications). This way you don't have to bother your developer if you want to add some new people.
@@ -31,8 +35,44 @@ import sys
 # ------------------------------
 # Configuration
 # ------------------------------
-MAX_WORKERS = 10                 # Safe level of concurrency per pod
-REQUESTS_PER_SECOND = 3          # Global rate limit
+# Concurrency is adaptive (see AIMDLimiter): each retrieval mode starts at its
+# initial limit, grows while ReCiter answers within the target latency, and
+# halves on a 5xx, a network error or a response slower than the target.
+# ALL_PUBLICATIONS requests re-retrieve every candidate article and routinely
+# take minutes, so they get their own, more conservative limits.
+CONCURRENCY = {
+    "ALL_PUBLICATIONS": {
+        "initial": 4,
+        "maximum": int(os.getenv("FEATURE_GENERATOR_ALL_MAX_CONCURRENCY", "12")),
+        "target_latency": 150,   # seconds
+    },
+    "ONLY_NEWLY_ADDED_PUBLICATIONS": {
+        "initial": 8,
+        "maximum": int(os.getenv("FEATURE_GENERATOR_NEW_MAX_CONCURRENCY", "32")),
+        "target_latency": 30,    # seconds
+    },
+}
+MIN_CONCURRENCY = 1
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_DECREASE_COOLDOWN = 30      # seconds; one backoff per burst of failures
+MAX_ATTEMPTS = 3                 # per person; only 5xx and network errors are retried
+RETRY_BACKOFF = 10               # seconds, multiplied by the attempt number
+REQUEST_TIMEOUT = (10, 180)      # (connect, read) seconds
+
+# Scheduling (see plan_schedule). Persons are dispatched most-overdue first
+# and, within an overdue tier, longest expected run first, so prolific people
+# don't form a tail at the end of the pool. Nothing new is dispatched once the
+# time budget is spent; 0 disables the budget. The default leaves headroom
+# under run_all.py's SCRIPT_TIMEOUT_SECONDS.
+TIME_BUDGET_SECONDS = int(os.getenv("FEATURE_GENERATOR_TIME_BUDGET_SECONDS", "14400"))
+MAX_OVERDUE_TIER = 3             # missed runs beyond this rank the same
+DEFAULT_COST_SECONDS = 10        # expected latency for a person with no history...
+SECONDS_PER_ARTICLE = 0.05       # ...plus this much per suggested article
+LATENCY_EWMA_WEIGHT = 0.3        # weight of the newest latency in avgLatencySeconds
+
+# Outcomes (see OutcomeRecorder)
+OUTCOME_FLUSH_SIZE = 50          # results buffered before a bulk upsert
+FAILURE_RETRY_PASSES = 1         # end-of-run passes over persons that failed
 
 # Metrics settings
 METRIC_INTERVAL = 10  # seconds between CPU/mem reports
@@ -40,15 +80,6 @@ METRIC_INTERVAL = 10  # seconds between CPU/mem reports
 # AWS clients
 #s3_client = boto3.client("s3")
 
-
-# Rate limiter state
-_last_request_time = 0
-_rate_lock = Lock()
-
-
-# Database and API credentials from environment variables
-import concurrent.futures  # <--- for concurrency
-
 # ------------------------------------------------------------------------------
 #  ENVIRONMENT VARIABLES
 # ------------------------------------------------------------------------------
@@ -117,21 +148,50 @@ def start_metrics_collector():
 
 
 # ------------------------------
-# Rate Limiter
+# Adaptive Concurrency Limiter
 # ------------------------------
-def rate_limited():
-    """Ensures only REQUESTS_PER_SECOND outbound API calls."""
-    global _last_request_time
-    with _rate_lock:
-        gap = 1 / REQUESTS_PER_SECOND
-        now = time.time()
-        elapsed = now - _last_request_time
-
-        if elapsed < gap:
-            time.sleep(gap - elapsed)
-
-        _last_request_time = time.time()
-		
+class AIMDLimiter:
+    """
+    Caps in-flight ReCiter requests at a limit that adapts to how ReCiter is
+    coping: additive increase (about +1 per limit's worth of healthy, fast
+    responses) and multiplicative decrease on a 5xx, network error or slow
+    response, at most once per AIMD_DECREASE_COOLDOWN so a burst of failures
+    from one overload only halves the limit once.
+    """
+
+    def __init__(self, name, initial, maximum, target_latency):
+        self.name = name
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency=None, healthy=True):
+        """Frees a slot; latency=None means the slot went unused (no feedback)."""
+        async with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if latency is None:
+                pass
+            elif healthy and latency <= self.target_latency:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif now - self._last_decrease >= AIMD_DECREASE_COOLDOWN:
+                self.limit = max(MIN_CONCURRENCY, self.limit * AIMD_DECREASE_FACTOR)
+                self._last_decrease = now
+                logger.warning(
+                    f"[{self.name}] Backing off to {int(self.limit)} concurrent "
+                    f"request(s) (healthy={healthy}, latency={latency:.1f}s)"
+                )
+            self._cond.notify_all()
+
+
 # ------------------------------
 # Connect to MySQL
 # ------------------------------
@@ -151,35 +211,123 @@ def connect_mysql_server(username, db_password, db_hostname, database_name):
         logger.error(f"{time.ctime()} -- Error connecting to the database: {err}")
 
 # ------------------------------------------------------------------------------
-#  FETCH PERSON IDENTIFIERS
+#  FETCH PERSONS
 # ------------------------------------------------------------------------------
-def get_person_identifier(mysql_cursor):
+def get_persons(mysql_db):
     """
-    Get personIdentifiers from MySQL database based on frequency rules:
+    Get the persons due today from MySQL database based on frequency rules:
       - daily
       - weekly (only on Sunday)
       - monthly (only on day 7)
+    along with what scheduling needs: the shortest interval the person is
+    listed under, their last successful run, its retrieval flag and their
+    average latency (from feature_generator_person_outcome) and their
+    suggested-article count.
+
+    Before the outcome-table migrations are applied, persons are returned
+    without history (scheduled by article count). Any other error is
+    raised: an empty list would make the stage succeed having done nothing.
     """
+    if outcome_history_available(mysql_db):
+        outcome_columns = """
+            MAX(o.lastSuccessAt) AS lastSuccessAt,
+            MAX(o.avgLatencySeconds) AS avgLatencySeconds,
+            MAX(o.lastSuccessRetrievalFlag) AS lastSuccessRetrievalFlag,"""
+        outcome_join = f"""
+        LEFT JOIN {DB_NAME}.feature_generator_person_outcome o
+            ON o.personIdentifier = e.personIdentifier"""
+    else:
+        logger.warning(
+            "feature_generator_person_outcome is missing or predates v1.12; scheduling without "
+            "outcome history (apply the v1.11/v1.12 migrations)."
+        )
+        outcome_columns = """
+            NULL AS lastSuccessAt,
+            NULL AS avgLatencySeconds,
+            NULL AS lastSuccessRetrievalFlag,"""
+        outcome_join = ""
     get_metadata_query = f"""
-        SELECT DISTINCT personIdentifier
-        FROM {DB_NAME}.reporting_ad_hoc_feature_generator_execution
+        SELECT
+            e.personIdentifier,
+            MIN(CASE e.frequency WHEN 'daily' THEN 1 WHEN 'weekly' THEN 7 ELSE 30 END) AS intervalDays,{outcome_columns}
+            MAX(p.countSuggestedArticles) AS articleCount
+        FROM {DB_NAME}.reporting_ad_hoc_feature_generator_execution e{outcome_join}
+        LEFT JOIN {DB_NAME}.person p
+            ON p.personIdentifier = e.personIdentifier
         WHERE 
-            (frequency = 'daily')
-            OR (frequency = 'weekly' AND DAYOFWEEK(CURRENT_DATE()) = 7)
-            OR (frequency = 'monthly' AND DAY(CURRENT_DATE()) = 7);
+            (e.frequency = 'daily')
+            OR (e.frequency = 'weekly' AND DAYOFWEEK(CURRENT_DATE()) = 7)
+            OR (e.frequency = 'monthly' AND DAY(CURRENT_DATE()) = 7)
+        GROUP BY e.personIdentifier;
     """
-    try:
+    with mysql_db.cursor(pymysql.cursors.DictCursor) as mysql_cursor:
         mysql_cursor.execute(get_metadata_query)
-        person_identifiers = [rec[0] for rec in mysql_cursor]
-        return person_identifiers
-    except Exception as e:
-        logger.exception(f"An error occurred while fetching person identifiers: {e}")
-        return []
+        return list(mysql_cursor.fetchall())
+
+
+def outcome_history_available(mysql_db):
+    """True once feature_generator_person_outcome exists with the v1.12
+    columns (lastSuccessRetrievalFlag is the last one get_persons reads)."""
+    with mysql_db.cursor() as mysql_cursor:
+        mysql_cursor.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = 'feature_generator_person_outcome' "
+            "AND column_name = 'lastSuccessRetrievalFlag'",
+            (DB_NAME,),
+        )
+        return mysql_cursor.fetchone() is not None
+
+
+# ------------------------------------------------------------------------------
+#  SCHEDULE
+# ------------------------------------------------------------------------------
+def expected_cost(person):
+    """Expected seconds for one request: the person's average latency, or an
+    estimate from their suggested-article count when there is no history."""
+    if person["avgLatencySeconds"] is not None:
+        return float(person["avgLatencySeconds"])
+    return DEFAULT_COST_SECONDS + SECONDS_PER_ARTICLE * (person["articleCount"] or 0)
+
+
+def overdue_tier(person, now):
+    """Number of scheduled runs the person has missed since their last
+    success (0 = refreshed on schedule), capped at MAX_OVERDUE_TIER. Never
+    refreshed counts as the top tier."""
+    if person["lastSuccessAt"] is None:
+        return MAX_OVERDUE_TIER
+    days = (now - person["lastSuccessAt"]).total_seconds() / 86400
+    missed = round(days / person["intervalDays"]) - 1
+    return max(0, min(missed, MAX_OVERDUE_TIER))
+
+
+def is_fresh(person, retrieval_flag, now):
+    """
+    True when the person already succeeded today with a retrieval at least
+    as broad as `retrieval_flag` -- i.e. this run (or an earlier attempt at
+    it that was restarted) has already refreshed them.
+    """
+    last = person["lastSuccessAt"]
+    if last is None or last.date() != now.date():
+        return False
+    return (
+        retrieval_flag != "ALL_PUBLICATIONS"
+        or person["lastSuccessRetrievalFlag"] == "ALL_PUBLICATIONS"
+    )
+
+
+def plan_schedule(persons, now):
+    """Most overdue first; within a tier, longest expected request first."""
+    return sorted(
+        persons,
+        key=lambda p: (-overdue_tier(p, now), -expected_cost(p), p["personIdentifier"])
+    )
+
 
 def create_session_with_retries(
     total_retries=3, 
     backoff_factor=2, 
-    status_forcelist=(500, 502, 503, 504)
+    status_forcelist=(500, 502, 503, 504),
+    pool_size=10
 ):
     """Returns a requests.Session configured with retries and backoff."""
     session = requests.Session()
@@ -191,7 +339,7 @@ def create_session_with_retries(
         status_forcelist=status_forcelist,
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
@@ -200,25 +348,38 @@ def create_session_with_retries(
 # API Request Function
 # ------------------------------
 
-session = create_session_with_retries()
-# ------------------------------------------------------------------------------
-#  MAKE FEATURE-GENERATOR REQUEST
-# ------------------------------------------------------------------------------
-def make_curl_request(person_identifier):
+# No transport-level retries at all: 5xx responses, timeouts and connection
+# errors have to reach the AIMDLimiter as an overload signal, and a silent
+# urllib3 re-send of an analysisRefreshFlag=true GET only adds load to a
+# struggling ReCiter. trigger_person() owns retry and backoff.
+session = create_session_with_retries(
+    total_retries=0,
+    status_forcelist=(),
+    pool_size=max(c["maximum"] for c in CONCURRENCY.values())
+)
+
+
+def current_retrieval_flag():
     """
-    Make a GET request to ReCiter's Feature Generator service for a given personIdentifier.
-    
-    - On the 1st day of the month, we request ALL_PUBLICATIONS.
-    - On other days, ONLY_NEWLY_ADDED_PUBLICATIONS are requested.
+    On the 1st day of the month, we request ALL_PUBLICATIONS.
+    On other days, ONLY_NEWLY_ADDED_PUBLICATIONS are requested.
     """
-    rate_limited()
-
-    retrieval_flag = (
+    return (
         "ONLY_NEWLY_ADDED_PUBLICATIONS"
         if datetime.now().day != 1
         else "ALL_PUBLICATIONS"
     )
 
+
+# ------------------------------------------------------------------------------
+#  MAKE FEATURE-GENERATOR REQUEST
+# ------------------------------------------------------------------------------
+def make_curl_request(person_identifier, retrieval_flag):
+    """
+    Make a blocking GET request to ReCiter's Feature Generator service for a
+    given personIdentifier. Returns (http_status, bytes received, error);
+    http_status is None when the request never got a response.
+    """
     curl_url = (
         f"{URL}?uid={person_identifier}"
         f"&useGoldStandard=AS_EVIDENCE"
@@ -234,52 +395,302 @@ def make_curl_request(person_identifier):
     }
 
     try:
-        response = session.get(curl_url, headers=headers, timeout=(10,180))
+        response = session.get(curl_url, headers=headers, timeout=REQUEST_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        pipeline_metrics.add(api_calls={"reciter": 1}, api_errors={"reciter": 1})
+        return None, 0, str(e)
 
-        if response.status_code == 200:
-            logger.info(
-                f"[{person_identifier}] Success: {len(response.text)} bytes received"
+    pipeline_metrics.add(api_calls={"reciter": 1}, bytes_transferred=len(response.content))
+
+    if response.status_code == 200:
+        return response.status_code, len(response.content), None
+    return response.status_code, len(response.content), response.text[:500]
+
+
+async def trigger_person(person_identifier, retrieval_flag, limiter, executor):
+    """
+    Runs Feature Generator for one person. The caller has already acquired a
+    limiter slot for the first attempt; retries acquire their own. Returns
+    the person's result row.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if attempt > 1:
+            await asyncio.sleep(RETRY_BACKOFF * attempt)
+            await limiter.acquire()
+
+        started = time.monotonic()
+        try:
+            status_code, received, error = await loop.run_in_executor(
+                executor, make_curl_request, person_identifier, retrieval_flag
             )
-        else:
-            logger.error(
-                f"[{person_identifier}] Failed with status {response.status_code}: {response.text}"
+        except Exception as e:
+            status_code, received, error = None, 0, str(e)
+        latency = time.monotonic() - started
+
+        healthy = status_code is not None and status_code < 500
+        await limiter.release(latency, healthy)
+        if healthy:
+            break
+
+    result = {
+        "personIdentifier": person_identifier,
+        "retrievalFlag": retrieval_flag,
+        "status": "success" if status_code == 200 else "failed",
+        "httpStatus": status_code,
+        "latencySeconds": round(latency, 3),
+        "bytesReceived": received,
+        "attempts": attempt,
+        "error": error,
+        "finishedAt": datetime.now(),
+    }
+    if result["status"] == "success":
+        logger.info(f"[{person_identifier}] Success: {received} bytes received in {latency:.1f}s")
+    else:
+        logger.error(
+            f"[{person_identifier}] Failed after {attempt} attempt(s) "
+            f"with status {status_code}: {error}"
+        )
+    return result
+
+
+async def run_feature_generator(person_identifiers, retrieval_flag, deadline=None, on_result=None):
+    """
+    Dispatches persons in order, each as soon as the mode's AIMDLimiter has
+    a free slot. Once time.monotonic() passes `deadline`, no further persons
+    are dispatched and in-flight requests are left to finish. `on_result`,
+    if given, is called with each result row as soon as it is available.
+    Returns (per-person result rows, persons not dispatched).
+    """
+    limiter = AIMDLimiter(retrieval_flag, **CONCURRENCY[retrieval_flag])
+    logger.info(
+        f"{retrieval_flag}: starting at {int(limiter.limit)} concurrent request(s), "
+        f"max {limiter.maximum}, target latency {limiter.target_latency}s"
+    )
+
+    tasks = []
+    skipped = []
+    with ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+        for i, person_identifier in enumerate(person_identifiers):
+            await limiter.acquire()
+            if deadline is not None and time.monotonic() >= deadline:
+                await limiter.release()
+                skipped = person_identifiers[i:]
+                logger.warning(
+                    f"Time budget spent; not dispatching the remaining {len(skipped)} person(s)."
+                )
+                break
+            task = asyncio.create_task(
+                trigger_person(person_identifier, retrieval_flag, limiter, executor)
             )
+            if on_result is not None:
+                task.add_done_callback(lambda t: on_result(t.result()))
+            tasks.append(task)
+        results = await asyncio.gather(*tasks)
 
-    except requests.exceptions.RequestException as e:
-        logger.exception(
-            f"[{person_identifier}]  Exception occurred after retries: {e}"
+    logger.info(f"{retrieval_flag}: final concurrency limit {int(limiter.limit)}")
+    return results, skipped
+
+
+def summarize_results(results):
+    """Logs the per-person result table's totals and its failed rows."""
+    succeeded = [r for r in results if r["status"] == "success"]
+    failed = [r for r in results if r["status"] != "success"]
+    latencies = sorted(r["latencySeconds"] for r in succeeded)
+    if latencies:
+        logger.info(
+            f"Latency (successes): p50={latencies[len(latencies) // 2]:.1f}s "
+            f"p95={latencies[int(len(latencies) * 0.95)]:.1f}s max={latencies[-1]:.1f}s"
         )
-    finally:
-        logger.info("")  # Blank line in logs for readability
+    logger.info(
+        f"Feature Generator results: {len(succeeded)} succeeded, {len(failed)} failed, "
+        f"{sum(r['bytesReceived'] for r in succeeded)} bytes received"
+    )
+    for r in failed:
+        logger.info(
+            f"  FAILED {r['personIdentifier']}: status={r['httpStatus']} "
+            f"attempts={r['attempts']} error={r['error']}"
+        )
+
+# ------------------------------
+# Persist Outcomes
+# ------------------------------
+class OutcomeRecorder:
+    """
+    Buffers per-person result rows and upserts them into
+    feature_generator_person_outcome OUTCOME_FLUSH_SIZE at a time, so a run
+    that is killed part-way keeps the outcomes of everything it finished
+    (which is what --resume relies on).
+
+    add() runs in the event loop's task done-callback, so the database work
+    is handed to a single writer thread that owns mysql_db: the ping and
+    executemany never stall in-flight triggers or skew the latencies the
+    limiter adapts to. close() writes the remainder and waits for the writer.
+    """
 
-    return True
+    def __init__(self, mysql_db):
+        self.mysql_db = mysql_db
+        self.pending = []
+        self.recorded = 0
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outcome-writer")
+
+    def add(self, result):
+        self.pending.append(result)
+        if len(self.pending) >= OUTCOME_FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        self.writer.submit(self._write, rows)
+
+    def close(self):
+        self.flush()
+        self.writer.shutdown(wait=True)
+
+    def _write(self, rows):
+        try:
+            self.mysql_db.ping(reconnect=True)
+            persist_outcomes(self.mysql_db, rows)
+            self.recorded += len(rows)
+        except Exception as e:
+            logger.exception(f"Failed to record {len(rows)} outcome(s): {e}")
+
+
+def persist_outcomes(mysql_db, results):
+    """
+    Upserts each person's outcome into feature_generator_person_outcome in
+    one executemany. avgLatencySeconds is an exponentially weighted average
+    of successful latencies; failures leave it, lastSuccessAt and
+    lastSuccessRetrievalFlag unchanged.
+    """
+    if not results:
+        return
+    rows = [
+        (
+            r["personIdentifier"],
+            r["finishedAt"],
+            r["status"],
+            r["httpStatus"],
+            r["latencySeconds"],
+            r["bytesReceived"],
+            r["attempts"],
+            r["retrievalFlag"],
+            (r["error"] or "")[:500] or None,
+            r["finishedAt"] if r["status"] == "success" else None,
+            r["retrievalFlag"] if r["status"] == "success" else None,
+            r["latencySeconds"] if r["status"] == "success" else None,
+        )
+        for r in results
+    ]
+    sql = f"""
+        INSERT INTO {DB_NAME}.feature_generator_person_outcome
+            (personIdentifier, lastAttemptAt, lastStatus, lastHttpStatus,
+             lastLatencySeconds, lastBytesReceived, lastAttempts,
+             lastRetrievalFlag, lastError,
+             lastSuccessAt, lastSuccessRetrievalFlag, avgLatencySeconds)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            lastAttemptAt = VALUES(lastAttemptAt),
+            lastStatus = VALUES(lastStatus),
+            lastHttpStatus = VALUES(lastHttpStatus),
+            lastLatencySeconds = VALUES(lastLatencySeconds),
+            lastBytesReceived = VALUES(lastBytesReceived),
+            lastAttempts = VALUES(lastAttempts),
+            lastRetrievalFlag = VALUES(lastRetrievalFlag),
+            lastError = VALUES(lastError),
+            lastSuccessAt = COALESCE(VALUES(lastSuccessAt), lastSuccessAt),
+            lastSuccessRetrievalFlag = COALESCE(VALUES(lastSuccessRetrievalFlag), lastSuccessRetrievalFlag),
+            avgLatencySeconds = CASE
+                WHEN VALUES(avgLatencySeconds) IS NULL THEN avgLatencySeconds
+                WHEN avgLatencySeconds IS NULL THEN VALUES(avgLatencySeconds)
+                ELSE {1 - LATENCY_EWMA_WEIGHT} * avgLatencySeconds
+                     + {LATENCY_EWMA_WEIGHT} * VALUES(avgLatencySeconds)
+            END
+    """
+    with mysql_db.cursor() as mysql_cursor:
+        mysql_cursor.executemany(sql, rows)
+    mysql_db.commit()
+
+
+async def run_with_retries(person_identifiers, retrieval_flag, deadline, recorder):
+    """
+    One pass over every person, then up to FAILURE_RETRY_PASSES passes over
+    the ones that failed, within the same deadline. Returns (final result
+    row per person attempted, persons never dispatched).
+    """
+    results, skipped = await run_feature_generator(
+        person_identifiers, retrieval_flag, deadline, on_result=recorder.add
+    )
+    final = {r["personIdentifier"]: r for r in results}
+
+    for retry_pass in range(1, FAILURE_RETRY_PASSES + 1):
+        failed = [p for p, r in final.items() if r["status"] != "success"]
+        if not failed or (deadline is not None and time.monotonic() >= deadline):
+            break
+        logger.info(f"Retry pass {retry_pass}: re-requesting {len(failed)} failed person(s).")
+        retried, _ = await run_feature_generator(
+            failed, retrieval_flag, deadline, on_result=recorder.add
+        )
+        final.update((r["personIdentifier"], r) for r in retried)
+
+    return list(final.values()), skipped
 
 # ------------------------------
 # Main Execution
 # ------------------------------
 
 def main():
+    parser = argparse.ArgumentParser(description="Trigger ReCiter Feature Generator for due persons.")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip persons already refreshed today (e.g. when restarting a failed nightly)."
+    )
+    args = parser.parse_args()
+
     logger.info("Starting Feature Generator Script.")
     start_metrics_collector()  # start CPU/memory monitoring
 
     try:
         # Connect to the database
         mysql_db = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
-        mysql_cursor = mysql_db.cursor()
-
-        # Fetch all relevant personIdentifiers
-        person_identifiers = get_person_identifier(mysql_cursor)
 
-        logger.info(f"Total person identifiers: {len(person_identifiers)}")
-        logger.info(f"Using {MAX_WORKERS} workers, rate limit {REQUESTS_PER_SECOND} req/sec")
+        # Fetch all relevant persons, most urgent and most expensive first
+        now = datetime.now()
+        retrieval_flag = current_retrieval_flag()
+        persons = get_persons(mysql_db)
+        if args.resume:
+            fresh = [p for p in persons if is_fresh(p, retrieval_flag, now)]
+            persons = [p for p in persons if not is_fresh(p, retrieval_flag, now)]
+            logger.info(f"--resume: skipping {len(fresh)} person(s) already refreshed today.")
+        schedule = plan_schedule(persons, now)
+
+        logger.info(f"Total person identifiers: {len(schedule)}")
+        for person in schedule[:5]:
+            logger.info(
+                f"  next: {person['personIdentifier']} overdue_tier={overdue_tier(person, now)} "
+                f"expected={expected_cost(person):.0f}s"
+            )
 
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            executor.map(make_curl_request, person_identifiers)
+        deadline = time.monotonic() + TIME_BUDGET_SECONDS if TIME_BUDGET_SECONDS > 0 else None
+        recorder = OutcomeRecorder(mysql_db)
+        try:
+            results, skipped = asyncio.run(run_with_retries(
+                [p["personIdentifier"] for p in schedule], retrieval_flag, deadline, recorder
+            ))
+        finally:
+            recorder.close()
+        logger.info(f"Recorded {recorder.recorded} outcome(s) in feature_generator_person_outcome.")
+        summarize_results(results)
+        if skipped:
+            logger.warning(f"{len(skipped)} person(s) deferred to the next run by the time budget.")
 
         logger.info("Processing complete for Feature Generator.")
 
     except Exception as e:
         logger.exception(f"Unexpected error in main(): {e}")
+        sys.exit(1)
 
     finally:
         #upload_log_to_s3()
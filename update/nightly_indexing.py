@@ -0,0 +1,384 @@
+# nightly_indexing.py
+#
+# Runs CALL populateAnalysisSummaryTables_v2() and streams its progress.
+#
+# run_nightly_indexing.sh used to start the procedure in a background mysql
+# client and, every 3 seconds, spawn another mysql client to read new
+# analysis_job_log rows. This driver calls the procedure on one connection
+# and tails analysis_job_log on a second, persistent connection, so there is
+# no per-poll process spawn, and it turns the log_progress rows into
+# per-step durations and rows/sec. Those are logged at the end and reported
+# through pipeline_metrics, which run_all.py stores in run_history.
+#
+# analysis_job_log only keeps a day of rows, so each job's step timings are
+# also kept in analysis_step_history and compared with the step's trailing
+# median; steps that grew past REGRESSION_RATIO are logged as [REGRESSION].
+# `python3 nightly_indexing.py --report [JOB_ID]` prints that comparison for
+# the latest (or given) job without running anything.
+#
+# Exit code: 0 when the job logged SUCCESS, 1 otherwise (ERROR, SKIPPED
+# because another job holds the lock, or the CALL itself failed).
+# run_nightly_indexing.sh keeps the retries, validation and restore.
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+import pymysql.cursors
+import pymysql.err
+
+import pipeline_metrics
+
+# ------------------------------------------------------------------------------
+# Logging
+# ------------------------------------------------------------------------------
+logging.basicConfig(
+    stream=sys.stdout,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+# Environment Variables
+# ------------------------------------------------------------------------------
+DB_USERNAME = os.getenv("DB_USERNAME")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_NAME = os.getenv("DB_NAME")
+
+# ------------------------------------------------------------------------------
+# Settings
+# ------------------------------------------------------------------------------
+PROCEDURE = "populateAnalysisSummaryTables_v2"
+POLL_INTERVAL_SECONDS = 3     # analysis_job_log tail interval (indexed id range scan)
+FINISHED_STEP = "FINISHED"    # step name of the final SUCCESS row, not a real step
+
+# Regression check against analysis_step_history
+BASELINE_JOBS = 14            # trailing completed runs of a step used for its median
+MIN_BASELINE_JOBS = 3         # fewer than this and the step is not judged
+REGRESSION_RATIO = float(os.getenv("INDEXING_REGRESSION_RATIO", "1.5"))
+REGRESSION_MIN_SECONDS = 60   # ignore growth smaller than this (1s log resolution, noise)
+
+
+# ------------------------------------------------------------------------------
+# Database Connection
+# ------------------------------------------------------------------------------
+def connect_mysql_server(db_user, db_pass, db_host, db_name):
+    """Connect to the MariaDB database."""
+    try:
+        mysql_db = pymysql.connect(
+            user=db_user,
+            password=db_pass,
+            database=db_name,
+            host=db_host,
+            autocommit=True,
+            charset="utf8mb4",
+            cursorclass=pymysql.cursors.DictCursor
+        )
+        logger.info(f"Connected to database server: {db_host}, database: {db_name}, user: {db_user}")
+        return mysql_db
+    except pymysql.err.MySQLError as err:
+        logger.error(f"{time.ctime()} -- Error connecting to the database: {err}")
+        sys.exit(1)
+
+
+# ------------------------------------------------------------------------------
+# Procedure call (runs on its own connection, in a background thread)
+# ------------------------------------------------------------------------------
+def call_procedure(conn, outcome):
+    """
+    CALLs the procedure and drains every result set it returns (log_progress
+    SELECTs one per row it logs); the call is only finished once they are all
+    read. Any exception is stored in outcome["error"].
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CALL {PROCEDURE}()")
+            while cursor.nextset():
+                pass
+    except Exception as e:
+        outcome["error"] = e
+
+
+# ------------------------------------------------------------------------------
+# Log tail
+# ------------------------------------------------------------------------------
+def max_log_id(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT IFNULL(MAX(id), 0) AS max_id FROM analysis_job_log")
+        return cursor.fetchone()["max_id"]
+
+
+def fetch_new_rows(conn, last_id):
+    # The tail connection is autocommit, so every SELECT sees the rows the
+    # procedure has committed since; a long-lived REPEATABLE READ snapshot
+    # would keep returning nothing.
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, job_id, step, substep, status, rows_affected, message, created_at "
+            "FROM analysis_job_log WHERE id > %s ORDER BY id",
+            (last_id,),
+        )
+        return cursor.fetchall()
+
+
+def log_row(row):
+    rows = f" (rows: {row['rows_affected']})" if row["rows_affected"] is not None else ""
+    message = f" {row['message']}" if row["message"] else ""
+    logger.info(f"  [{row['status']}] {row['step']} > {row['substep']}{rows}{message}")
+
+
+def tail(conn, start_id, call_thread):
+    """Logs new analysis_job_log rows until the CALL returns; returns them all."""
+    last_id = start_id
+    seen = []
+    while True:
+        finished = not call_thread.is_alive()
+        for row in fetch_new_rows(conn, last_id):
+            log_row(row)
+            seen.append(row)
+            last_id = row["id"]
+        if finished:
+            return seen
+        call_thread.join(POLL_INTERVAL_SECONDS)
+
+
+# ------------------------------------------------------------------------------
+# Per-step timings
+# ------------------------------------------------------------------------------
+def step_timings(rows):
+    """
+    Turns one job's analysis_job_log rows into per-step timings, in run order:
+    [{"step", "started_at", "seconds", "rows", "rows_per_second", "status"}].
+
+    A step runs from its first row to its DONE row, or to the next step's
+    first row when it has none (failed or skipped steps). `rows` sums the
+    rows_affected of its rows. created_at has one-second resolution, so
+    sub-second steps report 0 seconds and no rate.
+    """
+    steps = []
+    by_name = {}
+    for row in rows:
+        name = row["step"]
+        if name not in by_name:
+            if steps and steps[-1]["ended_at"] is None:
+                steps[-1]["ended_at"] = row["created_at"]
+            if name == FINISHED_STEP:
+                continue
+            by_name[name] = {
+                "step": name, "started_at": row["created_at"], "ended_at": None,
+                "rows": 0, "status": row["status"],
+            }
+            steps.append(by_name[name])
+        step = by_name.get(name)
+        if step is None:
+            continue
+        step["rows"] += row["rows_affected"] or 0
+        if row["status"] == "ERROR" or step["status"] != "ERROR":
+            step["status"] = row["status"]
+        if row["status"] == "DONE":
+            step["ended_at"] = row["created_at"]
+
+    timings = []
+    for step in steps:
+        ended_at = step["ended_at"] or (rows[-1]["created_at"] if rows else step["started_at"])
+        seconds = (ended_at - step["started_at"]).total_seconds()
+        timings.append({
+            "step": step["step"],
+            "started_at": step["started_at"],
+            "seconds": seconds,
+            "rows": step["rows"],
+            "rows_per_second": round(step["rows"] / seconds, 1) if seconds > 0 else None,
+            "status": step["status"],
+        })
+    return timings
+
+
+def report_timings(timings):
+    for t in timings:
+        rate = f", {t['rows_per_second']} rows/s" if t["rows_per_second"] else ""
+        logger.info(f"[STEP] {t['step']}: {t['seconds']:.0f}s, {t['rows']} row(s){rate} [{t['status']}]")
+    pipeline_metrics.add(sp_steps={
+        t["step"]: {"seconds": t["seconds"], "rows": t["rows"]} for t in timings
+    })
+
+
+# ------------------------------------------------------------------------------
+# Step history + regression check
+# ------------------------------------------------------------------------------
+def save_step_history(conn, job_id, timings):
+    """Upserts the job's step timings. Never fails the job: a missing table is
+    logged and ignored."""
+    if not job_id or not timings:
+        return
+    try:
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO analysis_step_history "
+                "(job_id, step, started_at, seconds, rows_affected, status) "
+                "VALUES (%s, %s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE started_at = VALUES(started_at), "
+                "seconds = VALUES(seconds), rows_affected = VALUES(rows_affected), "
+                "status = VALUES(status)",
+                [(job_id, t["step"], t["started_at"], t["seconds"], t["rows"], t["status"])
+                 for t in timings],
+            )
+        logger.info(f"Saved {len(timings)} step timing(s) for {job_id} to analysis_step_history.")
+    except pymysql.err.MySQLError as e:
+        logger.error(f"Failed to save analysis_step_history: {e}")
+
+
+def load_step_history(conn, job_id):
+    """Returns (this job's [timing], {step: [seconds of its trailing DONE runs]})."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT step, started_at, seconds, rows_affected AS `rows`, status "
+            "FROM analysis_step_history WHERE job_id = %s ORDER BY started_at",
+            (job_id,),
+        )
+        current = cursor.fetchall()
+        if not current:
+            return [], {}
+        # Ordered newest first so the first BASELINE_JOBS per step are the trailing window.
+        cursor.execute(
+            "SELECT step, seconds FROM analysis_step_history "
+            "WHERE job_id <> %s AND status = 'DONE' AND started_at < %s "
+            "ORDER BY started_at DESC",
+            (job_id, current[0]["started_at"]),
+        )
+        baseline = {}
+        for row in cursor.fetchall():
+            runs = baseline.setdefault(row["step"], [])
+            if len(runs) < BASELINE_JOBS:
+                runs.append(row["seconds"])
+    return current, baseline
+
+
+def find_regressions(timings, baseline):
+    """
+    Compares each step with the median of its trailing runs. Returns one entry
+    per judged step: {"step", "seconds", "median", "ratio", "regressed"}.
+    A step regressed when it took more than REGRESSION_RATIO x its median and
+    at least REGRESSION_MIN_SECONDS longer.
+    """
+    report = []
+    for t in timings:
+        runs = baseline.get(t["step"], [])
+        if len(runs) < MIN_BASELINE_JOBS:
+            continue
+        median = statistics.median(runs)
+        ratio = t["seconds"] / median if median > 0 else None
+        regressed = (
+            t["seconds"] - median >= REGRESSION_MIN_SECONDS
+            and (ratio is None or ratio > REGRESSION_RATIO)
+        )
+        report.append({
+            "step": t["step"], "seconds": t["seconds"], "median": median,
+            "ratio": ratio, "regressed": regressed,
+        })
+    return report
+
+
+def log_regressions(report):
+    regressed = [r for r in report if r["regressed"]]
+    for r in regressed:
+        ratio = f"{r['ratio']:.1f}x" if r["ratio"] is not None else "n/a"
+        logger.warning(
+            f"[REGRESSION] {r['step']}: {r['seconds']:.0f}s vs trailing median "
+            f"{r['median']:.0f}s ({ratio})"
+        )
+    if report and not regressed:
+        logger.info(f"No step regressed beyond {REGRESSION_RATIO}x its trailing median.")
+    pipeline_metrics.add(sp_regressions=len(regressed))
+    return regressed
+
+
+def check_regressions(conn, job_id):
+    try:
+        current, baseline = load_step_history(conn, job_id)
+    except pymysql.err.MySQLError as e:
+        logger.error(f"Failed to read analysis_step_history: {e}")
+        return []
+    return log_regressions(find_regressions(current, baseline))
+
+
+def print_report(conn, job_id=None):
+    """Prints every step of a job (default: the latest) against its trailing median."""
+    if job_id is None:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MAX(job_id) AS job_id FROM analysis_step_history")
+            job_id = cursor.fetchone()["job_id"]
+    if job_id is None:
+        print("analysis_step_history is empty.")
+        return
+    current, baseline = load_step_history(conn, job_id)
+    judged = {r["step"]: r for r in find_regressions(current, baseline)}
+    print(f"{job_id} (threshold {REGRESSION_RATIO}x, median of up to {BASELINE_JOBS} prior runs)")
+    print(f"{'step':<45} {'seconds':>9} {'median':>9} {'ratio':>6} {'rows':>12}")
+    for t in current:
+        r = judged.get(t["step"])
+        median = f"{r['median']:.0f}" if r else "-"
+        ratio = f"{r['ratio']:.1f}" if r and r["ratio"] is not None else "-"
+        flag = "  REGRESSED" if r and r["regressed"] else ""
+        print(f"{t['step'][:45]:<45} {t['seconds']:>9.0f} {median:>9} {ratio:>6} {t['rows']:>12}{flag}")
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+def main():
+    call_conn = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
+    tail_conn = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
+
+    start_id = max_log_id(tail_conn)
+    outcome = {"error": None}
+    call_thread = threading.Thread(
+        target=call_procedure, args=(call_conn, outcome), name="indexing-call", daemon=True
+    )
+
+    started = time.time()
+    logger.info(f"Calling {PROCEDURE}(); tailing analysis_job_log every {POLL_INTERVAL_SECONDS}s.")
+    call_thread.start()
+    rows = tail(tail_conn, start_id, call_thread)
+    elapsed = time.time() - started
+
+    # Another job's rows could interleave if one slipped past the SP's lock.
+    job_ids = [r["job_id"] for r in rows if r["job_id"]]
+    job_id = job_ids[0] if job_ids else None
+    rows = [r for r in rows if r["job_id"] == job_id]
+
+    timings = step_timings(rows)
+    report_timings(timings)
+    save_step_history(tail_conn, job_id, timings)
+    check_regressions(tail_conn, job_id)
+
+    call_conn.close()
+    tail_conn.close()
+
+    if outcome["error"] is not None:
+        logger.error(f"CALL {PROCEDURE}() failed after {elapsed:.0f}s: {outcome['error']}")
+        return 1
+    final_status = rows[-1]["status"] if rows else None
+    if final_status != "SUCCESS":
+        logger.error(f"{PROCEDURE} job {job_id} ended with status {final_status} after {elapsed:.0f}s.")
+        return 1
+    logger.info(f"{PROCEDURE} job {job_id} completed in {elapsed:.0f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Run {PROCEDURE}() with live progress.")
+    parser.add_argument("--report", nargs="?", const="latest", metavar="JOB_ID",
+                        help="Print a job's step timings against their trailing median and exit")
+    args = parser.parse_args()
+    if args.report:
+        conn = connect_mysql_server(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_NAME)
+        print_report(conn, None if args.report == "latest" else args.report)
+        conn.close()
+        sys.exit(0)
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+pipeline_metrics.py -- per-stage metrics reported back to run_all.py.
+
+run_all.py points PIPELINE_METRICS_FILE at a per-stage file before starting
+each stage. Scripts add to in-process counters as they work:
+
+    pipeline_metrics.add(api_calls={"<service>": 1}, bytes_transferred=len(response.content))
+    pipeline_metrics.add(rows_loaded={"analysis_nih": inserted})
+
+Values are additive; nested dicts are summed per key. Each key keeps one
+shape across calls (always a number, or always a dict); mixing them raises
+TypeError. The totals are written
+to the file as one JSON object when the process exits, and run_all.py folds
+them into the stage's telemetry (run_history table + telemetry JSON in S3).
+Outside run_all (no PIPELINE_METRICS_FILE) every call is a cheap no-op, so
+scripts can be run by hand unchanged.
+"""
+
+import atexit
+import json
+import os
+import threading
+
+METRICS_FILE_ENV = "PIPELINE_METRICS_FILE"
+
+_metrics_file = os.getenv(METRICS_FILE_ENV)
+_totals = {}
+_lock = threading.Lock()
+
+
+def merge(into, metrics):
+    """Adds `metrics` into `into` in place (nested dicts summed per key).
+
+    Raises TypeError naming the key when it is a dict on one side and a
+    number on the other."""
+    for key, value in metrics.items():
+        current = into.get(key)
+        if current is not None and isinstance(current, dict) != isinstance(value, dict):
+            raise TypeError(
+                f"pipeline metric {key!r} is a {type(current).__name__} so far but "
+                f"{type(value).__name__} was added; each key must keep one shape")
+        if isinstance(value, dict):
+            merge(into.setdefault(key, {}), value)
+        else:
+            into[key] = into.get(key, 0) + value
+    return into
+
+
+def add(**metrics):
+    if not _metrics_file:
+        return
+    with _lock:
+        merge(_totals, metrics)
+
+
+def flush():
+    """Writes the totals so far. Registered atexit; safe to call earlier."""
+    if not _metrics_file:
+        return
+    with _lock:
+        snapshot = json.dumps(_totals)
+    with open(_metrics_file, "w") as f:
+        f.write(snapshot)
+
+
+atexit.register(flush)
@@ -4,7 +4,7 @@ preprocessing.py - Shared feature computation for ReCiter scoring models.
 
 This module contains:
 - Feature column definitions for both model types
-- Wilson score interval calculation
+- Wilson score interval calculation (scalar and vectorized)
 - Derived feature computation (confidence-aware features)
 
 Used by: feedbackIdentityCreateModel_*.py, identityOnlyCreateModel_*.py,
@@ -15,11 +15,18 @@ import os
 import re
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+# Optional: compiled Levenshtein distance (same integer result as the pure-Python one).
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:
+    _rf_levenshtein = None
+
 
 # =============================================================================
 # CONFIGURATION
@@ -54,14 +61,20 @@ _log = logging.getLogger(__name__)
 # NAME FREQUENCY DATA (loaded once at import time)
 # =============================================================================
 
-def _load_name_frequency():
-    """Load name frequency table from data/name_frequency.json.
-    Returns (table_dict, median_score) or ({}, 0.0) if unavailable."""
+def _name_frequency_path():
+    """Path of the name frequency table, or None if there is none."""
     freq_path = Path(__file__).parent.parent / 'data' / 'name_frequency.json'
     if not freq_path.exists():
         # In-cluster / vendored: baked next to this module at aar_data/ (see Dockerfile).
         freq_path = Path(__file__).parent / 'aar_data' / 'name_frequency.json'
-    if freq_path.exists():
+    return freq_path if freq_path.exists() else None
+
+
+def _load_name_frequency():
+    """Load name frequency table from data/name_frequency.json.
+    Returns (table_dict, median_score) or ({}, 0.0) if unavailable."""
+    freq_path = _name_frequency_path()
+    if freq_path is not None:
         with open(freq_path, 'r') as f:
             table = json.load(f)
         scores = [v['score'] for v in table.values()]
@@ -182,6 +195,48 @@ def _jaro_winkler_similarity(s1: str, s2: str, p: float = 0.1) -> float:
     return jaro + prefix * min(p, 0.25) * (1.0 - jaro)
 
 
+# rapidfuzz's Levenshtein distance is exact, so it is a drop-in. Its Jaro-Winkler is
+# not (prefix bonus only above 0.7 similarity, transpositions halved with integer
+# division), and the models were trained on _jaro_winkler_similarity, so that one
+# stays pure Python and relies on the cache below.
+_edit_distance = _rf_levenshtein.distance if _rf_levenshtein is not None else _levenshtein_distance
+
+
+@lru_cache(maxsize=1 << 16)
+def _first_name_similarity(id_first: str, art_first: str):
+    """(nameJaroWinkler, nameEditDistanceNorm) for one normalized first-name pair.
+
+    Cached: a person's identity first name meets the same few article spellings
+    on most of their articles, and common pairs recur across people.
+    """
+    return (
+        _jaro_winkler_similarity(id_first, art_first),
+        1.0 - _edit_distance(id_first, art_first) / max(len(id_first), len(art_first), 1),
+    )
+
+
+def _map_distinct(values: pd.Series, func) -> pd.Series:
+    """values.map(func), calling func once per distinct value (factorize + take).
+
+    Person-level inputs (identityFirstName, identityMiddleName) repeat the same
+    value on every article row of a person, so this costs one call per person
+    rather than one per article; the scoring batch stacks many persons, which
+    is still one call per person. Missing values are mapped row by row so
+    None and NaN keep their own results, exactly as map() would give.
+    """
+    codes, uniques = pd.factorize(values)
+    lookup = pd.Series([func(u) for u in uniques], dtype=object).infer_objects()
+    if (codes >= 0).all():
+        return pd.Series(lookup.to_numpy()[codes], index=values.index)
+    out = [lookup.iat[c] if c >= 0 else func(v) for c, v in zip(codes, values)]
+    return pd.Series(out, index=values.index)
+
+
+def _normalize_name(name) -> str:
+    """fillna('').astype(str).str.strip().str.lower() for a single value."""
+    return '' if pd.isna(name) else str(name).strip().lower()
+
+
 # =============================================================================
 # FEATURE COLUMN DEFINITIONS
 # =============================================================================
@@ -316,6 +371,40 @@ def wilson_lower_bound(successes: float, failures: float, confidence: float = 0.
     return max(0.0, min(1.0, lower))
 
 
+def wilson_lower_bound_array(successes, failures, confidence: float = 0.95) -> np.ndarray:
+    """
+    Vectorized wilson_lower_bound over arrays of counts.
+
+    Same arithmetic in the same order as the scalar function (z is computed
+    once), so results are identical element for element, including the
+    n == 0 -> 0.5 case and NaN counts (which the scalar clamp maps to 1.0).
+
+    Args:
+        successes: Array-like of success counts
+        failures: Array-like of failure counts
+        confidence: Confidence level for interval (default 95%)
+
+    Returns:
+        ndarray of lower bounds in [0, 1]
+    """
+    successes = np.asarray(successes, dtype=float)
+    failures = np.asarray(failures, dtype=float)
+    n = successes + failures
+
+    z = stats.norm.ppf(1 - (1 - confidence) / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = successes / n
+        denominator = 1 + z**2 / n
+        centre = p + z**2 / (2 * n)
+        spread = z * np.sqrt((p * (1 - p) + z**2 / (4 * n)) / n)
+        lower = (centre - spread) / denominator
+
+    # max(0.0, min(1.0, lower)) elementwise; a NaN falls through to 1.0 as it does there
+    lower = np.where(lower < 1.0, lower, 1.0)
+    lower = np.where(lower > 0.0, lower, 0.0)
+    return np.where(n == 0, 0.5, lower)
+
+
 # =============================================================================
 # DERIVED FEATURE COMPUTATION
 # =============================================================================
@@ -393,8 +482,9 @@ def _compute_identity_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     # 6. firstNameFrequencyScore: IDF-like score from name frequency table (person-level)
     #    Requires 'identityFirstName' column (added by Java Feature Generator).
     #    Rare names get high scores (strong identity signal), common names get low scores.
+    #    Person-constant: computed once per distinct name, broadcast to the rows.
     if _NAME_FREQ_TABLE and 'identityFirstName' in df.columns:
-        df['firstNameFrequencyScore'] = df['identityFirstName'].map(_name_frequency_score)
+        df['firstNameFrequencyScore'] = _map_distinct(df['identityFirstName'], _name_frequency_score)
     else:
         df['firstNameFrequencyScore'] = 0.0
 
@@ -411,7 +501,7 @@ def _compute_identity_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     #    Short names (2-3 chars) are inherently ambiguous — "Yi" matching "Yin"
     #    is weak evidence compared to "Christopher" matching "Christophe".
     if 'identityFirstName' in df.columns:
-        df['firstNameLength'] = df['identityFirstName'].map(_first_name_length)
+        df['firstNameLength'] = _map_distinct(df['identityFirstName'], _first_name_length)
     else:
         df['firstNameLength'] = 0.0
 
@@ -450,21 +540,17 @@ def _compute_identity_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     has_identity_middle = 'identityMiddleName' in df.columns
     has_match_type = 'nameMatchFirstType' in df.columns
 
+    # Normalize names for comparison (each distinct spelling once)
     if has_article_first and 'identityFirstName' in df.columns:
-        # Normalize names for comparison
-        id_first = df['identityFirstName'].fillna('').astype(str).str.strip().str.lower()
-        art_first = df['articleAuthorFirstName'].fillna('').astype(str).str.strip().str.lower()
+        id_first = _map_distinct(df['identityFirstName'], _normalize_name)
+        art_first = _map_distinct(df['articleAuthorFirstName'], _normalize_name)
 
         # 13. nameJaroWinkler: Jaro-Winkler similarity between identity and article first names
-        df['nameJaroWinkler'] = [
-            _jaro_winkler_similarity(a, b) for a, b in zip(id_first, art_first)
-        ]
-
         # 14. nameEditDistanceNorm: normalized edit distance similarity
-        df['nameEditDistanceNorm'] = [
-            1.0 - _levenshtein_distance(a, b) / max(len(a), len(b), 1)
-            for a, b in zip(id_first, art_first)
-        ]
+        #     Both computed once per distinct (identity, article) name pair.
+        sims = [_first_name_similarity(a, b) for a, b in zip(id_first, art_first)]
+        df['nameJaroWinkler'] = [jw for jw, _ in sims]
+        df['nameEditDistanceNorm'] = [ed for _, ed in sims]
 
         # 15. forenameLengthRatio: article first name length / identity first name length
         id_len = id_first.str.len().clip(lower=1)
@@ -477,9 +563,7 @@ def _compute_identity_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
 
     # 16. firstMiddleCoverage: how much of PubMed ForeName is explained by identity first+middle
     if has_article_first and 'identityFirstName' in df.columns and has_identity_middle:
-        id_first = df['identityFirstName'].fillna('').astype(str).str.strip().str.lower()
-        id_middle = df['identityMiddleName'].fillna('').astype(str).str.strip().str.lower()
-        art_first = df['articleAuthorFirstName'].fillna('').astype(str).str.strip().str.lower()
+        id_middle = _map_distinct(df['identityMiddleName'], _normalize_name)
         combined_len = id_first.str.len() + id_middle.str.len()
         art_len = art_first.str.len().clip(lower=1)
         df['firstMiddleCoverage'] = combined_len / art_len
@@ -531,12 +615,8 @@ def compute_derived_features_feedback_identity(df: pd.DataFrame) -> pd.DataFrame
             df[col] = df[col].clip(lower=0)
 
     # 1. Acceptance Rate Lower Bound (Wilson score)
-    df['acceptanceRateLowerBound'] = df.apply(
-        lambda row: wilson_lower_bound(
-            row['countAccepted'],
-            row['countRejected'],
-            confidence=0.95
-        ), axis=1
+    df['acceptanceRateLowerBound'] = wilson_lower_bound_array(
+        df['countAccepted'], df['countRejected'], confidence=0.95
     )
 
     # 2. Feedback Confidence (log-scaled total feedback)
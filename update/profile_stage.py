@@ -0,0 +1,43 @@
+"""
+profile_stage.py -- run a pipeline script under cProfile.
+
+    python3 profile_stage.py OUT.pstats script.py [args ...]
+
+Used by run_all.py for stages named in PIPELINE_PROFILE_STAGES. Unlike
+`python3 -m cProfile -o`, which swallows SystemExit and always exits 0, this
+preserves the script's exit code (so a profiled stage still fails the
+pipeline when it should) and writes the stats even when the script exits
+non-zero or is terminated by run_all's timeout (SIGTERM).
+
+cProfile sees only the main thread; for thread-pool stages set
+PIPELINE_PROFILER=py-spy (when py-spy is installed) to sample every thread.
+"""
+
+import cProfile
+import runpy
+import signal
+import sys
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    out_path, script, args = sys.argv[1], sys.argv[2], sys.argv[3:]
+    sys.argv = [script, *args]
+
+    # Turn run_all's SIGTERM into SystemExit so the finally block still runs.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    profiler = cProfile.Profile()
+    exit_code = 0
+    try:
+        profiler.runcall(runpy.run_path, script, run_name="__main__")
+    except SystemExit as e:
+        exit_code = e.code
+    finally:
+        profiler.dump_stats(out_path)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# pubmedEnrichment.py
+#
+# Single-pass PubMedArticle enrichment for the post-indexing steps.
+#
+# abstractImport.py and conflictsImport.py each compute their own missing-PMID
+# set and read the same PubMedArticle items from DynamoDB. After a rebuild
+# nearly every PMID is missing from both, so the same articles were read
+# twice. This stage computes every field's missing set, reads each needed
+# PMID once with a projection covering all the fields it lacks, and hands
+# each extracted value to that field's writer.
+#
+# Adding a per-article field (e.g. MeSH, publication types) means adding an
+# entry to ENRICHMENTS: a DynamoDB path, an extractor, a missing-PMID query
+# and a writer. The standalone importers remain usable on their own.
+
+import concurrent.futures
+import logging
+import queue
+import sys
+import threading
+import time
+
+import abstractImport
+import conflictsImport
+import pipeline_metrics
+from pubmed_article import (
+    ABSTRACT_PATH,
+    CHUNK_SIZE,
+    COI_STATEMENT_PATH,
+    batch_get_articles,
+    get_abstract,
+    get_coi_statement,
+)
+
+logging.basicConfig(
+    stream=sys.stdout,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+logging.getLogger("botocore").setLevel(logging.WARNING)
+logging.getLogger("boto3").setLevel(logging.WARNING)
+
+# ------------------------------------------------------------------------------
+# Settings
+# ------------------------------------------------------------------------------
+MAX_WORKERS = 5               # Threads for parallel fetching
+WRITE_QUEUE_CHUNKS = 2 * MAX_WORKERS  # Fetched chunks buffered ahead of the writer
+PROGRESS_LOG_INTERVAL = 100   # Log writer progress every N chunks
+MAX_CYCLES = 25               # Hard cap on fetch/write cycles; a healthy run needs 1-2
+
+# One entry per reporting table fed from PubMedArticle.
+#   path           nested DynamoDB attribute to project
+#   extract(item)  value to store; "" when the article has none
+#   fetch_missing  (conn) -> PMIDs lacking a row in the reporting table
+#   write          (conn, [(pmid, value), ...]) -> rows inserted
+ENRICHMENTS = [
+    {
+        "name": "abstract",
+        "table": "reporting_abstracts",
+        "path": ABSTRACT_PATH,
+        "extract": get_abstract,
+        "fetch_missing": abstractImport.fetch_missing_pmids,
+        "write": abstractImport.insert_abstracts,
+    },
+    {
+        "name": "coiStatement",
+        "table": "reporting_conflicts",
+        "path": COI_STATEMENT_PATH,
+        "extract": get_coi_statement,
+        "fetch_missing": conflictsImport.fetch_missing_pmids,
+        "write": conflictsImport.insert_conflicts,
+    },
+]
+
+
+# ------------------------------------------------------------------------------
+# Plan
+# ------------------------------------------------------------------------------
+def fetch_missing(mysql_conn):
+    """Returns {enrichment name: set of PMIDs missing that field}."""
+    missing = {}
+    for enrichment in ENRICHMENTS:
+        missing[enrichment["name"]] = set(enrichment["fetch_missing"](mysql_conn))
+        logger.info(
+            f"{len(missing[enrichment['name']])} PMID(s) missing from {enrichment['table']}."
+        )
+    return missing
+
+
+# ------------------------------------------------------------------------------
+# Fetch + extract
+# ------------------------------------------------------------------------------
+def enrich_chunk(chunk_pmids, missing):
+    """
+    Reads one chunk of PMIDs once, projecting every field any of them lacks,
+    and returns {enrichment name: [(pmid, value), ...]} restricted to the
+    PMIDs that actually lack each field.
+    """
+    wanted = [e for e in ENRICHMENTS if any(p in missing[e["name"]] for p in chunk_pmids)]
+    rows = {e["name"]: [] for e in wanted}
+
+    for item in batch_get_articles(chunk_pmids, [e["path"] for e in wanted]):
+        pmid = item.get("pmid")
+        if pmid is None:
+            continue
+        for enrichment in wanted:
+            if pmid in missing[enrichment["name"]]:
+                rows[enrichment["name"]].append((pmid, enrichment["extract"](item)))
+    return rows
+
+
+def enrich(mysql_conn, missing):
+    """
+    Fetches every PMID in the union of the missing sets once, in parallel,
+    and streams each chunk's rows to a single writer thread that owns
+    mysql_conn (same bounded-queue pipeline as abstractImport). Returns
+    {enrichment name: rows inserted}.
+    """
+    pmids = sorted(set().union(*missing.values()))
+    chunks = [pmids[i:i + CHUNK_SIZE] for i in range(0, len(pmids), CHUNK_SIZE)]
+    logger.info(f"Reading {len(pmids)} distinct PMID(s) in {len(chunks)} chunk(s).")
+
+    writers = {e["name"]: e["write"] for e in ENRICHMENTS}
+    inserted = {e["name"]: 0 for e in ENRICHMENTS}
+    results_queue = queue.Queue(maxsize=WRITE_QUEUE_CHUNKS)
+    writer_state = {"chunks": 0, "error": None}
+
+    def writer():
+        while True:
+            rows = results_queue.get()
+            if rows is None:
+                return
+            # After a write error keep draining so fetchers never block on put().
+            if writer_state["error"] is not None:
+                continue
+            try:
+                for name, field_rows in rows.items():
+                    inserted[name] += writers[name](mysql_conn, field_rows)
+            except Exception as e:
+                logger.exception(f"Error writing enrichment rows: {e}")
+                writer_state["error"] = e
+                continue
+            writer_state["chunks"] += 1
+            if writer_state["chunks"] % PROGRESS_LOG_INTERVAL == 0:
+                logger.info(f"Wrote {writer_state['chunks']}/{len(chunks)} chunk(s); {inserted}")
+
+    def fetch_and_enqueue(chunk):
+        results_queue.put(enrich_chunk(chunk, missing))
+
+    writer_thread = threading.Thread(target=writer, name="enrichment-writer", daemon=True)
+    writer_thread.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(fetch_and_enqueue, c) for c in chunks]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception(f"Error fetching chunk: {e}")
+    finally:
+        results_queue.put(None)
+        writer_thread.join()
+
+    if writer_state["error"] is not None:
+        raise writer_state["error"]
+
+    for enrichment in ENRICHMENTS:
+        logger.info(
+            f"{time.ctime()} -- Inserted {inserted[enrichment['name']]} row(s) "
+            f"into {enrichment['table']}."
+        )
+        pipeline_metrics.add(rows_loaded={enrichment["table"]: inserted[enrichment["name"]]})
+    return inserted
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+def main():
+    mysql_conn = abstractImport.connect_mysql_server(
+        abstractImport.DB_USERNAME, abstractImport.DB_PASSWORD,
+        abstractImport.DB_HOST, abstractImport.DB_NAME,
+    )
+
+    prev_missing = None
+    for cycle in range(1, MAX_CYCLES + 1):
+        missing = fetch_missing(mysql_conn)
+        total_missing = sum(len(p) for p in missing.values())
+        if not total_missing:
+            logger.info("Nothing missing. We are done.")
+            break
+
+        logger.info(f"Cycle {cycle}: {total_missing} missing (pmid, field) pair(s).")
+
+        # Safety net: PMIDs with no DynamoDB record can never be filled, so
+        # stop as soon as a cycle makes no progress (see abstractImport).
+        if prev_missing is not None and total_missing >= prev_missing:
+            logger.warning(
+                f"No progress since the previous cycle ({total_missing} still "
+                f"missing); stopping. These PMIDs have no retrievable record."
+            )
+            break
+        prev_missing = total_missing
+
+        enrich(mysql_conn, missing)
+    else:
+        logger.warning(
+            f"Reached the {MAX_CYCLES}-cycle safety limit with fields still "
+            f"missing; stopping. A healthy run converges in 1-2 cycles -- investigate."
+        )
+
+    mysql_conn.close()
+    logger.info("PubMed enrichment complete.")
+
+
+if __name__ == "__main__":
+    main()
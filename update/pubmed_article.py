@@ -0,0 +1,166 @@
+"""
+pubmed_article.py -- shared read path for the PubMedArticle DynamoDB table.
+
+abstractImport.py, conflictsImport.py and auditAbstracts.py each need one or
+two fields of a PubMedArticle item, but a plain batch_get_item returns the
+whole MEDLINE citation (author lists, MeSH, references). Reads here always
+go through a ProjectionExpression naming just the nested attributes the
+caller asked for, which cuts read capacity, transfer bytes and decode time
+per item.
+
+Projected items keep their nesting, so the extractors below work the same
+on projected and full items. A PMID with a DynamoDB record always comes
+back with at least its `pmid` key, even when none of the requested paths
+exist on it; callers use that to tell "missing in DynamoDB" from "empty".
+"""
+
+import hashlib
+import logging
+import random
+import time
+
+import boto3
+
+import pipeline_metrics
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "PubMedArticle"
+CHUNK_SIZE = 100              # Max keys per batch_get_item call (DynamoDB hard limit)
+MAX_UNPROCESSED_RETRIES = 8   # Backoff retries for keys DynamoDB reports as unprocessed
+
+# Nested attribute paths, dot-separated.
+ABSTRACT_PATH = "pubmedarticle.medlinecitation.article.publicationAbstract"
+COI_STATEMENT_PATH = "pubmedarticle.medlinecitation.coiStatement"
+
+
+def build_projection(paths):
+    """
+    Returns (ProjectionExpression, ExpressionAttributeNames) for the key plus
+    the given dot-separated paths. Every path component is aliased, so
+    DynamoDB reserved words can never break the expression.
+    """
+    names = {}
+    aliases = {}
+
+    def alias(component):
+        if component not in aliases:
+            aliases[component] = f"#a{len(aliases)}"
+            names[aliases[component]] = component
+        return aliases[component]
+
+    expressions = [alias("pmid")]
+    for path in paths:
+        expressions.append(".".join(alias(c) for c in path.split(".")))
+    return ", ".join(expressions), names
+
+
+def batch_get_articles(chunk_pmids, paths, client=None):
+    """
+    Fetches one chunk (<= CHUNK_SIZE) of PMIDs via batch_get_item, projecting
+    only `paths`. Keys that DynamoDB reports as unprocessed (throttling) are
+    retried with jittered exponential backoff so they are not silently lost.
+    Consumed read capacity is reported to pipeline_metrics. Returns the
+    projected items.
+    """
+    if client is None:
+        client = boto3.resource("dynamodb").meta.client
+
+    projection, names = build_projection(paths)
+    request_items = {
+        TABLE_NAME: {
+            "Keys": [{"pmid": pmid} for pmid in chunk_pmids],
+            "ProjectionExpression": projection,
+            "ExpressionAttributeNames": names,
+        }
+    }
+    items = []
+    attempt = 0
+
+    while request_items:
+        response = client.batch_get_item(
+            RequestItems=request_items, ReturnConsumedCapacity="TOTAL"
+        )
+        returned = response["Responses"].get(TABLE_NAME, [])
+        items.extend(returned)
+        pipeline_metrics.add(
+            api_calls={"dynamodb": 1},
+            dynamodb_items=len(returned),
+            dynamodb_rcu=sum(c.get("CapacityUnits", 0) for c in response.get("ConsumedCapacity", [])),
+        )
+
+        # UnprocessedKeys echoes the projection, so it can be resent as-is.
+        request_items = response.get("UnprocessedKeys") or {}
+        if request_items:
+            attempt += 1
+            if attempt > MAX_UNPROCESSED_RETRIES:
+                remaining = len(request_items.get(TABLE_NAME, {}).get("Keys", []))
+                logger.warning(
+                    f"{remaining} key(s) still unprocessed after "
+                    f"{MAX_UNPROCESSED_RETRIES} retries; skipping this chunk's remainder."
+                )
+                break
+            time.sleep(min(0.1 * (2 ** attempt), 5.0) + random.uniform(0, 0.1))
+
+    return items
+
+
+def get_abstract(item):
+    """
+    Extracts the abstract text from a PubMedArticle item. Handles labeled
+    abstract segments. Returns "" when no abstract is present.
+    """
+    medline_citation = item.get("pubmedarticle", {}).get("medlinecitation")
+    if not medline_citation:
+        return ""
+
+    article = medline_citation.get("article")
+    if not article:
+        return ""
+
+    publication_abstract = article.get("publicationAbstract")
+    if not publication_abstract:
+        return ""
+
+    abstract_texts = []
+    for abstract_part in publication_abstract.get("abstractTexts", []):
+        label = abstract_part.get("abstractTextLabel")
+        text = abstract_part.get("abstractText")
+        if text:
+            label_text = f"{label}: " if label else ""
+            abstract_texts.append(label_text + text)
+
+    return " ".join(abstract_texts) if abstract_texts else ""
+
+
+def get_coi_statement(item):
+    """
+    Extracts the conflict-of-interest statement from a PubMedArticle item.
+    Returns "" when none is present.
+    """
+    medline_citation = item.get("pubmedarticle", {}).get("medlinecitation")
+    if medline_citation:
+        return medline_citation.get("coiStatement") or ""
+    return ""
+
+
+def normalize_abstract(text):
+    """
+    Canonical form of an abstract for comparison: CRLF folded to LF and
+    surrounding whitespace stripped (the same normalization classify() in
+    auditAbstracts.py applies before comparing strings).
+    """
+    return text.replace("\r\n", "\n").strip()
+
+
+def abstract_hash(text):
+    """
+    SHA-1 hex digest of the normalized abstract, as stored in
+    reporting_abstracts.abstractHash. Accepts the str from get_abstract or
+    the raw bytes of the MariaDB BLOB. Returns None for None.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode("utf-8", errors="replace")
+    return hashlib.sha1(normalize_abstract(text).encode("utf-8")).hexdigest()
@@ -2,14 +2,19 @@
 repairAbstracts.py -- one-shot cleanup of reporting_abstracts rows flagged
 as corrupted by update/auditAbstracts.py.
 
-Reads audit_abstracts.csv (the audit output) and:
+Reads audit_abstracts.csv (the audit output), loads the invalid PMIDs into
+an indexed temporary table once, and:
   1. Backs up the affected rows to reporting_abstracts_corrupt_backup_<ts>.
-  2. Deletes the corrupted rows from reporting_abstracts in batches.
+  2. Deletes the corrupted rows from reporting_abstracts.
   3. Dedupes any remaining pmids that have multiple rows by keeping the
      row with MIN(id) and backing up the rest to the same backup table.
      (Precondition for the v1.4 UNIQUE KEY migration.)
   4. Verifies post-state row counts and confirms no duplicate pmids remain.
 
+Counts, backups and deletes are joins against the temporary table rather
+than IN (...) lists, each run in --batch-size slices of the table's
+sequence column so a progress meter can be logged between statements.
+
 After this script runs, the next nightly update/abstractImport.py will
 re-fetch the deleted PMIDs cleanly via the parameterized executemany
 path introduced in PR #78.
@@ -28,6 +33,7 @@ import logging
 import os
 import re
 import sys
+import time
 
 import pymysql.cursors
 import pymysql.err
@@ -35,7 +41,12 @@ import pymysql.err
 
 INVALID_VERDICTS = {"PREFIX_CORRUPTED", "DISJOINT", "EMPTY_IN_DYNAMO"}
 DEFAULT_AUDIT_CSV = "audit_abstracts.csv"
-DEFAULT_BATCH_SIZE = 500
+DEFAULT_BATCH_SIZE = 10000
+
+# Session-scoped work tables. `seq` numbers the rows 1..N so each batched
+# statement can take an exact slice with a primary-key range.
+INVALID_PMIDS_TABLE = "repair_invalid_pmids"
+DUPLICATE_IDS_TABLE = "repair_duplicate_ids"
 
 # Identifier safety: the backup-table suffix is timestamp-derived, but
 # allow callers to override with --backup-table; whitelist the shape to
@@ -81,20 +92,57 @@ def read_invalid_pmids(audit_csv):
     })
 
 
-def count_matching(cur, pmids, batch=5000):
-    """COUNT(*) of rows whose pmid is in `pmids`, batched to avoid
-    oversized IN-lists. Returns the sum across batches."""
-    total = 0
-    for i in range(0, len(pmids), batch):
-        chunk = pmids[i:i + batch]
-        placeholders = ",".join(["%s"] * len(chunk))
-        cur.execute(
-            f"SELECT COUNT(*) AS c FROM reporting_abstracts "
-            f"WHERE pmid IN ({placeholders})",
-            chunk,
-        )
-        total += cur.fetchone()["c"]
-    return total
+def load_invalid_pmids(cur, pmids):
+    """Load `pmids` into the INVALID_PMIDS_TABLE temporary table. pymysql
+    folds the executemany into multi-row INSERTs, so this is a handful of
+    round trips however long the list is."""
+    cur.execute(f"DROP TEMPORARY TABLE IF EXISTS `{INVALID_PMIDS_TABLE}`")
+    cur.execute(
+        f"CREATE TEMPORARY TABLE `{INVALID_PMIDS_TABLE}` ("
+        "  seq int NOT NULL AUTO_INCREMENT,"
+        "  pmid int NOT NULL,"
+        "  PRIMARY KEY (seq),"
+        "  UNIQUE KEY pmid (pmid)"
+        ") ENGINE=InnoDB"
+    )
+    cur.executemany(
+        f"INSERT INTO `{INVALID_PMIDS_TABLE}` (pmid) VALUES (%s)",
+        [(p,) for p in pmids],
+    )
+    return len(pmids)
+
+
+def log_progress(label, done, total, started):
+    elapsed = time.monotonic() - started
+    pct = 100.0 * done / total if total else 100.0
+    eta = elapsed / done * (total - done) if done else 0.0
+    logger.info(
+        f"  ... {label}: {done:,}/{total:,} ({pct:5.1f}%) "
+        f"elapsed {elapsed:,.0f}s, eta {eta:,.0f}s"
+    )
+
+
+def run_in_slices(cur, sql, total, batch, label):
+    """Execute `sql` once per `batch`-sized slice of seq values 1..total.
+    `sql` takes the slice bounds as two parameters (seq > %s AND seq <= %s).
+    Returns the summed rowcount."""
+    affected = 0
+    started = time.monotonic()
+    for lo in range(0, total, batch):
+        hi = min(lo + batch, total)
+        cur.execute(sql, (lo, hi))
+        affected += cur.rowcount
+        log_progress(label, hi, total, started)
+    return affected
+
+
+def count_matching(cur):
+    """COUNT(*) of live rows whose pmid is in the invalid-PMID table."""
+    cur.execute(
+        f"SELECT COUNT(*) AS c FROM reporting_abstracts ra "
+        f"JOIN `{INVALID_PMIDS_TABLE}` t ON t.pmid = ra.pmid"
+    )
+    return cur.fetchone()["c"]
 
 
 def writable_columns(cur, table="reporting_abstracts"):
@@ -111,38 +159,29 @@ def writable_columns(cur, table="reporting_abstracts"):
     return [r["column_name"] for r in cur.fetchall()]
 
 
-def backup_rows(cur, pmids, backup_table, batch):
+def backup_rows(cur, backup_table, total, batch):
     cur.execute(f"CREATE TABLE `{backup_table}` LIKE reporting_abstracts")
     cols = writable_columns(cur)
     col_list = ", ".join(f"`{c}`" for c in cols)
-    inserted = 0
-    for i in range(0, len(pmids), batch):
-        chunk = pmids[i:i + batch]
-        placeholders = ",".join(["%s"] * len(chunk))
-        cur.execute(
-            f"INSERT INTO `{backup_table}` ({col_list}) "
-            f"SELECT {col_list} FROM reporting_abstracts WHERE pmid IN ({placeholders})",
-            chunk,
-        )
-        inserted += cur.rowcount
-        if (i // batch) % 5 == 0:
-            logger.info(f"  ... backed up {inserted:,} rows")
-    return inserted
-
-
-def delete_rows(cur, pmids, batch):
-    deleted = 0
-    for i in range(0, len(pmids), batch):
-        chunk = pmids[i:i + batch]
-        placeholders = ",".join(["%s"] * len(chunk))
-        cur.execute(
-            f"DELETE FROM reporting_abstracts WHERE pmid IN ({placeholders})",
-            chunk,
-        )
-        deleted += cur.rowcount
-        if (i // batch) % 5 == 0:
-            logger.info(f"  ... deleted {deleted:,} rows")
-    return deleted
+    select_list = ", ".join(f"ra.`{c}`" for c in cols)
+    return run_in_slices(
+        cur,
+        f"INSERT INTO `{backup_table}` ({col_list}) "
+        f"SELECT {select_list} FROM reporting_abstracts ra "
+        f"JOIN `{INVALID_PMIDS_TABLE}` t ON t.pmid = ra.pmid "
+        "WHERE t.seq > %s AND t.seq <= %s",
+        total, batch, "backed up (pmids)",
+    )
+
+
+def delete_rows(cur, total, batch):
+    return run_in_slices(
+        cur,
+        f"DELETE ra FROM reporting_abstracts ra "
+        f"JOIN `{INVALID_PMIDS_TABLE}` t ON t.pmid = ra.pmid "
+        "WHERE t.seq > %s AND t.seq <= %s",
+        total, batch, "deleted (pmids)",
+    )
 
 
 def find_duplicate_pmids(cur, limit=10):
@@ -154,46 +193,65 @@ def find_duplicate_pmids(cur, limit=10):
     return cur.fetchall()
 
 
-def count_duplicate_extras(cur):
-    """Returns (group_count, extra_row_count). extra_row_count is the number
-    of rows that would need to be deleted to leave one row per pmid."""
+def collect_duplicate_extras(cur):
+    """Materialize the id of every duplicate row except the MIN(id) keeper
+    for each pmid into DUPLICATE_IDS_TABLE, so the count, backup and delete
+    below share one GROUP BY scan. Returns (group_count, extra_row_count);
+    extra_row_count is the number of rows that would need to be deleted to
+    leave one row per pmid."""
+    cur.execute(f"DROP TEMPORARY TABLE IF EXISTS `{DUPLICATE_IDS_TABLE}`")
+    cur.execute(
+        f"CREATE TEMPORARY TABLE `{DUPLICATE_IDS_TABLE}` ("
+        "  seq int NOT NULL AUTO_INCREMENT,"
+        "  id int NOT NULL,"
+        "  pmid int DEFAULT NULL,"
+        "  PRIMARY KEY (seq),"
+        "  UNIQUE KEY id (id)"
+        ") ENGINE=InnoDB"
+    )
+    cur.execute(
+        f"INSERT INTO `{DUPLICATE_IDS_TABLE}` (id, pmid) "
+        "SELECT ra.id, ra.pmid FROM reporting_abstracts ra "
+        "JOIN ("
+        "  SELECT pmid, MIN(id) AS keep_id FROM reporting_abstracts "
+        "  GROUP BY pmid HAVING COUNT(*) > 1"
+        ") k ON k.pmid = ra.pmid AND ra.id <> k.keep_id "
+        "ORDER BY ra.id"
+    )
     cur.execute(
-        "SELECT COUNT(*) AS groups, COALESCE(SUM(c - 1), 0) AS extras FROM ("
-        "  SELECT COUNT(*) AS c FROM reporting_abstracts GROUP BY pmid HAVING c > 1"
-        ") d"
+        f"SELECT COUNT(DISTINCT pmid) AS `groups`, COUNT(*) AS extras "
+        f"FROM `{DUPLICATE_IDS_TABLE}`"
     )
     r = cur.fetchone()
     return r["groups"], r["extras"]
 
 
-def backup_duplicate_extras(cur, backup_table):
-    """Insert into the backup table every duplicate row except the MIN(id)
-    keeper for each pmid. Returns the number of rows backed up."""
+def backup_duplicate_extras(cur, backup_table, total, batch):
+    """Insert the rows collected by collect_duplicate_extras() into the
+    backup table. Returns the number of rows backed up."""
     cols = writable_columns(cur)
     col_list = ", ".join(f"`{c}`" for c in cols)
     select_list = ", ".join(f"ra.`{c}`" for c in cols)
-    cur.execute(
+    return run_in_slices(
+        cur,
         f"INSERT INTO `{backup_table}` ({col_list}) "
         f"SELECT {select_list} FROM reporting_abstracts ra "
-        "JOIN ("
-        "  SELECT pmid, MIN(id) AS keep_id FROM reporting_abstracts "
-        "  GROUP BY pmid HAVING COUNT(*) > 1"
-        ") k ON k.pmid = ra.pmid AND ra.id <> k.keep_id"
+        f"JOIN `{DUPLICATE_IDS_TABLE}` d ON d.id = ra.id "
+        "WHERE d.seq > %s AND d.seq <= %s",
+        total, batch, "backed up (duplicates)",
     )
-    return cur.rowcount
 
 
-def delete_duplicate_extras(cur):
-    """Delete every duplicate row except the MIN(id) keeper for each pmid.
-    Returns the number of rows deleted."""
-    cur.execute(
-        "DELETE ra FROM reporting_abstracts ra "
-        "JOIN ("
-        "  SELECT pmid, MIN(id) AS keep_id FROM reporting_abstracts "
-        "  GROUP BY pmid HAVING COUNT(*) > 1"
-        ") k ON k.pmid = ra.pmid AND ra.id <> k.keep_id"
+def delete_duplicate_extras(cur, total, batch):
+    """Delete the rows collected by collect_duplicate_extras(). Returns the
+    number of rows deleted."""
+    return run_in_slices(
+        cur,
+        f"DELETE ra FROM reporting_abstracts ra "
+        f"JOIN `{DUPLICATE_IDS_TABLE}` d ON d.id = ra.id "
+        "WHERE d.seq > %s AND d.seq <= %s",
+        total, batch, "deleted (duplicates)",
     )
-    return cur.rowcount
 
 
 def main():
@@ -203,7 +261,7 @@ def main():
     parser.add_argument("--apply", action="store_true",
                         help="Perform the delete. Without this flag, dry-run only.")
     parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
-                        help=f"PMIDs per statement (default {DEFAULT_BATCH_SIZE})")
+                        help=f"PMIDs / row ids per statement (default {DEFAULT_BATCH_SIZE})")
     parser.add_argument("--backup-table", default=None,
                         help="Backup table name (default: reporting_abstracts_corrupt_backup_<ts>)")
     args = parser.parse_args()
@@ -228,7 +286,8 @@ def main():
             cur.execute("SELECT COUNT(*) AS c FROM reporting_abstracts")
             before_total = cur.fetchone()["c"]
 
-            matching = count_matching(cur, pmids)
+            load_invalid_pmids(cur, pmids)
+            matching = count_matching(cur)
             logger.info(
                 f"reporting_abstracts: {before_total:,} rows total; "
                 f"{matching:,} rows match the invalid-PMID list."
@@ -238,7 +297,7 @@ def main():
                 logger.info(
                     f"Live matches ({matching:,}) > unique PMIDs ({len(pmids):,}): "
                     f"{matching - len(pmids):,} of the audited PMIDs have multiple "
-                    "rows in the live table (all of which will be deleted by the IN clause)."
+                    "rows in the live table (all of which will be deleted by the join)."
                 )
             elif matching < len(pmids):
                 logger.warning(
@@ -247,7 +306,7 @@ def main():
                     "(already deleted or table changed). Proceeding with what is live."
                 )
 
-            dupe_groups, dupe_extras = count_duplicate_extras(cur)
+            dupe_groups, dupe_extras = collect_duplicate_extras(cur)
             logger.info(
                 f"Duplicate-pmid groups: {dupe_groups:,} "
                 f"({dupe_extras:,} extra rows would be deduped after the corruption delete)."
@@ -271,7 +330,7 @@ def main():
                 return
 
             logger.info(f"Creating backup table `{backup_table}` ...")
-            backed_up = backup_rows(cur, pmids, backup_table, args.batch_size)
+            backed_up = backup_rows(cur, backup_table, len(pmids), args.batch_size)
             logger.info(f"Backed up {backed_up:,} rows to `{backup_table}`.")
             if backed_up != matching:
                 logger.error(
@@ -280,7 +339,7 @@ def main():
                 sys.exit(1)
 
             logger.info("Deleting corrupted rows from reporting_abstracts ...")
-            deleted = delete_rows(cur, pmids, args.batch_size)
+            deleted = delete_rows(cur, len(pmids), args.batch_size)
 
             cur.execute("SELECT COUNT(*) AS c FROM reporting_abstracts")
             after_total = cur.fetchone()["c"]
@@ -313,13 +372,15 @@ def main():
                 "(should be 0 if repair caught all corruption)."
             )
 
-            dupe_groups_after, dupe_extras_after = count_duplicate_extras(cur)
+            dupe_groups_after, dupe_extras_after = collect_duplicate_extras(cur)
             if dupe_extras_after > 0:
                 logger.info(
                     f"Phase 2: deduping {dupe_extras_after:,} extra rows across "
                     f"{dupe_groups_after:,} pmid groups (keeping MIN(id) per pmid)..."
                 )
-                backed_up_dupes = backup_duplicate_extras(cur, backup_table)
+                backed_up_dupes = backup_duplicate_extras(
+                    cur, backup_table, dupe_extras_after, args.batch_size
+                )
                 logger.info(f"  ... backed up {backed_up_dupes:,} duplicate rows to `{backup_table}`.")
                 if backed_up_dupes != dupe_extras_after:
                     logger.error(
@@ -327,7 +388,7 @@ def main():
                         "Aborting before delete."
                     )
                     sys.exit(1)
-                deleted_dupes = delete_duplicate_extras(cur)
+                deleted_dupes = delete_duplicate_extras(cur, dupe_extras_after, args.batch_size)
                 logger.info(f"  ... deleted {deleted_dupes:,} duplicate rows.")
                 if deleted_dupes != dupe_extras_after:
                     logger.error(
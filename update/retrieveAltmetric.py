@@ -1,14 +1,115 @@
-import json
 import os
+import sys
 import time
-import urllib.request
+import random
+import threading
 import logging
+import itertools
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
 import pymysql.cursors
 import pymysql.err
 
 
 # Configure logging to output to stdout
 logging.basicConfig(stream=sys.stdout, level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Altmetric rate limits depend on the API tier. The free tier allows
+# 1 call/second; keyed tiers allow more. Both the sustained rate and the
+# burst size are configurable so the fetcher can run at whatever our key
+# permits without a code change.
+ALTMETRIC_API_KEY = os.getenv('ALTMETRIC_API_KEY')
+ALTMETRIC_RATE_PER_SEC = float(os.getenv('ALTMETRIC_RATE_PER_SEC', '1'))
+ALTMETRIC_BURST = int(os.getenv('ALTMETRIC_BURST', '1'))
+ALTMETRIC_MAX_WORKERS = int(os.getenv('ALTMETRIC_MAX_WORKERS', '4'))
+ALTMETRIC_MAX_RETRIES = int(os.getenv('ALTMETRIC_MAX_RETRIES', '5'))
+PROGRESS_LOG_INTERVAL = 1000  # log a progress line every N URLs
+
+ALTMETRIC_API_BASE_URL = "https://api.altmetric.com/v1/doi/"
+
+# get_json_data/get_altmetric_record result for a 404: Altmetric has no record
+# for the DOI. Distinct from None (transient failure, outcome unknown).
+NOT_FOUND = object()
+
+# Incremental refresh. Each run asks Altmetric about at most
+# ALTMETRIC_REFRESH_BUDGET DOIs, highest priority first: DOIs never fetched,
+# then the longest-unrefreshed, weighted up by how much of their score was
+# accrued in the last month. DOIs refreshed within ALTMETRIC_MIN_REFRESH_DAYS
+# are skipped unless they gained attention in the last week.
+ALTMETRIC_REFRESH_BUDGET = int(os.getenv('ALTMETRIC_REFRESH_BUDGET', '50000'))
+ALTMETRIC_MIN_REFRESH_DAYS = float(os.getenv('ALTMETRIC_MIN_REFRESH_DAYS', '7'))
+VOLATILITY_WEIGHT = 4.0
+WRITE_BATCH_SIZE = 500  # records per upsert into the staging table
+IN_FLIGHT_PER_WORKER = 4  # queued requests per worker; bounds memory
+
+# Column order matches the tuple built by get_altmetric_record().
+ALTMETRIC_COLUMNS = [
+    'doi',
+    'pmid',
+    'altmetric_jid',
+    'context-all-count',
+    'context-all-mean',
+    'context-all-rank',
+    'context-all-pct',
+    'context-all-higher_than',
+    'context-similar_age_3m-count',
+    'context-similar_age_3m-mean',
+    'context-similar_age_3m-rank',
+    'context-similar_age_3m-pct',
+    'context-similar_age_3m-higher_than',
+    'altmetric_id',
+    'cited_by_msm_count',
+    'cited_by_posts_count',
+    'cited_by_tweeters_count',
+    'cited_by_feeds_count',
+    'cited_by_fbwalls_count',
+    'cited_by_rh_count',
+    'cited_by_accounts_count',
+    'last_updated',
+    'score',
+    'history-1y',
+    'history-6m',
+    'history-3m',
+    'history-1m',
+    'history-1w',
+    'history-at',
+    'added_on',
+    'published_on',
+    'readers-mendeley',
+]
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all fetcher threads.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    acquire() blocks until a token is available, so the aggregate request
+    rate across every worker never exceeds the configured tier.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
 
 def connect_mysql_server(username, db_password, db_hostname, database_name):
     """Establish a connection to MySQL or MariaDB server. This function is
@@ -29,44 +130,144 @@ def connect_mysql_server(username, db_password, db_hostname, database_name):
                            host=db_hostname,
                            database=database_name)
 
-def truncate_altmetric(mysql_cursor):
-    """This function will delete all rows in the altmetric table when called.
+def create_altmetric_staging(mysql_db, mysql_cursor, candidate_doi):
+    """Create altmetric_new as a copy of the altmetric rows still in scope.
+
+    Rows for DOIs that are no longer candidates (e.g. aged out of the 2-year
+    window) are left behind; everything else is carried over so DOIs that
+    are not refreshed this run keep their last known values.
 
     Args:
+        mysql_db (MySQLConnection object): The MySQL database where the table resides.
         mysql_cursor (CMySQLCursor): Executes an SQL query against the database.
+        candidate_doi (list): Lowercased DOIs currently in scope.
     """
-    truncate_altmetric_query = (
+    mysql_cursor.execute("DROP TABLE IF EXISTS altmetric_new")
+    mysql_cursor.execute("CREATE TABLE altmetric_new LIKE altmetric")
+
+    mysql_cursor.execute("DROP TEMPORARY TABLE IF EXISTS _altmetric_candidate_doi")
+    mysql_cursor.execute(
         """
-        truncate altmetric;
+        CREATE TEMPORARY TABLE _altmetric_candidate_doi (
+            doi varchar(128) NOT NULL,
+            PRIMARY KEY (doi)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
     )
+    for i in range(0, len(candidate_doi), WRITE_BATCH_SIZE * 10):
+        mysql_cursor.executemany(
+            "INSERT IGNORE INTO _altmetric_candidate_doi (doi) VALUES (%s)",
+            candidate_doi[i:i + WRITE_BATCH_SIZE * 10])
 
-    mysql_cursor.execute(truncate_altmetric_query)
-    print(time.ctime() + "--" + "Existing altmetric table truncated.")
+    mysql_cursor.execute(
+        """
+        INSERT INTO altmetric_new
+        SELECT a.*
+        FROM altmetric a
+        JOIN _altmetric_candidate_doi c ON c.doi = a.doi
+        """
+    )
+    carried_over = mysql_cursor.rowcount
+    mysql_cursor.execute("DROP TEMPORARY TABLE _altmetric_candidate_doi")
+    mysql_db.commit()
+    logger.info("Created altmetric_new with %d carried-over records", carried_over)
 
-def get_altmetric_doi(mysql_cursor):
-    """Gets the doi column from the altmetric table
+def get_altmetric_refresh_state(mysql_cursor):
+    """Gets what we know about each previously fetched DOI.
+
+    last_fetched_at falls back to altmetric.createTimestamp for DOIs fetched
+    before altmetric_fetch_log existed.
 
     Args:
         mysql_cursor (CMySQLCursor): Executes an SQL query against the database.
 
     Returns:
-        doi (list): List of all rows in the doi column.
+        dict: doi -> (days_since_fetch, score, history-1m, history-1w).
     """
-    get_metadata_query = (
+    get_state_query = (
         """
-        SELECT doi FROM """ + DB_NAME + """.altmetric
+        SELECT
+            d.doi,
+            TIMESTAMPDIFF(HOUR,
+                          COALESCE(l.last_fetched_at, a.createTimestamp),
+                          NOW()) / 24 AS days_since_fetch,
+            a.score,
+            a.`history-1m`,
+            a.`history-1w`
+        FROM (
+            SELECT doi FROM """ + DB_NAME + """.altmetric_fetch_log
+            UNION
+            SELECT doi FROM """ + DB_NAME + """.altmetric WHERE doi IS NOT NULL
+        ) d
+        LEFT JOIN """ + DB_NAME + """.altmetric_fetch_log l ON l.doi = d.doi
+        LEFT JOIN """ + DB_NAME + """.altmetric a ON a.doi = d.doi
         """
     )
 
-    mysql_cursor.execute(get_metadata_query)
+    mysql_cursor.execute(get_state_query)
 
-    doi = list()
+    state = dict()
 
     for rec in mysql_cursor:
-        doi.append(rec[0])
+        state[rec[0].lower()] = tuple(rec[1:])
 
-    return doi
+    return state
+
+def refresh_priority(state):
+    """Score how urgently a previously fetched DOI needs refreshing.
+
+    Staleness (days since we last asked Altmetric) is scaled up by volatility:
+    the share of the DOI's score accrued in the last month. A DOI whose
+    attention is still growing goes stale faster than one that has settled.
+
+    Args:
+        state (tuple): (days_since_fetch, score, history-1m, history-1w).
+
+    Returns:
+        float: Priority; higher is refreshed first.
+    """
+    days_since_fetch, score, history_1m, history_1w = state
+    if days_since_fetch is None:
+        return float('inf')
+    volatility = float(history_1m or 0) / max(float(score or 0), 1.0)
+    return float(days_since_fetch) * (1 + VOLATILITY_WEIGHT * volatility)
+
+def prioritize_refresh_doi(candidate_doi, refresh_state, budget=ALTMETRIC_REFRESH_BUDGET,
+                           min_refresh_days=ALTMETRIC_MIN_REFRESH_DAYS):
+    """Pick which DOIs to request from Altmetric this run, in priority order.
+
+    Args:
+        candidate_doi (list): Lowercased DOIs currently in scope.
+        refresh_state (dict): Output of get_altmetric_refresh_state().
+        budget (int): Maximum number of DOIs to request.
+        min_refresh_days (float): Skip DOIs fetched more recently than this,
+            unless their score moved in the last week.
+
+    Returns:
+        list: DOIs to request, highest priority first.
+    """
+    never_fetched = []
+    due = []
+
+    for doi in candidate_doi:
+        state = refresh_state.get(doi)
+        if state is None:
+            never_fetched.append(doi)
+            continue
+        days_since_fetch, _, _, history_1w = state
+        if (days_since_fetch is not None and float(days_since_fetch) < min_refresh_days
+                and not history_1w):
+            continue
+        due.append((refresh_priority(state), doi))
+
+    due.sort(reverse=True)
+    refresh_doi = never_fetched + [doi for _, doi in due]
+
+    logger.info("%d candidate DOIs: %d never fetched, %d due for refresh; "
+                "requesting %d (budget %d)", len(candidate_doi), len(never_fetched),
+                len(due), min(len(refresh_doi), budget), budget)
+
+    return refresh_doi[:budget]
 
 def get_person_article_doi(mysql_cursor):
     """Gets the doi column from the person_article table
@@ -110,33 +311,105 @@ def create_article_url(article_doi):
     Returns:
         string: Full API URL of the record.
     """
-    API_BASE_URL = "https://api.altmetric.com/v1/doi/"
-
     api_url = list()
 
     for doi in article_doi:
         if doi != "":
-            api_url.append(API_BASE_URL + doi)
+            api_url.append(ALTMETRIC_API_BASE_URL + doi)
 
     return api_url
 
-def get_json_data(api_record_url):
+def create_session(pool_size):
+    """Create a keep-alive HTTP session shared by all fetcher threads.
+
+    Args:
+        pool_size (int): Number of pooled connections; should match the
+            number of worker threads so no worker waits on the pool.
+
+    Returns:
+        requests.Session: Session with a connection pool of `pool_size`.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def retry_after_seconds(response):
+    """Seconds the server asked us to wait via Retry-After, or None.
+
+    Retry-After is either a number of seconds or an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def get_json_data(api_record_url, session, limiter, max_retries=ALTMETRIC_MAX_RETRIES,
+                  backoff_factor=1):
     """Gets JSON data from API URL
 
+    Every attempt (including retries) takes a token from the shared limiter.
+    429 and 5xx responses and connection errors are retried with exponential
+    backoff plus jitter, or after the response's Retry-After when it sends
+    one; 404 means Altmetric has no record for the DOI and is
+    not retried.
+
     Args:
         api_record_url (string): URL of the API returning JSON data.
+        session (requests.Session): Shared keep-alive session.
+        limiter (TokenBucket): Shared rate limiter.
 
     Returns:
-        dict: Python dictionary with JSON data or error.
+        dict: Python dictionary with JSON data, NOT_FOUND on a 404, or None
+            on any other error.
     """
-    try:
-        api_request = urllib.request.urlopen(api_record_url)
-        json_api_data = json.loads(api_request.read().decode())
-        return json_api_data
-    except urllib.error.URLError as err:
-        print(time.ctime() + "--" + "%s--API URL: %s" % (err, api_record_url))
-    except ValueError as err:
-        print(time.ctime() + "--" + "Error parsing JSON data--Error %s" % (err))
+    params = {"key": ALTMETRIC_API_KEY} if ALTMETRIC_API_KEY else None
+
+    for retry in range(max_retries):
+        delay = None
+        limiter.acquire()
+        try:
+            response = session.get(api_record_url, params=params, timeout=(5, 30))
+        except requests.exceptions.RequestException as err:
+            logger.warning("Request error (attempt %d)--%s--API URL: %s",
+                           retry + 1, err, api_record_url)
+        else:
+            if response.status_code == 404:
+                return NOT_FOUND
+            if response.status_code == 200:
+                try:
+                    return response.json()
+                except ValueError as err:
+                    logger.error("Error parsing JSON data--Error %s--API URL: %s",
+                                 err, api_record_url)
+                    return None
+            if response.status_code != 429 and response.status_code < 500:
+                logger.error("HTTP %s--API URL: %s", response.status_code, api_record_url)
+                return None
+            logger.warning("HTTP %s (attempt %d)--API URL: %s",
+                           response.status_code, retry + 1, api_record_url)
+            delay = retry_after_seconds(response)
+
+        if retry == max_retries - 1:
+            break
+        if delay is None:
+            delay = backoff_factor * (2 ** retry) + random.uniform(0, 1)
+        time.sleep(delay)
+
+    logger.error("Giving up after %d attempts--API URL: %s", max_retries, api_record_url)
+    return None
 
 
 def get_dict_value(dict_obj, *keys):
@@ -165,17 +438,21 @@ def get_dict_value(dict_obj, *keys):
             return None
     return dict_value
 
-def get_altmetric_record(api_url):
+def get_altmetric_record(api_url, session, limiter):
     """Gets and returns API record from the altmetric URL.
 
     Args:
         api_url (string): URL of the API record.
+        session (requests.Session): Shared keep-alive session.
+        limiter (TokenBucket): Shared rate limiter.
 
     Returns:
-        tuple: Altmetric API record.
+        tuple: Altmetric API record, NOT_FOUND, or an error string.
     """
 
-    altmetric_record = get_json_data(api_url)
+    altmetric_record = get_json_data(api_url, session, limiter)
+    if altmetric_record is NOT_FOUND:
+        return NOT_FOUND
 
     if isinstance(altmetric_record, dict):
         # We map dictionary value to each table column. This should
@@ -237,81 +514,132 @@ def get_altmetric_record(api_url):
                       get_dict_value(altmetric_record, "published_on"),
                       get_dict_value(altmetric_record, "readers", "mendeley"))
 
-        print(time.ctime() + "--" + "New record created--API URL: %s" % (api_url))
         return new_record
 
     return "Invalid record obtained from API URL"
 
 
-def insert_altmetric_records(mysql_db, mysql_cursor, db_records):
-    """Inserts the API record in the MySQL database table.
+def iter_altmetric_records(api_urls, max_workers=ALTMETRIC_MAX_WORKERS,
+                           rate_per_sec=ALTMETRIC_RATE_PER_SEC, burst=ALTMETRIC_BURST):
+    """Fetch Altmetric records concurrently, yielding each as it completes.
+
+    A bounded pool of worker threads shares one keep-alive session and one
+    token bucket, so concurrency hides request latency while the aggregate
+    call rate stays within the API tier. Only a small window of requests is
+    queued at a time, so memory stays flat however many URLs are passed.
+
+    Args:
+        api_urls (list): Altmetric API URLs to fetch.
+        max_workers (int): Number of concurrent requests in flight.
+        rate_per_sec (float): Sustained request rate allowed by our API tier.
+        burst (int): Maximum number of requests allowed back-to-back.
+
+    Yields:
+        tuple: (api_url, record) where record is the Altmetric record tuple,
+            NOT_FOUND, or an error string if the URL returned no usable data.
+    """
+    session = create_session(max_workers)
+    limiter = TokenBucket(rate_per_sec, burst)
+    url_iter = iter(api_urls)
+
+    logger.info("Fetching %d URLs with %d workers at %.2f req/s (burst %d)",
+                len(api_urls), max_workers, rate_per_sec, burst)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {
+                executor.submit(get_altmetric_record, url, session, limiter): url
+                for url in itertools.islice(url_iter, max_workers * IN_FLIGHT_PER_WORKER)
+            }
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    next_url = next(url_iter, None)
+                    if next_url is not None:
+                        in_flight[executor.submit(get_altmetric_record, next_url,
+                                                  session, limiter)] = next_url
+                    yield url, future.result()
+    finally:
+        session.close()
+
+
+def upsert_altmetric_records(mysql_db, mysql_cursor, db_records, table_name="altmetric_new"):
+    """Upserts API records into an altmetric table, keyed on doi.
+
+    createTimestamp is bumped on update so it always reflects when the row
+    was last fetched.
 
     Args:
         mysql_db (MySQLConnection object): The MySQL database where the table resides.
         mysql_cursor (CMySQLCursor): Executes an SQL query against the database.
         db_records (list): List of rows to be added to the database.
+        table_name (string): Target table; the staging table during a refresh.
 
-    Returns:
-        string: Records added successfully or error message.
+    Raises:
+        pymysql.err.MySQLError: If the write fails, so the caller can abandon
+            the staging table instead of swapping in partial data.
     """
+    col_list = ", ".join("`%s`" % col for col in ALTMETRIC_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(ALTMETRIC_COLUMNS))
+    update_list = ", ".join("`%s` = VALUES(`%s`)" % (col, col)
+                            for col in ALTMETRIC_COLUMNS if col != "doi")
+
+    upsert_altmetric_table = (
+        "INSERT INTO " + DB_NAME + "." + table_name + " (" + col_list + ") "
+        "VALUES (" + placeholders + ") "
+        "ON DUPLICATE KEY UPDATE " + update_list + ", `createTimestamp` = NOW()"
+    )
+
+    try:
+        mysql_cursor.executemany(upsert_altmetric_table, db_records)
+        mysql_db.commit()
+    except pymysql.err.MySQLError as err:
+        logger.error("Error writing the records to the database. %s", err)
+        raise
+
+def record_fetch_attempts(mysql_db, mysql_cursor, attempts):
+    """Record in altmetric_fetch_log when each DOI was last requested.
 
-    add_to_altmetric_table = (
+    Args:
+        mysql_db (MySQLConnection object): The MySQL database where the table resides.
+        mysql_cursor (CMySQLCursor): Executes an SQL query against the database.
+        attempts (list): (doi, found) tuples for every DOI Altmetric answered
+            this run (200 or 404); failed requests are left out so they are
+            retried next run.
+    """
+    record_attempt_query = (
         """
-        INSERT INTO """ + DB_NAME + """.altmetric(
-            `doi`,
-            `pmid`,
-            `altmetric_jid`,
-            `context-all-count`,
-            `context-all-mean`,
-            `context-all-rank`,
-            `context-all-pct`,
-            `context-all-higher_than`,
-            `context-similar_age_3m-count`,
-            `context-similar_age_3m-mean`,
-            `context-similar_age_3m-rank`,
-            `context-similar_age_3m-pct`,
-            `context-similar_age_3m-higher_than`,
-            `altmetric_id`,
-            `cited_by_msm_count`,
-            `cited_by_posts_count`,
-            `cited_by_tweeters_count`,
-            `cited_by_feeds_count`,
-            `cited_by_fbwalls_count`,
-            `cited_by_rh_count`,
-            `cited_by_accounts_count`,
-            `last_updated`,
-            `score`,
-            `history-1y`,
-            `history-6m`,
-            `history-3m`,
-            `history-1m`,
-            `history-1w`,
-            `history-at`,
-            `added_on`,
-            `published_on`,
-            `readers-mendeley`
-        )
-        VALUES(
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s
-        )
+        INSERT INTO """ + DB_NAME + """.altmetric_fetch_log (doi, found, last_fetched_at)
+        VALUES (%s, %s, NOW())
+        ON DUPLICATE KEY UPDATE found = VALUES(found), last_fetched_at = NOW()
         """
     )
 
-    try:
-        mysql_cursor.executemany(add_to_altmetric_table, db_records)
+    for i in range(0, len(attempts), WRITE_BATCH_SIZE * 10):
+        mysql_cursor.executemany(record_attempt_query, attempts[i:i + WRITE_BATCH_SIZE * 10])
         mysql_db.commit()
 
-        print(time.ctime() + "--" + "%s records successfully added to the database."
-            % (len(db_records)))
+    logger.info("Recorded %d fetch attempts in altmetric_fetch_log", len(attempts))
+
+def swap_altmetric_staging(mysql_db, mysql_cursor):
+    """Atomically replace altmetric with altmetric_new.
+
+    The previous table is kept as altmetric_backup until the next run.
 
+    Returns:
+        bool: True if the swap succeeded.
+    """
+    mysql_cursor.execute("DROP TABLE IF EXISTS altmetric_backup")
+    try:
+        mysql_cursor.execute(
+            "RENAME TABLE altmetric TO altmetric_backup, altmetric_new TO altmetric")
+        mysql_db.commit()
+        logger.info("Atomic table swap completed successfully")
+        return True
     except pymysql.err.MySQLError as err:
-        print(time.ctime() + "--" + "Error writing the records to the database. %s" % (err))
+        logger.error("Atomic table swap failed: %s", err)
+        return False
 
 
 if __name__ == '__main__':
@@ -334,34 +662,61 @@ if __name__ == '__main__':
     altmetric_cursor = altmetric_db.cursor()
 
     person_article_doi = get_person_article_doi(person_article_cursor)
-    altmetric_doi = get_altmetric_doi(altmetric_cursor)
+    refresh_state = get_altmetric_refresh_state(person_article_cursor)
 
     # Convert the DOI column to lowercase. In some entries the DOI is
     # capitalized and that causes problems with comparing the list.
     # the API returns lowecase, so they should be lower.
-    url_doi = map(str.lower, person_article_doi)
-
-    print(time.ctime() + "--" + "Processing %s URLs" % (len(person_article_doi)))
+    candidate_doi = sorted({doi.lower() for doi in person_article_doi if doi})
 
-    article_api_url = create_article_url(url_doi)
+    refresh_doi = prioritize_refresh_doi(candidate_doi, refresh_state)
+    article_api_url = create_article_url(refresh_doi)
 
-    altmetric_records = []
+    # Unchanged records are carried over into the staging table; refreshed
+    # ones are upserted on top of them in batches as they arrive, and the
+    # whole table is swapped in at the end.
+    create_altmetric_staging(altmetric_db, altmetric_cursor, candidate_doi)
 
-    for url in article_api_url:
-        record = get_altmetric_record(url)
+    batch = []
+    attempts = []
+    upserted = 0
 
-        if isinstance(record, tuple):
-            altmetric_records.append(record)
-
-        # Pause for 1 second to comply with
-        # Altmetric free API service.
-        time.sleep(1)
-
-    # Truncate the altmetric table to remove all old records.
-    truncate_altmetric(altmetric_cursor)
-    insert_altmetric_records(altmetric_db, altmetric_cursor, altmetric_records)
+    try:
+        # Requests are paced by the shared token bucket
+        # (ALTMETRIC_RATE_PER_SEC) to comply with the Altmetric API tier.
+        for done, (url, record) in enumerate(iter_altmetric_records(article_api_url), start=1):
+            found = isinstance(record, tuple)
+            # Only a record or a 404 is a completed fetch; errors stay due.
+            if found or record is NOT_FOUND:
+                attempts.append((url[len(ALTMETRIC_API_BASE_URL):], int(found)))
+            if found:
+                batch.append(record)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                upsert_altmetric_records(altmetric_db, altmetric_cursor, batch)
+                upserted += len(batch)
+                batch = []
+            if done % PROGRESS_LOG_INTERVAL == 0:
+                logger.info("Processed %d/%d URLs; %d records upserted", done,
+                            len(article_api_url), upserted)
+        if batch:
+            upsert_altmetric_records(altmetric_db, altmetric_cursor, batch)
+            upserted += len(batch)
+    except Exception as err:
+        logger.error("Altmetric refresh failed; dropping altmetric_new. %s", err)
+        altmetric_cursor.execute("DROP TABLE IF EXISTS altmetric_new")
+        altmetric_db.commit()
+        sys.exit(1)
+
+    logger.info("%d records upserted from %d URLs", upserted, len(article_api_url))
+
+    if swap_altmetric_staging(altmetric_db, altmetric_cursor):
+        record_fetch_attempts(altmetric_db, altmetric_cursor, attempts)
+    else:
+        altmetric_cursor.execute("DROP TABLE IF EXISTS altmetric_new")
+        altmetric_db.commit()
+        sys.exit(1)
 
-    person_article_db.close()
     person_article_cursor.close()
+    person_article_db.close()
+    altmetric_cursor.close()
     altmetric_db.close()
-    altmetric_cursor.close()
\ No newline at end of file
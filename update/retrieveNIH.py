@@ -12,6 +12,8 @@ import faulthandler, signal
 import pymysql.cursors
 import pymysql.err
 
+import pipeline_metrics
+
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -79,6 +81,7 @@ def get_nih_records(nih_api_url, max_retries=5, backoff_factor=1):
     for retry in range(max_retries):
         try:
             response = requests.get(nih_api_url, timeout=(5, 60))
+            pipeline_metrics.add(api_calls={"icite": 1}, bytes_transferred=len(response.content))
             response.raise_for_status()
             nih_record = response.json()
 
@@ -187,6 +190,7 @@ def load_data_into_db(mysql_db, mysql_cursor, table_name, csv_file_path, columns
 
         logger.info(f"Data loaded into {table_name} from {csv_file_path}")
         logger.info(f"Rows before: {count_before}, Rows after: {count_after}, Rows inserted: {count_after - count_before}")
+        pipeline_metrics.add(rows_loaded={table_name: count_after - count_before})
 
     except pymysql.err.MySQLError as e:
         logger.error(f"Error loading data into {table_name}: {e}")
@@ -8,6 +8,9 @@
 #   1. POST /projects/search filtered by WCM org name → grant_reporter_project
 #   2. POST /publications/search keyed by appl_ids from step 1 → grant_reporter_link
 #
+# Nightly runs are incremental (recent fiscal years + newly added projects,
+# upserted); a full truncate-reload resync runs weekly. See --mode.
+#
 # Then a SQL reconciliation step populates grant_provenance, the long-lived
 # (person, pmid, grant)-keyed audit log that survives the nightly truncate-
 # reload of person_article_grant. See setup/alter_add_reporter_fields_v1.2.sql
@@ -23,16 +26,24 @@
 import os
 import sys
 import csv
+import argparse
 import time
 import random
 import re
+import datetime
+import functools
 import logging
+import threading
 import faulthandler
 import signal
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
 import pymysql.cursors
 import pymysql.err
 
+import pipeline_metrics
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -52,10 +63,32 @@ PAGE_LIMIT = 500
 OFFSET_CAP = 9999
 REQUEST_INTERVAL_SEC = 1.0  # NIH guidance: 1 req/sec
 PUBS_BATCH_SIZE = 50  # appl_ids per /publications/search call
+FIRST_FISCAL_YEAR = 1985  # earliest NIH grant year in RePORTER
+# Partitions fetched concurrently. The pacer below still issues at most one
+# request per REQUEST_INTERVAL_SEC across all workers; the extra workers only
+# overlap response latency so a request goes out every interval.
+MAX_WORKERS = int(os.environ.get('REPORTER_MAX_WORKERS', '4'))
+
+# Incremental sync. Historical projects never change, so on incremental
+# nights we only ask for the recent/active fiscal years plus anything
+# RePORTER added since our last sync (minus a safety lookback), and upsert.
+# The weekly full resync (Sundays, or --mode full) truncate-reloads both
+# staging tables so deletions upstream are eventually reflected.
+SYNC_MODE = os.environ.get('REPORTER_SYNC_MODE', 'auto')
+ACTIVE_FY_LOOKBACK = int(os.environ.get('REPORTER_ACTIVE_FY_LOOKBACK', '2'))
+DATE_ADDED_LOOKBACK_DAYS = int(os.environ.get('REPORTER_DATE_ADDED_LOOKBACK_DAYS', '7'))
+FULL_SYNC_WEEKDAY = 6  # 6 = Sunday
+UPSERT_BATCH_SIZE = 1000
 
 # core_project_num pattern, e.g. "R01DK127777", "U01AI189285", "K23MH112873".
 # Prefix is 1-3 alphanumeric (activity code) + 2 letters (IC) + 5-7 digits.
 CORE_PROJECT_RE = re.compile(r'\b([A-Z]\d{1,2}[A-Z]{2}\d{5,7})\b')
+GRANT_SEPARATOR_RE = re.compile(r'[\s\-\/]')
+CONTROL_CHAR_RE = re.compile(r'[\t\n\r]')
+# person_article_grant repeats the same free-text grant strings thousands of
+# times (one row per person x pmid x grant), so normalization is memoized on
+# the raw string.
+GRANT_CACHE_SIZE = 1 << 16
 
 
 def connect_db(max_retries=5, backoff_factor=1):
@@ -81,16 +114,52 @@ def connect_db(max_retries=5, backoff_factor=1):
     raise RuntimeError('Could not connect to database after retries')
 
 
+class RequestPacer:
+    """Global scheduler that spaces requests REQUEST_INTERVAL_SEC apart.
+
+    Each caller reserves the next free send slot and sleeps only until that
+    slot, so with several workers waiting a request goes out every interval
+    while earlier responses are still in flight -- no fixed sleeps between a
+    response and the next request. A 429 pushes the next slot back for
+    every worker, not just the one that was throttled."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def defer(self, seconds):
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+pacer = RequestPacer(REQUEST_INTERVAL_SEC)
+
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=MAX_WORKERS,
+                                      pool_maxsize=MAX_WORKERS))
+
+
 def post_with_retry(url, payload, max_retries=5, backoff_factor=1):
-    """POST with exponential backoff. Honors NIH's 1 req/sec rate limit
-    by sleeping between successful calls in the caller."""
+    """POST with exponential backoff. Every attempt waits for a slot from the
+    shared pacer, which enforces NIH's 1 req/sec rate limit across threads."""
     for retry in range(max_retries):
         try:
-            r = requests.post(url, json=payload, timeout=(10, 90))
+            pacer.acquire()
+            r = session.post(url, json=payload, timeout=(10, 90))
+            pipeline_metrics.add(api_calls={'reporter': 1}, bytes_transferred=len(r.content))
             if r.status_code == 429:
                 wait = backoff_factor * (2 ** retry) + random.uniform(0, 5)
-                logger.warning('429 from RePORTER; sleeping %.1fs', wait)
-                time.sleep(wait)
+                logger.warning('429 from RePORTER; deferring all requests %.1fs', wait)
+                pacer.defer(wait)
                 continue
             r.raise_for_status()
             return r.json()
@@ -130,74 +199,188 @@ def _fetch_projects_page(criteria):
                 'Caller should partition further (e.g. by activity_code).',
                 total, OFFSET_CAP)
             return
-        time.sleep(REQUEST_INTERVAL_SEC)
 
 
-def fetch_projects(base_criteria):
-    """Yield project dicts, partitioning by fiscal year when needed to stay
-    under the offset cap. WCM has ~15K projects historically, which exceeds
-    the 9,999 offset limit on a single criteria block.
+def _fetch_partition(criteria):
+    """Materialize one partition so it can be fetched on a worker thread."""
+    return list(_fetch_projects_page(criteria))
 
-    Strategy: probe total once with the base criteria. If under the cap,
-    return all in one stream. Otherwise iterate fiscal years from the
-    earliest NIH grant year (1985) through next year, requesting
-    fiscal_years=[FY] for each."""
-    probe = post_with_retry(
+
+def probe_total(criteria):
+    """Return RePORTER's match count for a criteria block (one limit=1 call)."""
+    data = post_with_retry(
         f'{REPORTER_BASE_URL}/projects/search',
-        {'criteria': base_criteria, 'limit': 1, 'offset': 0},
+        {'criteria': criteria, 'limit': 1, 'offset': 0},
     )
-    total = (probe.get('meta', {}) or {}).get('total', 0)
+    return (data.get('meta', {}) or {}).get('total', 0)
+
+
+# Ways to split an over-cap criteria block, tried in order:
+# (label, criteria key, value of a project row for that key).
+SPLIT_DIMENSIONS = [
+    ('activity code', 'activity_codes', lambda row: row.get('activity_code')),
+    ('agency', 'agencies', lambda row: (row.get('agency_ic_admin') or {}).get('abbreviation')),
+]
+
+
+def _values_in(criteria, value_of):
+    """Collect the values of one split dimension present in an over-cap
+    criteria block by scanning the first OFFSET_CAP rows. RePORTER has no
+    facet endpoint, so this is the cheapest way to learn how to split the
+    block further. Values that only occur past the cap are not seen; the
+    caller checks coverage against the block's total."""
+    return sorted({value_of(row) for row in _fetch_projects_page(criteria)
+                   if value_of(row)})
+
+
+def split_partition(label, criteria, total, dimensions=SPLIT_DIMENSIONS, catch_all=True):
+    """Return (label, criteria) partitions covering an over-cap block.
+
+    The block is split on the first dimension and each split is probed; a
+    split still over the cap is split again on the next dimension. If the
+    splits' totals fall short of `total` (values first seen past the cap,
+    or rows with no value), the whole block is split once more as a
+    catch-all, on the remaining dimensions first and then this one again
+    (smaller blocks surface the values the first scan missed); overlapping
+    rows are dropped by appl_id in main(). Whatever can still not be
+    covered is logged and counted in pipeline metrics, not silently lost."""
+    if total <= OFFSET_CAP:
+        return [(label, criteria)]
+    if not dimensions:
+        logger.error('%s has %d projects and no split dimension left; only the '
+                     'first %d can be fetched', label, total, OFFSET_CAP)
+        pipeline_metrics.add(reporter_uncovered_projects=total - OFFSET_CAP)
+        return [(label, criteria)]
+
+    name, key, value_of = dimensions[0]
+    splits = {}
+    for value in _values_in(criteria, value_of):
+        split = dict(criteria)
+        split[key] = [value]
+        splits[f'{label} {value}'] = split
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        totals = dict(zip(splits, executor.map(probe_total, splits.values())))
+    covered = sum(totals.values())
+    logger.warning('%s has %d projects (over offset cap %d); splitting into %d '
+                   '%s partitions covering %d', label, total, OFFSET_CAP,
+                   len(splits), name, covered)
+
+    partitions = []
+    for split_label, split in splits.items():
+        if totals[split_label]:
+            partitions.extend(split_partition(split_label, split, totals[split_label],
+                                              dimensions[1:], catch_all=False))
+    if covered < total:
+        logger.warning('%s: %d projects have no discovered %s', label, total - covered, name)
+        if catch_all and len(dimensions) > 1:
+            partitions.extend(split_partition(f'{label} (remainder)', criteria, total,
+                                              dimensions[1:] + dimensions[:1],
+                                              catch_all=False))
+        else:
+            logger.error('%s: %d projects cannot be reached by any partition',
+                         label, total - covered)
+            pipeline_metrics.add(reporter_uncovered_projects=total - covered)
+    return partitions
+
+
+def plan_project_partitions(base_criteria):
+    """Return a list of (label, criteria) partitions that each fit under
+    OFFSET_CAP and together cover base_criteria.
+
+    Strategy: probe total once with the base criteria; if under the cap it is
+    the only partition. Otherwise probe every fiscal year from the earliest
+    NIH grant year (1985) through next year -- concurrently, under the shared
+    pacer -- drop empty years, and split any year still over the cap with
+    split_partition() (activity code, then agency)."""
+    total = probe_total(base_criteria)
     logger.info('RePORTER /projects/search reports %d total matches for base criteria', total)
-
     if total <= OFFSET_CAP:
-        yield from _fetch_projects_page(base_criteria)
-        return
+        return [('all', base_criteria)]
 
-    import datetime
     end_fy = datetime.date.today().year + 1
-    for fy in range(1985, end_fy + 1):
+    fy_criteria = {}
+    for fy in range(FIRST_FISCAL_YEAR, end_fy + 1):
         criteria = dict(base_criteria)
         criteria['fiscal_years'] = [fy]
-        yielded_this_fy = 0
-        for row in _fetch_projects_page(criteria):
-            yielded_this_fy += 1
-            yield row
-        if yielded_this_fy:
-            logger.info('FY %d: yielded %d projects', fy, yielded_this_fy)
-        time.sleep(REQUEST_INTERVAL_SEC)
+        fy_criteria[fy] = criteria
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        fy_totals = dict(zip(fy_criteria, executor.map(probe_total, fy_criteria.values())))
+
+    partitions = []
+    for fy, criteria in fy_criteria.items():
+        fy_total = fy_totals[fy]
+        if not fy_total:
+            continue
+        if fy_total <= OFFSET_CAP:
+            partitions.append((f'FY {fy}', criteria))
+            continue
+        partitions.extend(split_partition(f'FY {fy}', criteria, fy_total))
+
+    logger.info('Planned %d project partitions', len(partitions))
+    return partitions
+
+
+def fetch_projects(base_criteria):
+    """Yield project dicts, partitioning by fiscal year when needed to stay
+    under the offset cap. WCM has ~15K projects historically, which exceeds
+    the 9,999 offset limit on a single criteria block.
+
+    Partitions come from plan_project_partitions() and are fetched
+    concurrently (MAX_WORKERS), each paging sequentially; the shared pacer
+    keeps the aggregate rate at 1 req/sec. Rows are yielded partition by
+    partition as each one completes."""
+    partitions = plan_project_partitions(base_criteria)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(_fetch_partition, criteria): label
+                   for label, criteria in partitions}
+        for future in as_completed(futures):
+            rows = future.result()
+            if rows:
+                logger.info('%s: yielded %d projects', futures[future], len(rows))
+            yield from rows
+
+
+def _fetch_publications_batch(batch):
+    """Return (pmid, appl_id, core_project_num) tuples for one appl_id batch."""
+    url = f'{REPORTER_BASE_URL}/publications/search'
+    links = []
+    offset = 0
+    while offset <= OFFSET_CAP:
+        payload = {
+            'criteria': {'appl_ids': batch},
+            'limit': PAGE_LIMIT,
+            'offset': offset,
+        }
+        data = post_with_retry(url, payload)
+        results = data.get('results', []) or []
+        if not results:
+            break
+        for row in results:
+            pmid = row.get('pmid')
+            appl_id = row.get('applid') or row.get('appl_id')
+            core = row.get('coreproject') or row.get('core_project_num')
+            if pmid and appl_id:
+                links.append((int(pmid), int(appl_id), core))
+        meta = data.get('meta', {}) or {}
+        total = meta.get('total', 0)
+        offset += PAGE_LIMIT
+        if offset >= total:
+            break
+    return links
 
 
 def fetch_publications_for_appl_ids(appl_ids):
     """Yield (pmid, appl_id, core_project_num) tuples from /publications/search
-    in batches of PUBS_BATCH_SIZE."""
-    url = f'{REPORTER_BASE_URL}/publications/search'
+    in batches of PUBS_BATCH_SIZE, fetched concurrently under the shared
+    pacer."""
     appl_ids = list({int(x) for x in appl_ids if x is not None})
-    for i in range(0, len(appl_ids), PUBS_BATCH_SIZE):
-        batch = appl_ids[i:i + PUBS_BATCH_SIZE]
-        offset = 0
-        while offset <= OFFSET_CAP:
-            payload = {
-                'criteria': {'appl_ids': batch},
-                'limit': PAGE_LIMIT,
-                'offset': offset,
-            }
-            data = post_with_retry(url, payload)
-            results = data.get('results', []) or []
-            if not results:
-                break
-            for row in results:
-                pmid = row.get('pmid')
-                appl_id = row.get('applid') or row.get('appl_id')
-                core = row.get('coreproject') or row.get('core_project_num')
-                if pmid and appl_id:
-                    yield int(pmid), int(appl_id), core
-            meta = data.get('meta', {}) or {}
-            total = meta.get('total', 0)
-            offset += PAGE_LIMIT
-            if offset >= total:
-                break
-            time.sleep(REQUEST_INTERVAL_SEC)
-        time.sleep(REQUEST_INTERVAL_SEC)
+    batches = [appl_ids[i:i + PUBS_BATCH_SIZE]
+               for i in range(0, len(appl_ids), PUBS_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(_fetch_publications_batch, batch) for batch in batches]
+        for future in as_completed(futures):
+            yield from future.result()
 
 
 def reload_table(conn, table, rows, columns):
@@ -215,19 +398,82 @@ def reload_table(conn, table, rows, columns):
     cur.execute(f'SELECT COUNT(*) AS c FROM `{table}`')
     count = cur.fetchone()['c']
     logger.info('Reloaded %s: %d rows', table, count)
+    pipeline_metrics.add(rows_loaded={table: count})
+
+
+def upsert_table(conn, table, rows, columns, key_columns):
+    """Insert-or-update `rows` into `table` without truncating it. Used by the
+    incremental sync; last_fetched_at is bumped on every touched row."""
+    placeholders = ', '.join(['%s'] * len(columns))
+    col_list = ', '.join(f'`{c}`' for c in columns)
+    updates = ', '.join(f'`{c}` = VALUES(`{c}`)' for c in columns if c not in key_columns)
+    sql = (f'INSERT INTO `{table}` ({col_list}) VALUES ({placeholders}) '
+           f'ON DUPLICATE KEY UPDATE {updates + ", " if updates else ""}'
+           '`last_fetched_at` = NOW()')
+    cur = conn.cursor()
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        cur.executemany(sql, rows[i:i + UPSERT_BATCH_SIZE])
+        conn.commit()
+    logger.info('Upserted %d rows into %s', len(rows), table)
+    pipeline_metrics.add(rows_loaded={table: len(rows)})
+
+
+def resolve_sync_mode(mode):
+    """'auto' means a full resync on FULL_SYNC_WEEKDAY, incremental otherwise.
+    main() also falls back to full when there is no previous sync."""
+    if mode != 'auto':
+        return mode
+    if datetime.date.today().weekday() == FULL_SYNC_WEEKDAY:
+        return 'full'
+    return 'incremental'
+
+
+def incremental_project_criteria(conn, org_name):
+    """Criteria blocks for an incremental sync: recent/active fiscal years,
+    plus projects RePORTER added since our last successful sync. Returns
+    None when there is no previous sync to be incremental against."""
+    cur = conn.cursor()
+    cur.execute('SELECT MAX(last_fetched_at) AS last_sync FROM grant_reporter_project')
+    last_sync = cur.fetchone()['last_sync']
+    if last_sync is None:
+        return None
+
+    this_fy = datetime.date.today().year
+    from_date = (last_sync.date() - datetime.timedelta(days=DATE_ADDED_LOOKBACK_DAYS))
+    logger.info('Incremental sync: FY %d-%d plus projects added since %s',
+                this_fy - ACTIVE_FY_LOOKBACK, this_fy + 1, from_date)
+    return [
+        {'org_names': [org_name],
+         'fiscal_years': list(range(this_fy - ACTIVE_FY_LOOKBACK, this_fy + 2))},
+        {'org_names': [org_name],
+         'date_added': {'from_date': from_date.isoformat(),
+                        'to_date': datetime.date.today().isoformat()}},
+    ]
 
 
+@functools.lru_cache(maxsize=GRANT_CACHE_SIZE)
 def normalize_grant_string(raw):
     """Extract a core project number (e.g. R01DK127777) from a free-text
     NIH grant string. Returns None if no match — caller decides whether to
     fall back to the raw string."""
     if not raw:
         return None
-    upper = re.sub(r'[\s\-\/]', '', raw.upper())
+    upper = GRANT_SEPARATOR_RE.sub('', raw.upper())
     m = CORE_PROJECT_RE.search(upper)
     return m.group(1) if m else None
 
 
+@functools.lru_cache(maxsize=GRANT_CACHE_SIZE)
+def grant_provenance_key(raw):
+    """core_project_num for grant_provenance: the normalized NIH number, or
+    for non-NIH grants the raw string with control chars blanked (the
+    staging CSV is TAB-delimited) and truncated to the column width."""
+    n = normalize_grant_string(raw)
+    if not n:
+        n = CONTROL_CHAR_RE.sub(' ', raw)[:64]
+    return n
+
+
 def reconcile_provenance(conn):
     """Populate grant_provenance from person_article_grant and grant_reporter_link.
 
@@ -241,44 +487,39 @@ def reconcile_provenance(conn):
     # ----- (1) reciterdb side -----
     # Normalization (free-text articleGrant → core_project_num) happens in
     # Python, so we stage the normalized rows in a temp table first via
-    # LOAD DATA LOCAL INFILE, then do a single bulk upsert.
+    # LOAD DATA LOCAL INFILE, then do a single bulk upsert. Rows are streamed
+    # from an unbuffered server-side cursor straight into the CSV, so the
+    # table is never materialized in memory; normalization is memoized.
     logger.info('Reading person_article_grant for reconciliation')
-    cur.execute("""
-        SELECT personIdentifier, pmid, articleGrant
-        FROM person_article_grant
-        WHERE personIdentifier IS NOT NULL
-          AND pmid > 0
-          AND articleGrant IS NOT NULL
-          AND articleGrant <> ''
-    """)
-    pag_rows = cur.fetchall()
-    logger.info('person_article_grant rows considered: %d', len(pag_rows))
-
-    # Normalize + dedupe in Python (the temp table's PK enforces uniqueness
-    # but deduping here avoids LOAD DATA INFILE warnings on duplicate rows).
-    seen = set()
-    normalized = []
-    for row in pag_rows:
-        n = normalize_grant_string(row['articleGrant'])
-        if not n:
-            # Non-NIH fallback: sanitize control chars (CSV uses TAB delim)
-            n = re.sub(r'[\t\n\r]', ' ', row['articleGrant'])[:64]
-        key = (row['personIdentifier'], row['pmid'], n)
-        if key in seen:
-            continue
-        seen.add(key)
-        normalized.append(key)
-    logger.info('Normalized + deduped to %d distinct (person, pmid, grant) rows',
-                len(normalized))
+    normalize_grant_string.cache_clear()
+    grant_provenance_key.cache_clear()
 
     csv_file = tempfile.NamedTemporaryFile(
         delete=False, mode='w', suffix='.csv', newline='', encoding='utf-8')
     try:
         writer = csv.writer(csv_file, delimiter='\t', lineterminator='\n',
                             quoting=csv.QUOTE_NONE, escapechar='\\')
-        for r in normalized:
-            writer.writerow(r)
+        stream = conn.cursor(pymysql.cursors.SSCursor)
+        try:
+            stream.execute("""
+                SELECT personIdentifier, pmid, articleGrant
+                FROM person_article_grant
+                WHERE personIdentifier IS NOT NULL
+                  AND pmid > 0
+                  AND articleGrant IS NOT NULL
+                  AND articleGrant <> ''
+            """)
+            considered = 0
+            for person, pmid, grant in stream:
+                writer.writerow((person, pmid, grant_provenance_key(grant)))
+                considered += 1
+        finally:
+            stream.close()
         csv_file.close()
+        cache = grant_provenance_key.cache_info()
+        logger.info('person_article_grant rows considered: %d (%d distinct grant '
+                    'strings normalized, %d cache hits)',
+                    considered, cache.currsize, cache.hits)
 
         cur.execute("DROP TEMPORARY TABLE IF EXISTS _reciter_grant_staging")
         cur.execute("""
@@ -289,15 +530,17 @@ def reconcile_provenance(conn):
                 PRIMARY KEY (personIdentifier, pmid, core_project_num)
             ) ENGINE=InnoDB
         """)
+        # IGNORE: the temp table's PK collapses duplicate (person, pmid,
+        # grant) rows, which are common once grant strings are normalized.
         load_sql = (
             f"LOAD DATA LOCAL INFILE '{csv_file.name}' "
-            "INTO TABLE _reciter_grant_staging "
+            "IGNORE INTO TABLE _reciter_grant_staging "
             "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
             "(personIdentifier, pmid, core_project_num)"
         )
         cur.execute(load_sql)
         cur.execute("SELECT COUNT(*) AS c FROM _reciter_grant_staging")
-        logger.info('Loaded %d rows into reciterdb staging table',
+        logger.info('Loaded %d distinct (person, pmid, grant) rows into reciterdb staging table',
                     cur.fetchone()['c'])
 
         cur.execute("""
@@ -362,12 +605,32 @@ def reconcile_provenance(conn):
                 total, both, rep_only, reciter_only)
 
 
+PROJECT_COLUMNS = ['appl_id', 'core_project_num', 'project_title', 'org_name',
+                   'fiscal_year', 'activity_code', 'project_start_date',
+                   'project_end_date', 'abstract_text', 'project_terms', 'pref_terms']
+LINK_COLUMNS = ['pmid', 'appl_id', 'core_project_num']
+
+
 def main():
-    org_name = os.environ.get('REPORTER_ORG_NAME', WCM_ORG_NAME)
-    logger.info('Starting RePORTER ETL for org: %s', org_name)
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--mode', choices=['auto', 'incremental', 'full'], default=SYNC_MODE,
+                    help='auto = full resync on Sundays, incremental otherwise')
+    args = ap.parse_args()
 
+    org_name = os.environ.get('REPORTER_ORG_NAME', WCM_ORG_NAME)
     conn = connect_db()
 
+    mode = resolve_sync_mode(args.mode)
+    criteria_blocks = [{'org_names': [org_name]}]
+    if mode == 'incremental':
+        incremental = incremental_project_criteria(conn, org_name)
+        if incremental is None:
+            logger.info('No previous RePORTER sync found; falling back to full resync')
+            mode = 'full'
+        else:
+            criteria_blocks = incremental
+    logger.info('Starting RePORTER ETL (%s) for org: %s', mode, org_name)
+
     # ----- Loop A: projects -----
     # No include_fields — the API expects CamelCase there ('ApplId') but
     # response field names are snake_case ('appl_id'). Easier to take all
@@ -375,47 +638,49 @@ def main():
     project_rows = []
     appl_ids = []
     seen_appl_ids = set()
-    for proj in fetch_projects(base_criteria={'org_names': [org_name]}):
-        appl_id = proj.get('appl_id')
-        if not appl_id:
-            continue
-        # RePORTER returns a project under every fiscal year it was active, so
-        # the FY-partitioned fetch (used when the corpus exceeds the 9,999
-        # offset cap) yields the same appl_id in multiple pages. appl_id is
-        # grant_reporter_project's PRIMARY KEY, so dedup before the reload —
-        # mirrors the seen_pairs guard in the publications loop below.
-        if appl_id in seen_appl_ids:
-            continue
-        seen_appl_ids.add(appl_id)
-        appl_ids.append(appl_id)
-        org = (proj.get('organization') or {}).get('org_name')
-        project_rows.append((
-            int(appl_id),
-            proj.get('core_project_num'),
-            (proj.get('project_title') or '')[:512],
-            (org or '')[:255],
-            proj.get('fiscal_year'),
-            proj.get('activity_code'),
-            proj.get('project_start_date'),
-            proj.get('project_end_date'),
-            proj.get('abstract_text'),
-            # NIH-curated keyword vocabularies, stored raw (issue #291).
-            # 'terms' is angle-bracket-wrapped (<a><b><c>); 'pref_terms' is
-            # semicolon-delimited. Parsed downstream by the SPS funding ETL.
-            proj.get('terms'),
-            proj.get('pref_terms'),
-        ))
+    for criteria in criteria_blocks:
+        for proj in fetch_projects(base_criteria=criteria):
+            appl_id = proj.get('appl_id')
+            if not appl_id:
+                continue
+            # RePORTER returns a project under every fiscal year it was active, so
+            # the FY-partitioned fetch (used when the corpus exceeds the 9,999
+            # offset cap) yields the same appl_id in multiple pages, as do the
+            # two overlapping incremental criteria blocks. appl_id is
+            # grant_reporter_project's PRIMARY KEY, so dedup before the write —
+            # mirrors the seen_pairs guard in the publications loop below.
+            if appl_id in seen_appl_ids:
+                continue
+            seen_appl_ids.add(appl_id)
+            appl_ids.append(appl_id)
+            org = (proj.get('organization') or {}).get('org_name')
+            project_rows.append((
+                int(appl_id),
+                proj.get('core_project_num'),
+                (proj.get('project_title') or '')[:512],
+                (org or '')[:255],
+                proj.get('fiscal_year'),
+                proj.get('activity_code'),
+                proj.get('project_start_date'),
+                proj.get('project_end_date'),
+                proj.get('abstract_text'),
+                # NIH-curated keyword vocabularies, stored raw (issue #291).
+                # 'terms' is angle-bracket-wrapped (<a><b><c>); 'pref_terms' is
+                # semicolon-delimited. Parsed downstream by the SPS funding ETL.
+                proj.get('terms'),
+                proj.get('pref_terms'),
+            ))
     logger.info('Fetched %d RePORTER projects', len(project_rows))
-    reload_table(
-        conn,
-        'grant_reporter_project',
-        project_rows,
-        ['appl_id', 'core_project_num', 'project_title', 'org_name',
-         'fiscal_year', 'activity_code', 'project_start_date',
-         'project_end_date', 'abstract_text', 'project_terms', 'pref_terms'],
-    )
+    if mode == 'full':
+        reload_table(conn, 'grant_reporter_project', project_rows, PROJECT_COLUMNS)
+    else:
+        upsert_table(conn, 'grant_reporter_project', project_rows, PROJECT_COLUMNS,
+                     key_columns=['appl_id'])
 
     # ----- Loop B: publications -----
+    # Incremental: only the appl_ids fetched above (active or newly added
+    # projects) are re-queried; links for historical projects are kept as-is
+    # until the weekly full resync.
     link_rows = []
     seen_pairs = set()
     for pmid, appl_id, core in fetch_publications_for_appl_ids(appl_ids):
@@ -425,12 +690,11 @@ def main():
         seen_pairs.add(key)
         link_rows.append((pmid, appl_id, core))
     logger.info('Fetched %d unique (pmid, appl_id) pairs', len(link_rows))
-    reload_table(
-        conn,
-        'grant_reporter_link',
-        link_rows,
-        ['pmid', 'appl_id', 'core_project_num'],
-    )
+    if mode == 'full':
+        reload_table(conn, 'grant_reporter_link', link_rows, LINK_COLUMNS)
+    else:
+        upsert_table(conn, 'grant_reporter_link', link_rows, LINK_COLUMNS,
+                     key_columns=['pmid', 'appl_id'])
 
     # ----- Reconciliation -----
     reconcile_provenance(conn)
@@ -2,15 +2,50 @@ import subprocess
 import logging
 import time
 import boto3
+import datetime
+import io
+import json
 import os
+import pstats
+import shlex
+import shutil
 import sys
+import tempfile
+import threading
 import psutil   # for memory logging (pip install psutil)
+import pymysql
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from botocore.config import Config        
 
+import pipeline_metrics
+
 LOG_FILE = os.environ['LOG_FILE']
 S3_BUCKET = os.environ['S3_BUCKET']
 S3_KEY_PREFIX = os.environ['S3_KEY_PREFIX']
 
+# ------------- Telemetry -------------
+# One record per run_script() call: wall time, the child's own peak RSS and CPU
+# (from wait4, not this process's RSS) and whatever the child reported through
+# pipeline_metrics (rows loaded per table, API calls, bytes, DynamoDB RCUs).
+# Written to run_history and to a JSON file uploaded next to the log.
+RUN_ID = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+RUN_STARTED_AT = datetime.datetime.utcnow()
+TELEMETRY_DIR = tempfile.mkdtemp(prefix=f"pipeline-{RUN_ID}-")
+TELEMETRY_FILE = os.path.join(TELEMETRY_DIR, "telemetry.json")
+stage_telemetry = []
+_telemetry_lock = threading.Lock()
+
+# ------------- Profiling -------------
+# PIPELINE_PROFILE_STAGES="retrieveNIH,pubmedEnrichment" runs those stages under a
+# profiler; the artifacts are uploaded next to the log. PIPELINE_PROFILER picks it:
+#   cprofile  (default) profile_stage.py -> <stage>.pstats + <stage>.pstats.txt (top
+#             functions by cumulative time). Main thread only.
+#   py-spy    sampling profiler, every thread -> <stage>.profile.svg flamegraph. Needs
+#             py-spy on PATH; falls back to cprofile otherwise.
+PROFILE_STAGES = {s.strip() for s in os.getenv("PIPELINE_PROFILE_STAGES", "").split(",") if s.strip()}
+PIPELINE_PROFILER = os.getenv("PIPELINE_PROFILER", "cprofile")
+PROFILE_SUMMARY_LINES = 60
+
 
 # ------------- Logging Setup -------------
 logger = logging.getLogger("cronjob")
@@ -32,7 +67,197 @@ def log_memory_usage(label=""):
     mem_mb = process.memory_info().rss / (1024 * 1024)
     logger.info(f"[MEMORY] {label} - RSS: {mem_mb:.2f} MB")
 
+# ------------- Child Watcher -------------
+# Each stage gets a watcher thread that samples the child's whole process tree
+# (shell + script + anything it spawns) every STAGE_SAMPLE_INTERVAL_SECONDS and
+# enforces the stage's wall-clock timeout and the optional memory ceiling itself,
+# so a hung child that prints nothing is still stopped.
+STAGE_SAMPLE_INTERVAL_SECONDS = float(os.getenv("STAGE_SAMPLE_INTERVAL_SECONDS", "15"))
+STAGE_SAMPLE_LOG_EVERY = 4           # log one [RESOURCES] line per N samples
+STAGE_MEMORY_LIMIT_MB = int(os.getenv("STAGE_MEMORY_LIMIT_MB", "0"))   # 0 = no ceiling
+TERMINATE_GRACE_SECONDS = 30         # SIGTERM -> SIGKILL escalation
+
+
+def _running(proc):
+    try:
+        return proc.status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+class StageWatcher(threading.Thread):
+    """Samples CPU%, RSS and I/O of a child process tree; terminates the tree on
+    timeout or when its RSS exceeds the memory ceiling. `stop_reason` is set to
+    "timeout" or "memory_limit" when the watcher stopped the child."""
+
+    def __init__(self, name, process, timeout_seconds=None, memory_limit_mb=None):
+        super().__init__(name=f"watch-{name}", daemon=True)
+        self.stage = name
+        self.process = process
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = STAGE_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.stop_reason = None
+        self._done = threading.Event()
+        self._procs = {}             # pid -> psutil.Process, kept so cpu_percent() has a baseline
+        self._io = {}                # pid -> (read_bytes, write_bytes), last seen per process
+        self.samples = 0
+        self.peak_tree_rss_mb = 0.0
+        self.max_cpu_percent = 0.0
+        self._cpu_total = 0.0
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def _tree(self):
+        try:
+            root = psutil.Process(self.process.pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+        tree = []
+        for p in procs:
+            tree.append(self._procs.setdefault(p.pid, p))
+        return tree
+
+    def sample(self):
+        rss = 0
+        cpu = 0.0
+        for p in self._tree():
+            try:
+                with p.oneshot():
+                    rss += p.memory_info().rss
+                    cpu += p.cpu_percent(None)
+                    try:
+                        io = p.io_counters()
+                        self._io[p.pid] = (io.read_bytes, io.write_bytes)
+                    except (psutil.AccessDenied, AttributeError):
+                        pass
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+        rss_mb = rss / (1024 * 1024)
+        self.samples += 1
+        self.peak_tree_rss_mb = max(self.peak_tree_rss_mb, rss_mb)
+        self.max_cpu_percent = max(self.max_cpu_percent, cpu)
+        self._cpu_total += cpu
+        return rss_mb, cpu
+
+    def summary(self):
+        return {
+            "samples": self.samples,
+            "tree_peak_rss_mb": round(self.peak_tree_rss_mb, 1),
+            "cpu_percent_max": round(self.max_cpu_percent, 1),
+            "cpu_percent_avg": round(self._cpu_total / self.samples, 1) if self.samples else None,
+            "io_read_mb": round(sum(r for r, _ in self._io.values()) / (1024 * 1024), 1),
+            "io_write_mb": round(sum(w for _, w in self._io.values()) / (1024 * 1024), 1),
+        }
+
+    def terminate_tree(self):
+        procs = self._tree()
+        for p in procs:
+            try:
+                p.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        # Poll rather than psutil.wait_procs(): waiting would reap the direct child
+        # and leave run_script's wait4() (exit code + rusage) with nothing to collect.
+        deadline = time.time() + TERMINATE_GRACE_SECONDS
+        alive = procs
+        while alive and time.time() < deadline:
+            time.sleep(0.5)
+            alive = [p for p in alive if _running(p)]
+        if alive:
+            logger.error(f"Escalating to kill for {self.stage} ({len(alive)} process(es) left).")
+            for p in alive:
+                try:
+                    p.kill()
+                except psutil.NoSuchProcess:
+                    pass
+
+    def run(self):
+        started = time.time()
+        while not self._done.wait(STAGE_SAMPLE_INTERVAL_SECONDS):
+            rss_mb, cpu = self.sample()
+            if self.samples % STAGE_SAMPLE_LOG_EVERY == 0:
+                summary = self.summary()
+                logger.info(
+                    f"[RESOURCES] {self.stage}: cpu={cpu:.0f}% rss={rss_mb:.0f}MB "
+                    f"read={summary['io_read_mb']:.0f}MB write={summary['io_write_mb']:.0f}MB"
+                )
+            elapsed = time.time() - started
+            if self.timeout_seconds and elapsed > self.timeout_seconds:
+                logger.error(f"⏱️ TIMEOUT: {self.stage} exceeded {self.timeout_seconds}s; terminating.")
+                self.stop_reason = "timeout"
+            elif self.memory_limit_mb and rss_mb > self.memory_limit_mb:
+                logger.error(
+                    f"MEMORY LIMIT: {self.stage} at {rss_mb:.0f}MB exceeds "
+                    f"{self.memory_limit_mb}MB; terminating."
+                )
+                self.stop_reason = "memory_limit"
+            if self.stop_reason:
+                self.terminate_tree()
+                return
+
+
 # ------------- Script Runner -------------
+def wait_with_rusage(process):
+    """process.wait() that also returns the child's resource usage (peak RSS and CPU
+    of the child and the descendants it waited for)."""
+    _, wait_status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(wait_status)
+    return process.returncode, rusage
+
+
+def profiled_command(name, cmd):
+    """Wrap a `python3 script.py ...` stage command in the configured profiler.
+    Returns (command, artifact path); the path is None when the stage can't be
+    profiled (e.g. the bash indexing stage), in which case `cmd` is unchanged."""
+    parts = shlex.split(cmd)
+    if len(parts) < 2 or os.path.basename(parts[0]) not in ("python", "python3"):
+        logger.warning(f"[PROFILE] {name}: not a python script stage; running unprofiled")
+        return cmd, None
+    base = os.path.join(TELEMETRY_DIR, name)
+    if PIPELINE_PROFILER == "py-spy":
+        if shutil.which("py-spy"):
+            out = f"{base}.profile.svg"
+            return shlex.join(["py-spy", "record", "--subprocesses", "--rate", "50",
+                               "-o", out, "--", *parts]), out
+        logger.warning("[PROFILE] py-spy not on PATH; falling back to cProfile")
+    out = f"{base}.pstats"
+    return shlex.join([parts[0], "profile_stage.py", out, *parts[1:]]), out
+
+
+def profile_artifacts(path):
+    """Existing artifact files for a profile written to `path` (a pstats dump also
+    gets a plain-text top-N summary for reading in the S3 console)."""
+    if not path or not os.path.exists(path):
+        return []
+    if not path.endswith(".pstats"):
+        return [path]
+    summary_path = f"{path}.txt"
+    try:
+        buf = io.StringIO()
+        pstats.Stats(path, stream=buf).sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+        with open(summary_path, "w") as f:
+            f.write(buf.getvalue())
+        return [path, summary_path]
+    except Exception as e:
+        logger.warning(f"[PROFILE] could not summarize {path}: {e}")
+        return [path]
+
+
+def record_stage(record, metrics_file):
+    """Attach the child's pipeline_metrics totals and file the stage record."""
+    try:
+        with open(metrics_file) as f:
+            record["metrics"] = json.load(f)
+    except (OSError, ValueError):
+        record["metrics"] = {}
+    logger.info(f"[TELEMETRY] {json.dumps(record, default=str)}")
+    with _telemetry_lock:
+        stage_telemetry.append(record)
+
+
 def run_script(name, cmd, timeout_seconds=None):
     start_ts = time.time()
     logger.info("")
@@ -43,6 +268,27 @@ def run_script(name, cmd, timeout_seconds=None):
 
     log_memory_usage(f"Before running {name}")
 
+    metrics_file = os.path.join(TELEMETRY_DIR, f"{name}.metrics.json")
+    profile_path = None
+    if name in PROFILE_STAGES:
+        cmd, profile_path = profiled_command(name, cmd)
+        if profile_path:
+            logger.info(f"[PROFILE] {name}: {cmd}")
+    record = {
+        "stage": name,
+        "status": "error",
+        "exit_code": None,
+        "started_at": datetime.datetime.utcnow(),
+        "finished_at": None,
+        "wall_seconds": None,
+        "peak_rss_mb": None,
+        "cpu_user_seconds": None,
+        "cpu_system_seconds": None,
+        "profile_artifacts": [],
+        "resources": {},
+    }
+
+    watcher = None
     try:
         process = subprocess.Popen(
             cmd,
@@ -50,57 +296,134 @@ def run_script(name, cmd, timeout_seconds=None):
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
-            bufsize=1
-
+            bufsize=1,
+            env={**os.environ, pipeline_metrics.METRICS_FILE_ENV: metrics_file}
         )
 
+        # Timeout and memory ceiling are enforced by the watcher, not here: a
+        # child that prints nothing would otherwise block readline() forever.
+        watcher = StageWatcher(name, process, timeout_seconds)
+        watcher.start()
+
         # Stream logs live
        # for line in process.stdout:
        #     logger.info(f"{name}: {line.strip()}")
        # for line in process.stderr:
        #     logger.error(f"{name} [ERR]: {line.strip()}")
-        start = time.time()
         assert process.stdout is not None
         for line in iter(process.stdout.readline, ""):
             logger.info(f"{name}: {line.rstrip()}")
-            if timeout_seconds and (time.time() - start) > timeout_seconds:
-                logger.error(f"⏱️ TIMEOUT: {name} exceeded {timeout_seconds}s; terminating.")
-                process.terminate()
-                try:
-                    process.wait(timeout=30)
-                except subprocess.TimeoutExpired:
-                    logger.error(f"Escalating to kill for {name}.")
-                    process.kill()
-                return False
         process.stdout.close()
-        exit_code = process.wait()
+        exit_code, rusage = wait_with_rusage(process)
+        watcher.stop()
         elapsed = time.time() - start_ts
+        record["exit_code"] = exit_code
+        # ru_maxrss is KiB on Linux. It includes the pre-exec copy of this process, so
+        # small stages report roughly run_all's own RSS as a floor.
+        record["peak_rss_mb"] = round(rusage.ru_maxrss / 1024, 1)
+        record["cpu_user_seconds"] = round(rusage.ru_utime, 1)
+        record["cpu_system_seconds"] = round(rusage.ru_stime, 1)
+
+        if watcher.stop_reason:
+            logger.error(f"❌ SCRIPT STOPPED: {name} ({watcher.stop_reason}) after {elapsed:.1f}s")
+            record["status"] = watcher.stop_reason
+            return False
 
         if exit_code != 0:
             #logger.error(f"❌ SCRIPT FAILED: {name} (exit code {exit_code})")
             logger.error(f"❌ SCRIPT FAILED: {name} (exit code {exit_code}) after {elapsed:.1f}s")
+            record["status"] = "failed"
             return False
 
         logger.info(f"✅ SCRIPT COMPLETED: {name}")
         logger.info(f"✅ SCRIPT COMPLETED: {name} in {elapsed:.1f}s")
         log_memory_usage(f"After running {name}")
+        record["status"] = "ok"
         return True
 
     except Exception as e:
         logger.exception(f"Exception while running {name}: {e}")
         return False
 
+    finally:
+        if watcher is not None:
+            if watcher.is_alive():
+                watcher.stop()
+            record["resources"] = watcher.summary()
+        record["finished_at"] = datetime.datetime.utcnow()
+        record["wall_seconds"] = round(time.time() - start_ts, 1)
+        record["profile_artifacts"] = profile_artifacts(profile_path)
+        record_stage(record, metrics_file)
+
+
+def write_telemetry(overall_success):
+    """Write the run's stage records to TELEMETRY_FILE. Returns the path."""
+    with _telemetry_lock:
+        stages = list(stage_telemetry)
+    with open(TELEMETRY_FILE, "w") as f:
+        json.dump({
+            "run_id": RUN_ID,
+            "started_at": RUN_STARTED_AT,
+            "finished_at": datetime.datetime.utcnow(),
+            "success": overall_success,
+            "stages": stages,
+        }, f, default=str, indent=2)
+    return TELEMETRY_FILE
+
+
+def record_run_history():
+    """Append this run's stage records to the run_history table. Never fails the
+    nightly: a missing table or unreachable DB is logged and ignored."""
+    with _telemetry_lock:
+        stages = list(stage_telemetry)
+    if not stages:
+        return
+    rows = [
+        (RUN_ID, r["stage"], r["status"], r["exit_code"], r["started_at"], r["finished_at"],
+         r["wall_seconds"], r["peak_rss_mb"], r["cpu_user_seconds"], r["cpu_system_seconds"],
+         json.dumps(r["metrics"]))
+        for r in stages
+    ]
+    try:
+        conn = pymysql.connect(
+            user=os.getenv("DB_USERNAME"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.getenv("DB_HOST"),
+            database=os.getenv("DB_NAME"),
+            charset="utf8mb4",
+            autocommit=True,
+        )
+        try:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "INSERT INTO run_history (run_id, stage, status, exit_code, started_at, "
+                    "finished_at, wall_seconds, peak_rss_mb, cpu_user_seconds, "
+                    "cpu_system_seconds, metrics) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                    rows,
+                )
+        finally:
+            conn.close()
+        logger.info(f"Recorded {len(rows)} stage(s) in run_history (run_id {RUN_ID})")
+    except Exception as e:
+        logger.error(f"Failed to record run_history: {e}")
+
 # ------------- S3 Upload -------------
-def upload_log_to_s3():
+def upload_log_to_s3(artifacts=()):
+    """Upload the log, plus any artifact files (telemetry JSON, ...) under the same
+    timestamp prefix: <prefix><ts>-cronjob.log, <prefix><ts>-<artifact name>."""
     try:
         cfg = Config(connect_timeout=5, read_timeout=60, retries={"max_attempts": 10, "mode": "standard"})
         s3 = boto3.client("s3", config=cfg)
         s3 = boto3.client("s3")
-        filename = f"{int(time.time())}-cronjob.log"
+        stamp = int(time.time())
+        filename = f"{stamp}-cronjob.log"
         s3_key = f"{S3_KEY_PREFIX}{filename}"
 
         logger.info(f"Uploading log to s3://{S3_BUCKET}/{S3_KEY_PREFIX}")
         s3.upload_file(LOG_FILE, S3_BUCKET, s3_key)
+        for path in artifacts:
+            s3.upload_file(path, S3_BUCKET, f"{S3_KEY_PREFIX}{stamp}-{os.path.basename(path)}")
         logger.info("Log upload complete")
 
     except Exception as e:
@@ -155,49 +478,138 @@ def run_pubmed_lane_if_due():
         logger.exception(f"PubMed lane failed (ignored — reporting unaffected): {e}")
 
 
-# ------------- External-source article projection (ReCiterDB #101) -------------
-def run_external_article_etl():
-    """Project the ExternalArticle DynamoDB table -> reciterdb.external_article.
+# ------------- Pipeline DAG -------------
+SCRIPT_TIMEOUT_SECONDS = int(os.getenv("SCRIPT_TIMEOUT_SECONDS", "15000"))
+PIPELINE_MAX_PARALLEL = int(os.getenv("PIPELINE_MAX_PARALLEL", "3"))
+
+
+def stage_timeout(name, default=SCRIPT_TIMEOUT_SECONDS):
+    """Per-stage wall-clock budget. STAGE_TIMEOUTS="retrieveNIH=3600,nightlyIndexing=9000"
+    overrides individual stages; anything not listed keeps `default`."""
+    for item in os.getenv("STAGE_TIMEOUTS", "").split(","):
+        stage, _, seconds = item.partition("=")
+        if stage.strip() == name and seconds.strip():
+            return int(seconds)
+    return default
+
+
+# Each stage starts as soon as every stage in `after` has finished, so stages with
+# no path between them run concurrently (up to PIPELINE_MAX_PARALLEL at a time) and
+# the nightly wall clock is the critical path rather than the sum of all steps.
+#   required  a failure stops the pipeline: no new stages start and the run fails.
+#             An optional stage's failure is logged, and stages after it still run.
+#   timeout   wall-clock budget for the stage, in seconds.
+STAGES = [
+    # External-source projection (ReCiterDB #101): ExternalArticle DynamoDB table ->
+    # reciterdb.external_article. Must finish before nightlyIndexing so the reporting
+    # SP's STEP 6b unions freshly-loaded external rows into the person-publication
+    # tables. Optional, so a scan/load hiccup degrades to stale/empty external pubs,
+    # never a failed nightly. Robust to an empty/absent DynamoDB table.
+    {"name": "externalArticles", "cmd": "python3 retrieveExternalArticles.py",
+     "after": [], "required": False,
+     "timeout": stage_timeout("externalArticles", int(os.getenv("EXTERNAL_ARTICLE_TIMEOUT_SECONDS", "600")))},
+    {"name": "executeFeatureGenerator", "cmd": "python3 executeFeatureGenerator.py",
+     "after": [], "required": True, "timeout": stage_timeout("executeFeatureGenerator")},
+    # Loads what Feature Generator just (re)scored.
+    {"name": "retrieveArticles", "cmd": "python3 retrieveArticles.py",
+     "after": ["executeFeatureGenerator"], "required": True, "timeout": stage_timeout("retrieveArticles")},
+    # Both read person_article / person_article_grant and write disjoint tables.
+    {"name": "retrieveNIH", "cmd": "python3 retrieveNIH.py",
+     "after": ["retrieveArticles"], "required": True, "timeout": stage_timeout("retrieveNIH")},
+    {"name": "retrieveReporter", "cmd": "python3 retrieveReporter.py",
+     "after": ["retrieveArticles"], "required": True, "timeout": stage_timeout("retrieveReporter")},
+    {"name": "nightlyIndexing", "cmd": "bash run_nightly_indexing.sh",
+     "after": ["retrieveNIH", "retrieveReporter", "externalArticles"], "required": True,
+     "timeout": stage_timeout("nightlyIndexing")},
+    # Abstracts + COI statements in one PubMedArticle pass (replaces
+    # separate abstractImport / conflictsImport steps). Needs analysis_summary_article.
+    {"name": "pubmedEnrichment", "cmd": "python3 pubmedEnrichment.py",
+     "after": ["nightlyIndexing"], "required": True, "timeout": stage_timeout("pubmedEnrichment")},
+]
+
+
+def validate_stages(stages):
+    """Reject unknown dependencies and cycles before anything is started."""
+    names = {s["name"] for s in stages}
+    for stage in stages:
+        unknown = set(stage["after"]) - names
+        if unknown:
+            raise ValueError(f"Stage {stage['name']} depends on unknown stage(s): {sorted(unknown)}")
+    by_name = {s["name"]: s for s in stages}
+    done = set()
+    visiting = set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through stage {name}")
+        visiting.add(name)
+        for dep in by_name[name]["after"]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in by_name:
+        visit(name)
+
+
+def run_pipeline(stages, max_parallel=PIPELINE_MAX_PARALLEL):
+    """Run `stages` as a DAG. Returns {stage name: "ok" | "failed" | "skipped"}.
+
+    A stage is skipped when a required stage it depends on did not succeed, or when
+    a required stage has already failed anywhere (stages already running are left
+    to finish)."""
+    validate_stages(stages)
+    by_name = {s["name"]: s for s in stages}
+    pending = [s["name"] for s in stages]
+    status = {}
+    running = {}
+    aborted = False
+    pipeline_start = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        while pending or running:
+            for name in list(pending):
+                stage = by_name[name]
+                if any(dep not in status for dep in stage["after"]):
+                    continue
+                if len(running) >= max_parallel and not aborted:
+                    break
+                pending.remove(name)
+                blocked = [d for d in stage["after"] if by_name[d]["required"] and status[d] != "ok"]
+                if aborted or blocked:
+                    status[name] = "skipped"
+                    reason = f"after failed {blocked}" if blocked else "pipeline stopped"
+                    logger.warning(f"⏭️ SKIPPING STAGE: {name} ({reason})")
+                    continue
+                running[executor.submit(run_script, name, stage["cmd"], stage["timeout"])] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    logger.exception(f"Stage {name} raised: {e}")
+                    ok = False
+                status[name] = "ok" if ok else "failed"
+                if not ok and by_name[name]["required"] and not aborted:
+                    aborted = True
+                    logger.error("Stopping pipeline due to script failure.")
+                elif not ok:
+                    logger.warning(f"Optional stage {name} failed (ignored — reporting unaffected).")
 
-    Isolated (try/except + timeout) so a scan/load hiccup can never fail the nightly
-    reporting rebuild. Runs every night BEFORE `nightlyIndexing` (see main()) so the
-    reporting SP's STEP 6b sees freshly-loaded external rows and unions them into the
-    person-publication tables (ReCiterDB #101, Option B). Robust to an empty/absent
-    DynamoDB table. Kept isolated -- NOT a fatal `scripts` entry -- so an external-
-    source hiccup degrades to stale/empty external pubs, never a failed nightly."""
-    try:
-        run_script("externalArticles", "python3 retrieveExternalArticles.py",
-                   timeout_seconds=int(os.getenv("EXTERNAL_ARTICLE_TIMEOUT_SECONDS", "600")))
-    except Exception as e:
-        logger.exception(f"External-article ETL failed (ignored — reporting unaffected): {e}")
+    logger.info(f"Pipeline stages finished in {time.time() - pipeline_start:.1f}s: {status}")
+    return status
 
 
 # ------------- Main Flow -------------
 def main():
-    scripts = [
-        ("executeFeatureGenerator", "python3 executeFeatureGenerator.py"),
-        ("retrieveArticles", "python3 retrieveArticles.py"),
-        ("retrieveNIH", "python3 retrieveNIH.py"),
-        ("retrieveReporter", "python3 retrieveReporter.py"),
-        ("nightlyIndexing", "bash run_nightly_indexing.sh"),
-        ("abstractImport", "python3 abstractImport.py"),
-        ("conflictsImport", "python3 conflictsImport.py")
-    ]
-
-    overall_success = True
-
-    # External-source projection MUST run before nightlyIndexing so the reporting SP
-    # (STEP 6b) unions freshly-loaded external_article rows (ReCiterDB #101). Isolated,
-    # so a failure here degrades to stale/empty external pubs, never a failed nightly.
-    run_external_article_etl()
-
-    for name, cmd in scripts:
-        #ok = run_script(name, cmd)
-        ok = run_script(name, cmd, timeout_seconds=int(os.getenv("SCRIPT_TIMEOUT_SECONDS", "15000")))
-        if not ok:
-            overall_success = False
-            logger.error("Stopping pipeline due to script failure.")
-            break
+    status = run_pipeline(STAGES)
+    overall_success = all(status.get(s["name"]) == "ok" for s in STAGES if s["required"])
 
     # Post-reporting projections/lanes — run only if the reporting rebuild succeeded,
     # each isolated so it can never fail the nightly.
@@ -205,7 +617,10 @@ def main():
         run_scopus_lane_if_due()              # weekly (Sun): AAR Scopus lane
         run_pubmed_lane_if_due()              # weekly (Sun): AAR PubMed lane
 
-    upload_log_to_s3()
+    record_run_history()
+    with _telemetry_lock:
+        profiles = [path for r in stage_telemetry for path in r["profile_artifacts"]]
+    upload_log_to_s3([write_telemetry(overall_success), *profiles])
 
     if not overall_success:
         logger.error("One or more scripts failed ❌")
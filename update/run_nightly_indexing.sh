@@ -180,75 +180,27 @@ run_indexing() {
 
     while [ $attempt -le $MAX_RETRIES ]; do
         log_info "Running populateAnalysisSummaryTables_v2 (attempt ${attempt}/${MAX_RETRIES})..."
-        log_info "Polling progress every 3 seconds..."
 
         local start_time=$(date +%s)
 
         # Clear old job logs for this run
         run_mysql "DELETE FROM analysis_job_log WHERE created_at < DATE_SUB(NOW(), INTERVAL 1 DAY)" > /dev/null 2>&1
 
-        # Get the current max ID before starting
-        local start_log_id=$(run_mysql "SELECT IFNULL(MAX(id),0) FROM analysis_job_log")
-
-        # Run the stored procedure in background
-        mysql -h "${DB_HOST}" -u "${DB_USER}" -p"${DB_PASS}" "${DB_NAME}" -e "CALL populateAnalysisSummaryTables_v2()" > /dev/null 2>&1 &
-        local mysql_pid=$!
-
-        # Poll for progress while the procedure runs
-        local last_id=${start_log_id:-0}
-        while kill -0 $mysql_pid 2>/dev/null; do
-            # Get new log entries
-            local results=$(run_mysql "SELECT id, step, substep, status, IFNULL(rows_affected,''), IFNULL(message,'') FROM analysis_job_log WHERE id > ${last_id} ORDER BY id")
-
-            if [ -n "$results" ]; then
-                echo "$results" | while IFS=$'\t' read -r id step substep status rows msg; do
-                    if [ -n "$id" ] && [ "$id" != "id" ]; then
-                        if [ -n "$rows" ] && [ "$rows" != "" ]; then
-                            log_info "  [${status}] ${step} > ${substep} (rows: ${rows}) ${msg}"
-                        else
-                            log_info "  [${status}] ${step} > ${substep} ${msg}"
-                        fi
-                    fi
-                done
-                # Update last_id
-                current_id=$(echo "$results" | tail -1 | cut -f1)
-                if [ -n "$current_id" ] && [ "$current_id" != "id" ]; then
-                    last_id=$current_id
-                fi
-            fi
-            sleep 3
-        done
-
-        # Wait for mysql process to finish and get exit code
-        wait $mysql_pid
+        # nightly_indexing.py calls the procedure on one connection and tails
+        # analysis_job_log on another, logging progress and per-step timings.
+        # Its exit code is 0 only when the job logged SUCCESS.
+        python3 "${SCRIPT_DIR}/nightly_indexing.py" 2>&1 | tee -a "${LOG_FILE}"
         local exit_code=$?
 
-        # Get any final log entries
-        local results=$(run_mysql "SELECT id, step, substep, status, IFNULL(rows_affected,''), IFNULL(message,'') FROM analysis_job_log WHERE id > ${last_id} ORDER BY id")
-        if [ -n "$results" ]; then
-            echo "$results" | while IFS=$'\t' read -r id step substep status rows msg; do
-                if [ -n "$id" ] && [ "$id" != "id" ]; then
-                    if [ -n "$rows" ] && [ "$rows" != "" ]; then
-                        log_info "  [${status}] ${step} > ${substep} (rows: ${rows}) ${msg}"
-                    else
-                        log_info "  [${status}] ${step} > ${substep} ${msg}"
-                    fi
-                fi
-            done
-        fi
-
         local end_time=$(date +%s)
         local duration=$((end_time - start_time))
 
-        # Check final status from log table
-        local final_status=$(run_mysql "SELECT status FROM analysis_job_log WHERE job_id = (SELECT MAX(job_id) FROM analysis_job_log) ORDER BY id DESC LIMIT 1")
-
-        if [ "$final_status" = "SUCCESS" ]; then
+        if [ $exit_code -eq 0 ]; then
             log_success "Indexing completed successfully in ${duration} seconds"
             return 0
         fi
 
-        log_error "Indexing attempt ${attempt} failed (status: ${final_status}, exit code: ${exit_code})"
+        log_error "Indexing attempt ${attempt} failed (exit code: ${exit_code})"
 
         if [ $attempt -lt $MAX_RETRIES ]; then
             log_info "Waiting ${RETRY_DELAY}s before retry..."
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Regression test: batched AAR scoring matches scoring each user on its own.
+
+score_users/iter_scored used to run _score once per user. They now stack many
+users' frames and run _score_batch, one model invocation per column layout.
+Derived features are row-wise, so every user's calibrated scores must come
+out exactly as from a per-user _score call -- including users whose input
+lacks optional columns, which the deriver fills with its own defaults.
+
+Run: python3 test_batch_scoring.py
+"""
+import numpy as np
+import pandas as pd
+
+from adversarial_attribution_review import PIPELINES, _score, _score_batch
+from preprocessing import FEEDBACK_IDENTITY_BASE_FEATURES
+
+NAMES = ["stephen", "yi", "christopher", "evelyn", "", None]
+
+
+def _frames():
+    rng = np.random.default_rng(11)
+    frames = []
+    for u in range(40):
+        n = int(rng.integers(1, 30))
+        df = pd.DataFrame(rng.normal(size=(n, len(FEEDBACK_IDENTITY_BASE_FEATURES))),
+                          columns=FEEDBACK_IDENTITY_BASE_FEATURES)
+        df['countAccepted'] = rng.integers(0, 30, n).astype(float)
+        df['countRejected'] = rng.integers(0, 30, n).astype(float)
+        df['pmid'] = np.arange(n) + 1000 * u
+        # mixed column layouts: optional name columns present or absent,
+        # a base feature missing, NaNs in what is present
+        if u % 3:
+            df['identityFirstName'] = [NAMES[(u + i) % len(NAMES)] for i in range(n)]
+            df['articleAuthorFirstName'] = [NAMES[(u * i) % len(NAMES)] for i in range(n)]
+        if u % 4 == 0:
+            df['nameMatchFirstType'] = [("full-exact", "noMatch", None)[i % 3] for i in range(n)]
+        if u % 5 == 0:
+            df = df.drop(columns=['emailMatchScore'])
+        if u % 7 == 0:
+            df.loc[df.index[::2], 'countAccepted'] = np.nan
+        frames.append(df)
+    return frames
+
+
+def test_batch_matches_per_user_scoring():
+    frames = _frames()
+    assert len({frozenset(df.columns) for df in frames}) > 1
+    for name, args in PIPELINES.items():
+        batched = _score_batch(frames, *args)
+        assert len(batched) == len(frames)
+        for df, cal in zip(frames, batched):
+            expected = _score(df, *args)
+            assert np.array_equal(cal, expected), f"{name}: batched scores differ"
+
+
+if __name__ == "__main__":
+    test_batch_matches_per_user_scoring()
+    print("OK: batched scoring matches per-user scoring")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Regression test: cached/compiled first-name similarity matches the pure-Python features.
+
+nameJaroWinkler and nameEditDistanceNorm used to be computed with
+_jaro_winkler_similarity and _levenshtein_distance on every article row. They
+now go through _first_name_similarity (memoized per name pair, Levenshtein via
+rapidfuzz when installed). The models were trained on the pure-Python values,
+so results must be identical, for either Levenshtein backend.
+
+Run: python3 test_name_similarity.py
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+import preprocessing
+from preprocessing import (
+    IDENTITY_ONLY_BASE_FEATURES,
+    _first_name_similarity,
+    _jaro_winkler_similarity,
+    _levenshtein_distance,
+    compute_derived_features_identity_only,
+)
+
+NAMES = ["stephen", "steven", "stefan", "s", "yi", "yin", "jean-pierre", "jean pierre",
+         "christopher", "christophe", "evelyn", "edward", "maría", "maria", "", "j."]
+
+
+def _pairs():
+    rng = random.Random(3)
+    pairs = [(a, b) for a in NAMES for b in NAMES]
+    for _ in range(3000):
+        pairs.append(tuple("".join(rng.choice("abcde") for _ in range(rng.randint(0, 9)))
+                           for _ in range(2)))
+    return pairs
+
+
+def _expected(a, b):
+    return (_jaro_winkler_similarity(a, b),
+            1.0 - _levenshtein_distance(a, b) / max(len(a), len(b), 1))
+
+
+def _check_all_pairs():
+    _first_name_similarity.cache_clear()
+    for a, b in _pairs():
+        assert _first_name_similarity(a, b) == _expected(a, b), (a, b)
+    # second pass is served from the cache and must not change anything
+    for a, b in _pairs():
+        assert _first_name_similarity(a, b) == _expected(a, b), (a, b)
+
+
+def test_similarity_matches_pure_python():
+    _check_all_pairs()
+
+
+def test_similarity_matches_without_rapidfuzz():
+    saved = preprocessing._edit_distance
+    preprocessing._edit_distance = _levenshtein_distance
+    try:
+        _check_all_pairs()
+    finally:
+        preprocessing._edit_distance = saved
+        _first_name_similarity.cache_clear()
+
+
+def test_derived_columns_match_row_wise_computation():
+    rng = random.Random(5)
+    n = 400
+    df = pd.DataFrame(0.0, index=range(n), columns=IDENTITY_ONLY_BASE_FEATURES)
+    df['identityFirstName'] = [rng.choice(NAMES + [None, "  Stephen "]) for _ in range(n)]
+    df['articleAuthorFirstName'] = [rng.choice(NAMES + [None, np.nan, "STEVEN"]) for _ in range(n)]
+    out = compute_derived_features_identity_only(df)
+
+    id_first = df['identityFirstName'].fillna('').astype(str).str.strip().str.lower()
+    art_first = df['articleAuthorFirstName'].fillna('').astype(str).str.strip().str.lower()
+    jw = [_jaro_winkler_similarity(a, b) for a, b in zip(id_first, art_first)]
+    ed = [1.0 - _levenshtein_distance(a, b) / max(len(a), len(b), 1)
+          for a, b in zip(id_first, art_first)]
+    assert out['nameJaroWinkler'].tolist() == jw
+    assert out['nameEditDistanceNorm'].tolist() == ed
+
+
+if __name__ == "__main__":
+    test_similarity_matches_pure_python()
+    test_similarity_matches_without_rapidfuzz()
+    test_derived_columns_match_row_wise_computation()
+    print("OK: cached first-name similarity matches the pure-Python features")
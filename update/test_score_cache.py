@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Regression test: scores served from the AAR score cache match fresh scoring.
+
+iter_scored keeps each scored input in SCORE_CACHE under its S3 ETag. When a
+later conditional GET is answered 304 Not Modified, the cached payload is
+rebuilt by _cached_payload instead of downloading and re-scoring the input.
+The weekly review trusts those scores as if freshly computed, so after a
+save/load round trip they must be identical: the same _user_rows output and
+the same calibrated arrays, dtype included (the calibrators emit float32).
+
+Run: python3 test_score_cache.py
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import botocore.exceptions
+import numpy as np
+
+import adversarial_attribution_review as det
+from preprocessing import FEEDBACK_IDENTITY_BASE_FEATURES
+
+NAMES = ["stephen", "yi", "christopher", "evelyn", "", None]
+
+
+def _inputs():
+    rng = np.random.default_rng(13)
+    store = {}
+    for u in range(12):
+        articles = []
+        for i in range(int(rng.integers(1, 25))):
+            a = {f: float(rng.normal()) for f in FEEDBACK_IDENTITY_BASE_FEATURES}
+            a['countAccepted'] = float(rng.integers(0, 30))
+            a['countRejected'] = float(rng.integers(0, 30))
+            a['pmid'] = 1000 * u + i
+            a['userAssertion'] = ("PENDING", "ACCEPTED", None)[i % 3]
+            if u % 3:
+                a['identityFirstName'] = NAMES[u % len(NAMES)]
+                a['articleAuthorFirstName'] = NAMES[i % len(NAMES)]
+            if u % 4 == 0:
+                a['nameMatchFirstScore'] = None
+            articles.append(a)
+        store[f"u{u}"] = json.dumps(articles).encode()
+    return store
+
+
+class _Body:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class _FakeS3:
+    """get_object over an in-memory store, honouring IfNoneMatch like S3."""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self, store, suffix):
+        self.store = {uid + suffix: data for uid, data in store.items()}
+        self.not_modified = 0
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        if Key not in self.store:
+            raise self.exceptions.NoSuchKey(Key)
+        etag = '"%s"' % hashlib.md5(self.store[Key]).hexdigest()
+        if IfNoneMatch == etag:
+            self.not_modified += 1
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+        return {"Body": _Body(self.store[Key]), "ETag": etag}
+
+
+def _rows(results):
+    # json so NaN compares equal to NaN
+    return json.dumps(results, sort_keys=True)
+
+
+def _with_fake_s3(fn):
+    saved_s3, saved_cache = det._s3, dict(det.SCORE_CACHE)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            fn(os.path.join(tmp, "score_cache.json.gz"))
+    finally:
+        det._s3 = saved_s3
+        det.load_score_cache(None)
+        det.SCORE_CACHE.update(saved_cache)
+
+
+def test_cached_rows_match_fresh_scoring():
+    def check(path):
+        store = _inputs()
+        uids = sorted(store) + ["absent"]
+        det._s3 = s3 = _FakeS3(store, det.SUFFIX)
+
+        det.load_score_cache(path)
+        fresh = list(det.score_users(uids, workers=2, batch_users=5))
+        det.save_score_cache(path)
+        assert s3.not_modified == 0
+
+        det.load_score_cache(path)
+        cached = list(det.score_users(uids, workers=2, batch_users=5))
+        assert s3.not_modified == len(store)
+        assert _rows(cached) == _rows(fresh)
+    _with_fake_s3(check)
+
+
+def test_cached_calibrated_arrays_keep_dtype():
+    def check(path):
+        store = _inputs()
+        det._s3 = s3 = _FakeS3(store, det.SUFFIX)
+
+        det.load_score_cache(path)
+        fresh = {uid: payload for _, uid, payload in det.iter_scored(sorted(store), workers=2)}
+        det.save_score_cache(path)
+
+        det.load_score_cache(path)
+        for _, uid, (_, _, cal) in det.iter_scored(sorted(store), pipelines=("io",), workers=2):
+            expected = fresh[uid][2]["io"]
+            assert cal["io"].dtype == expected.dtype
+            assert np.array_equal(cal["io"], expected)
+        assert s3.not_modified == len(store)
+    _with_fake_s3(check)
+
+
+def test_save_prunes_inputs_not_seen_since_load():
+    def check(path):
+        store = _inputs()
+        det._s3 = _FakeS3(store, det.SUFFIX)
+
+        det.load_score_cache(path)
+        list(det.score_users(sorted(store), workers=2))
+        det.save_score_cache(path)
+
+        det.load_score_cache(path)
+        list(det.score_users(["u1", "u2"], workers=2))
+        det.save_score_cache(path)
+        assert det.load_score_cache(path) == 2
+    _with_fake_s3(check)
+
+
+if __name__ == "__main__":
+    test_cached_rows_match_fresh_scoring()
+    test_cached_calibrated_arrays_keep_dtype()
+    test_save_prunes_inputs_not_seen_since_load()
+    print("OK: cached AAR scores match fresh scoring")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Regression test: the vectorized Wilson lower bound matches the scalar one.
+
+compute_derived_features_feedback_identity used to fill acceptanceRateLowerBound
+with a row-wise df.apply(wilson_lower_bound), i.e. one scipy norm.ppf call per
+article. It now uses wilson_lower_bound_array; the models were trained on the
+scalar values, so the two must agree exactly, not just approximately.
+
+Run: python3 test_wilson_lower_bound.py
+"""
+import numpy as np
+import pandas as pd
+
+from preprocessing import (
+    FEEDBACK_IDENTITY_BASE_FEATURES,
+    compute_derived_features_feedback_identity,
+    wilson_lower_bound,
+    wilson_lower_bound_array,
+)
+
+
+def _counts():
+    rng = np.random.default_rng(7)
+    grid = np.arange(0, 40, dtype=float)
+    s, f = np.meshgrid(grid, grid)
+    successes = np.concatenate([s.ravel(), rng.integers(0, 5000, 500), rng.random(50) * 10, [np.nan, 3, np.nan]])
+    failures = np.concatenate([f.ravel(), rng.integers(0, 5000, 500), rng.random(50) * 10, [2, np.nan, np.nan]])
+    return successes, failures
+
+
+def test_array_matches_scalar_bit_for_bit():
+    successes, failures = _counts()
+    for confidence in (0.95, 0.9, 0.99):
+        expected = np.array([wilson_lower_bound(a, r, confidence=confidence)
+                             for a, r in zip(successes, failures)])
+        actual = wilson_lower_bound_array(successes, failures, confidence=confidence)
+        assert np.array_equal(actual, expected), f"mismatch at confidence={confidence}"
+
+
+def test_derived_feature_matches_row_wise_apply():
+    successes, failures = _counts()
+    df = pd.DataFrame(0.0, index=range(len(successes)), columns=FEEDBACK_IDENTITY_BASE_FEATURES)
+    df['countAccepted'] = np.nan_to_num(successes)
+    df['countRejected'] = np.nan_to_num(failures)
+    expected = df.apply(
+        lambda row: wilson_lower_bound(row['countAccepted'], row['countRejected'], confidence=0.95),
+        axis=1,
+    )
+    actual = compute_derived_features_feedback_identity(df)['acceptanceRateLowerBound']
+    assert np.array_equal(actual.to_numpy(), expected.to_numpy())
+
+
+if __name__ == "__main__":
+    test_array_matches_scalar_bit_for_bit()
+    test_derived_feature_matches_row_wise_apply()
+    print("OK: vectorized Wilson lower bound matches the scalar function")